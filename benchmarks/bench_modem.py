@@ -0,0 +1,81 @@
+"""
+End-to-end benchmarks against SIM900 emulator (pseudo terminal, POSIX systems only)
+"""
+
+import logging
+from lib.sim900.emulator import SimGsmEmulator
+from lib.sim900.session import SimGsmSession
+from lib.sim900.smshandler import SimSmsPduCompiler
+from test_shared import initializeUartPort
+
+HTTP_SERVER = "example.com"
+HTTP_BODY   = b"0123456789" * 100
+
+class SimEmulatorFixture:
+    def __init__(self):
+        self.emulator = SimGsmEmulator(logging.getLogger("benchmarks"))
+        self.emulator.httpResponses["{0}:80/bench".format(HTTP_SERVER)] = (200, HTTP_BODY)
+
+        if not self.emulator.start():
+            raise RuntimeError(self.emulator.errorText)
+
+        self.session = SimGsmSession(initializeUartPort(self.emulator.portName), logging.getLogger("benchmarks"))
+        if (not self.session.openPort()) or (not self.session.begin(2)):
+            raise RuntimeError("can't initialize emulated module: {0}".format(self.session.errorText))
+
+        if not self.session.inet.attachGPRS("internet", "", ""):
+            raise RuntimeError("can't attach GPRS: {0}".format(self.session.errorText))
+
+    def close(self):
+        self.session.closePort()
+        self.emulator.stop()
+
+def sendPduBenchmark(fixture):
+    pdu = SimSmsPduCompiler("", "+380971234567", "Hello, world! Message from GSM module.")
+
+    def run():
+        if not fixture.session.sms.sendPduMessage(pdu):
+            raise RuntimeError("sending failed")
+
+    return run
+
+def httpGetBenchmark(fixture):
+    def run():
+        if not fixture.session.inet.httpGet(HTTP_SERVER, 80, "/bench"):
+            raise RuntimeError("HTTP GET failed")
+
+    return run
+
+def httpPostBenchmark(fixture):
+    def run():
+        if not fixture.session.inet.httpPOST(HTTP_SERVER, 80, "/bench", "a=1&b=2&c=3"):
+            raise RuntimeError("HTTP POST failed")
+
+    return run
+
+#received message stored in emulated SIM storage
+RECEIVED_PDU    = "07911326040011F5240B911326880736F40000111081017362401654747A0E4ACF41F4329E0E6A97E7F3F0B90C8A01"
+INBOX_SIZE      = 20
+
+def drainInboxBenchmark(fixture):
+    def run():
+        for i in range(INBOX_SIZE):
+            fixture.emulator.receiveSms(RECEIVED_PDU)
+
+        count = sum(1 for _ in fixture.session.sms.drainInbox())
+        if count != INBOX_SIZE:
+            raise RuntimeError("drained {0} messages: {1}".format(count, fixture.session.errorText))
+
+    return run
+
+def benchmarks():
+    def withFixture(factory):
+        fixture = SimEmulatorFixture()
+        return factory(fixture), fixture.close
+
+    return [
+        ("modem_send_pdu",  lambda: withFixture(sendPduBenchmark)),
+        ("modem_http_get",  lambda: withFixture(httpGetBenchmark)),
+        ("modem_http_post", lambda: withFixture(httpPostBenchmark)),
+        ("modem_drain_inbox_{0}".format(INBOX_SIZE), lambda: withFixture(drainInboxBenchmark))
+    ]
@@ -0,0 +1,52 @@
+"""
+Benchmarks of responses reading and parsing (in-memory port)
+"""
+
+import logging
+from lib.sim900.gsm import SimGsmSerialPortHandler
+from benchmarks.memoryport import SimMemoryPort
+
+SIZES = {
+    "1kb":      1024,
+    "32kb":     32 * 1024,
+    "300kb":    300 * 1024
+}
+
+def responseLines(size):
+    line  = b"+BENCH: 0123456789ABCDEF0123456789ABCDEF0123456789ABCDEF01234\r\n"
+    count = max(1, size // len(line))
+    return line * count
+
+def commandBenchmark(size, chunkSize):
+    port    = SimMemoryPort({"AT+BENCH": b"\r\n" + responseLines(size) + b"\r\nOK\r\n"}, chunkSize)
+    handler = SimGsmSerialPortHandler(port, logging.getLogger("benchmarks"))
+    handler.openPort()
+
+    def run():
+        ret = handler.commandAndStdResult("AT+BENCH", 10000)
+        if (ret is None) or (handler.lastResult != "OK"):
+            raise RuntimeError("command failed")
+
+    return run
+
+def readLnBenchmark(size):
+    port    = SimMemoryPort()
+    handler = SimGsmSerialPortHandler(port, logging.getLogger("benchmarks"))
+    handler.openPort()
+    data    = responseLines(size)
+
+    def run():
+        port.feed(data)
+        while handler.readLn(0) is not None:
+            pass
+
+    return run
+
+def benchmarks():
+    ret = []
+    for name, size in SIZES.items():
+        ret.append(("command_response_{0}".format(name), lambda size = size: (commandBenchmark(size, None), None)))
+        ret.append(("command_response_{0}_serial_chunks".format(name), lambda size = size: (commandBenchmark(size, 64), None)))
+        ret.append(("readln_{0}".format(name), lambda size = size: (readLnBenchmark(size), None)))
+
+    return ret
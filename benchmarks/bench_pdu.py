@@ -0,0 +1,60 @@
+"""
+Benchmarks of SMS PDU compilation
+"""
+
+from lib.sim900.smshandler import SimSmsPduCompiler, SimSmsPduDecoder
+from lib.sim900.smsbulk import SimSmsPduBulkCompiler
+
+SCA         = "+380501234567"
+RECIPIENT   = "+380971234567"
+
+TEXTS = {
+    "7bit_short":       "Hello, world! Message from GSM module.",
+    "ucs2_short":       "Тестовое сообщение, test message",
+    "7bit_multipart":   "Hello, world! Message from GSM module. " * 12,
+    "ucs2_multipart":   "Тестовое сообщение из GSM модуля. " * 10
+}
+
+def compileBenchmark(text):
+    def run():
+        ret = SimSmsPduCompiler(SCA, RECIPIENT, text).compile()
+        if ret is None:
+            raise RuntimeError("PDU compilation failed")
+
+    return run
+
+#count of messages in bulk compilation benchmark
+BULK_SIZE   = 1000
+
+def bulkCompileBenchmark():
+    messages = [("+38097{0:07d}".format(i), TEXTS["7bit_short"]) for i in range(BULK_SIZE)]
+    compiler = SimSmsPduBulkCompiler(SCA)
+
+    def run():
+        for ret in compiler.compile(messages):
+            if ret is None:
+                raise RuntimeError("PDU compilation failed")
+
+    return run
+
+#received messages (SMS-DELIVER with SCA): 7-bit and UCS2 part of multipart message
+RECEIVED = {
+    "7bit":             "07911326040011F5240B911326880736F40000111081017362401654747A0E4ACF41F4329E0E6A97E7F3F0B90C8A01",
+    "ucs2_multipart":   "0791889863028020400C91889818050211000811707021417423140500030402010041006E00640072006F00690064"
+}
+
+def decodeBenchmark(pdu):
+    decoder = SimSmsPduDecoder()
+
+    def run():
+        if decoder.decode(pdu) is None:
+            raise RuntimeError("PDU decoding failed")
+
+    return run
+
+def benchmarks():
+    ret  = [("pdu_compile_{0}".format(name), lambda text = text: (compileBenchmark(text), None)) for name, text in TEXTS.items()]
+    ret += [("pdu_bulk_compile_{0}".format(BULK_SIZE), lambda: (bulkCompileBenchmark(), None))]
+    ret += [("pdu_decode_{0}".format(name), lambda pdu = pdu: (decodeBenchmark(pdu), None)) for name, pdu in RECEIVED.items()]
+
+    return ret
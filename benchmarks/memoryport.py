@@ -0,0 +1,85 @@
+"""
+In-memory serial port for benchmarks. Port answers on command lines by prepared responses, so handlers can be
+measured without modules and without pseudo terminals.
+"""
+
+import threading
+
+class SimMemoryPort:
+    def __init__(self, responses = None, chunkSize = None):
+        """
+        Creates port
+
+        :param responses: command line -> response bytes (or function which receives command line and returns bytes)
+        :param chunkSize: max bytes count returned by one read() call, None for unlimited
+        """
+        self.responses  = responses if responses is not None else {}
+        self.chunkSize  = chunkSize
+        self.timeout    = 0
+        self.baudrate   = 115200
+        self.is_open    = False
+
+        self.__input    = bytearray()
+        self.__line     = bytearray()
+        self.__lock     = threading.Lock()
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def flush(self):
+        pass
+
+    def flushInput(self):
+        with self.__lock:
+            self.__input = bytearray()
+
+    def reset_input_buffer(self):
+        self.flushInput()
+
+    @property
+    def in_waiting(self):
+        return len(self.__input)
+
+    def inWaiting(self):
+        return len(self.__input)
+
+    def feed(self, data):
+        """
+        Adds data which will be returned by read() calls
+
+        :param data: bytes
+        :return: nothing
+        """
+        with self.__lock:
+            self.__input += data
+
+    def write(self, data):
+        self.__line += data
+
+        while True:
+            idx = self.__line.find(b"\r")
+            if idx == -1:
+                return len(data)
+
+            command     = bytes(self.__line[:idx]).strip().decode("latin-1")
+            self.__line = self.__line[idx + 1:]
+
+            response = self.responses.get(command)
+            if callable(response):
+                response = response(command)
+
+            if response is not None:
+                self.feed(response)
+
+    def read(self, size = 1):
+        with self.__lock:
+            if self.chunkSize is not None:
+                size = min(size, self.chunkSize)
+
+            ret = bytes(self.__input[:size])
+            del self.__input[:size]
+
+        return ret
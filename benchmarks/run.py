@@ -0,0 +1,147 @@
+#!/usr/bin/python3
+"""
+Benchmarks runner. Reports operations per second and latency percentiles, saves results as JSON.
+
+Usage (from repository root):
+
+    python3 -m benchmarks.run [--filter pdu] [--output results.json] [--compare old.json]
+
+Each benchmark module provides benchmarks() function which returns list of (name, setup) pairs. Setup function
+returns tuple (operation, teardown), teardown can be None.
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+
+from benchmarks import bench_pdu, bench_parsing, bench_modem
+
+BENCHMARK_MODULES = [bench_pdu, bench_parsing, bench_modem]
+
+def percentile(values, p):
+    """
+    Returns percentile of values (nearest rank)
+
+    :param values: sorted values
+    :param p: percentile (0 - 100)
+    :return: percentile value
+    """
+    if len(values) == 0:
+        return 0.0
+
+    idx = int(round(p / 100.0 * (len(values) - 1)))
+    return values[min(len(values) - 1, max(0, idx))]
+
+def measure(operation, minTime, minIterations, warmup):
+    """
+    Executes operation and measures each execution time
+
+    :param operation: function without arguments
+    :param minTime: min measurement time in seconds
+    :param minIterations: min count of executions
+    :param warmup: count of executions before measurement
+    :return: results dictionary
+    """
+    for i in range(warmup):
+        operation()
+
+    times = []
+    start = time.perf_counter()
+    while (len(times) < minIterations) or (time.perf_counter() - start < minTime):
+        opStart = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - opStart)
+
+    total = sum(times)
+    times.sort()
+
+    return {
+        "iterations":   len(times),
+        "opsPerSec":    len(times) / total if total > 0 else 0.0,
+        "meanMs":       total / len(times) * 1000.0,
+        "minMs":        times[0] * 1000.0,
+        "p50Ms":        percentile(times, 50) * 1000.0,
+        "p99Ms":        percentile(times, 99) * 1000.0,
+        "maxMs":        times[-1] * 1000.0
+    }
+
+def runBenchmarks(nameFilter, minTime, minIterations, warmup):
+    results = {}
+
+    for module in BENCHMARK_MODULES:
+        for name, setup in module.benchmarks():
+            if (nameFilter is not None) and (nameFilter not in name):
+                continue
+
+            try:
+                operation, teardown = setup()
+            except Exception as e:
+                print("{0:<44} skipped: {1}".format(name, e))
+                continue
+
+            try:
+                results[name] = measure(operation, minTime, minIterations, warmup)
+            except Exception as e:
+                print("{0:<44} failed: {1}".format(name, e))
+                continue
+            finally:
+                if teardown is not None:
+                    teardown()
+
+            r = results[name]
+            print("{0:<44} {1:>12.1f} ops/s  p50 {2:>9.3f} ms  p99 {3:>9.3f} ms".format(
+                name,
+                r["opsPerSec"],
+                r["p50Ms"],
+                r["p99Ms"]
+            ))
+
+    return results
+
+def printComparison(results, previous):
+    print("")
+    print("comparison with previous run:")
+    for name, r in sorted(results.items()):
+        old = previous.get(name)
+        if (old is None) or (old["opsPerSec"] == 0):
+            continue
+
+        change = (r["opsPerSec"] / old["opsPerSec"] - 1.0) * 100.0
+        print("{0:<44} {1:>12.1f} -> {2:>12.1f} ops/s ({3:+.1f}%)".format(name, old["opsPerSec"], r["opsPerSec"], change))
+
+def main():
+    parser = argparse.ArgumentParser(description = "sim-module benchmarks")
+    parser.add_argument("--filter", default = None, help = "run only benchmarks which names contain this text")
+    parser.add_argument("--min-time", type = float, default = 1.0, help = "min measurement time for each benchmark (s)")
+    parser.add_argument("--min-iterations", type = int, default = 10, help = "min count of executions")
+    parser.add_argument("--warmup", type = int, default = 2, help = "count of executions before measurement")
+    parser.add_argument("--output", default = None, help = "JSON file for results")
+    parser.add_argument("--compare", default = None, help = "JSON file with results of previous run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level = logging.CRITICAL)
+
+    results = runBenchmarks(args.filter, args.min_time, args.min_iterations, args.warmup)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            printComparison(results, json.load(f)["results"])
+
+    if args.output is not None:
+        report = {
+            "timestamp":    time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python":       platform.python_version(),
+            "platform":     platform.platform(),
+            "results":      results
+        }
+
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent = 2, sort_keys = True)
+
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,631 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+This file is part of sim-module package. asyncio based client for SIM900 modules, allows to drive many modules
+from one event loop.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import re
+import asyncio
+import collections
+from lib.sim900.simshared import *
+from lib.sim900.atparser import SimGsmLineFramer, SimGsmResponseAccumulator
+from lib.sim900.gsm import SimGsm, SimGsmPinRequestState, SimGsmSerialPortHandler, SimGsmUrc
+from lib.sim900.ussdhandler import SimUssdHandler
+
+### conditional import ###
+
+# pyserial-asyncio is not required, without it port descriptor will be attached to the event loop as a pipe
+try:
+    import serial_asyncio
+except ImportError:
+    serial_asyncio = None
+
+class SimGsmAsyncProtocol(asyncio.Protocol):
+    def __init__(self, logger):
+        asyncio.Protocol.__init__(self)
+
+        self.logger         = logger
+        self.transport      = None
+
+        #response of currently executed command
+        self.__response     = None
+        self.__future       = None
+
+        #data lines received when no command is executed
+        self.__framer       = SimGsmLineFramer()
+        self.__lines        = asyncio.Queue()
+
+        #unsolicited result codes (they are removed from commands responses too), first line of multiline result code
+        self.__urcs         = collections.deque(maxlen = SimGsmUrc.MAX_PENDING)
+        self.__urcReceived  = asyncio.Event()
+        self.__urcPartial   = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        if (self.__future is not None) and (not self.__future.done()):
+            self.__future.set_exception(ConnectionError("port connection lost: {0}".format(exc)))
+
+    def data_received(self, data):
+        if self.__response is not None:
+            if not self.__response.feed(data):
+                return
+
+            self.__finishResponse()
+            return
+
+        self.__queueLines(data)
+
+    def __queueLines(self, data):
+        self.__framer.feed(data)
+        for line in self.__framer.lines():
+            line = line.strip()
+            if (len(line) > 0) and (not self.filterUrcLine(line)):
+                self.__lines.put_nowait(line)
+
+    def filterUrcLine(self, line, solicitedPrefixes = ()):
+        """
+        Moves unsolicited result codes to result codes queue
+
+        :param line: stripped line
+        :param solicitedPrefixes: prefixes of responses of executed command (they are not unsolicited)
+        :return: True when line was taken as unsolicited result code
+        """
+        if self.__urcPartial is not None:
+            line              = self.__urcPartial + "\n" + line
+            self.__urcPartial = None
+        else:
+            prefix = SimGsmSerialPortHandler.urcPrefix(line)
+            if (prefix in solicitedPrefixes) or (prefix not in SimGsmUrc.KNOWN_PREFIXES):
+                return False
+
+        if SimGsmSerialPortHandler.isUrcIncomplete(line):
+            self.__urcPartial = line
+            return True
+
+        self.__urcs.append(line)
+        self.__urcReceived.set()
+        return True
+
+    def __finishResponse(self):
+        #data received after final result code goes to the lines queue
+        remainder       = self.__response.takeRemainder()
+        self.__response = None
+
+        if (self.__future is not None) and (not self.__future.done()):
+            self.__future.set_result(True)
+
+        self.__queueLines(remainder)
+
+    def startResponse(self, response):
+        """
+        Starts collecting of command response
+
+        :param response: SimGsmResponseAccumulator object for command response
+        :return: future which will be done when final result code will be received
+        """
+        self.__future   = asyncio.get_running_loop().create_future()
+        self.__response = response
+
+        #lines which were received before command (like late response of timed out command) are not its response
+        self.flushLines()
+
+        #not finished line belongs to the command response
+        pending = self.__framer.takePending()
+        if len(pending) > 0:
+            self.data_received(pending)
+
+        return self.__future
+
+    def stopResponse(self):
+        self.__response = None
+        self.__future   = None
+
+    def flushLines(self):
+        """
+        Removes received data lines (like late response of timed out command)
+
+        :return: nothing
+        """
+        while not self.__lines.empty():
+            self.logger.debug("dropping data line: %s", self.__lines.get_nowait())
+
+    async def readLine(self, timeout):
+        """
+        Returns next non empty line received outside of commands responses
+
+        :param timeout: max wait time in seconds
+        :return: received line or None on timeout
+        """
+        try:
+            return await asyncio.wait_for(self.__lines.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def discardUrcs(self, prefix):
+        """
+        Removes kept unsolicited result codes with given prefix
+
+        :param prefix: result code prefix, like '+CUSD'
+        :return: nothing
+        """
+        for line in [line for line in self.__urcs if SimGsmSerialPortHandler.urcPrefix(line) == prefix]:
+            self.__urcs.remove(line)
+
+    async def readUrc(self, prefix, timeout):
+        """
+        Returns unsolicited result code with given prefix, other result codes are kept
+
+        :param prefix: result code prefix, like '+HTTPACTION'
+        :param timeout: max wait time in seconds
+        :return: result code or None on timeout
+        """
+        loop     = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        while True:
+            for line in self.__urcs:
+                if SimGsmSerialPortHandler.urcPrefix(line) == prefix:
+                    self.__urcs.remove(line)
+                    return line
+
+            self.__urcReceived.clear()
+            timeLeft = deadline - loop.time()
+            if timeLeft <= 0:
+                return None
+
+            try:
+                await asyncio.wait_for(self.__urcReceived.wait(), timeLeft)
+            except asyncio.TimeoutError:
+                return None
+
+class AsyncSimGsm(AminisLastErrorHolderWithLogging):
+    def __init__(self, serial, logger = None):
+        AminisLastErrorHolderWithLogging.__init__(self, logger)
+
+        self.__serial           = serial
+        self.__protocol         = None
+        self.__transports       = []
+        self.__writer           = None
+
+        #only one command can be executed at the same time, operations (like HTTP request) must not be mixed
+        self.__commandLock      = None
+        self.__operationLock    = None
+
+        #stores last executed command result
+        self.lastResult         = None
+        self.lastResponseLines  = None
+
+        self.pinState           = SimGsmPinRequestState.UNKNOWN
+        self.sendingResult      = ""
+        self.lastUssdResult     = None
+        self.lastUssdDcs        = None
+        self.httpResult         = 0
+        self.httpResponse       = None
+        self.userAgent          = "Aminis SIM-900 module client (version 0.1)"
+
+    async def openPort(self):
+        """
+        Opens port (if it's not opened yet) and attaches it to the running event loop
+
+        :return: True if everything is OK, otherwise returns False
+        """
+        loop = asyncio.get_running_loop()
+
+        self.__commandLock      = asyncio.Lock()
+        self.__operationLock    = asyncio.Lock()
+        self.__protocol         = SimGsmAsyncProtocol(self.logger)
+
+        try:
+            if not self.__serial.isOpen():
+                self.__serial.open()
+
+            if serial_asyncio is not None:
+                transport = serial_asyncio.SerialTransport(loop, self.__protocol, self.__serial)
+                self.__transports = [transport]
+                self.__writer     = transport
+            else:
+                (reader, _) = await loop.connect_read_pipe(lambda: self.__protocol, self.__serial)
+                (writer, _) = await loop.connect_write_pipe(asyncio.BaseProtocol, self.__serial)
+                self.__transports = [reader, writer]
+                self.__writer     = writer
+        except Exception as e:
+            self.setError("exception till port openning: {0}".format(e))
+            return False
+
+        return True
+
+    async def closePort(self):
+        """
+        Detaches port from event loop and closes it
+
+        :return: nothing
+        """
+        for transport in self.__transports:
+            transport.close()
+
+        self.__transports   = []
+        self.__writer       = None
+
+        #letting transports to finish closing
+        await asyncio.sleep(0)
+
+        try:
+            self.__serial.close()
+        except Exception as e:
+            self.setError("error closing port: {0}".format(e))
+
+    def __writeLn(self, commandText):
+        self.__writer.write(bytearray(commandText, "ascii") + b"\r\n")
+
+    async def command(self, commandText, maxWaitTime = 5000, possibleResults = None):
+        """
+        Sends command and waits for one of final result codes
+
+        :param commandText: command for execution
+        :param maxWaitTime: max wait time for result
+        :param possibleResults: expected final result codes, by default - "OK" and "ERROR"
+        :return: response text (without final result code) or None on error or timeout
+        """
+        if possibleResults is None:
+            possibleResults = ["OK", "ERROR"]
+
+        async with self.__commandLock:
+            self.lastResult         = None
+            self.lastResponseLines  = None
+
+            #responses with command names are not unsolicited result codes
+            solicited = set(re.findall(r"\+[A-Z]+", str(commandText).upper()))
+            response  = SimGsmResponseAccumulator(
+                possibleResults,
+                lineFilter = lambda line: self.__protocol.filterUrcLine(line, solicited)
+            )
+            future    = self.__protocol.startResponse(response)
+
+            try:
+                self.__writeLn(commandText)
+                await asyncio.wait_for(future, maxWaitTime / 1000.0)
+            except asyncio.TimeoutError:
+                #late response must not be taken as data of next operations
+                self.__protocol.flushLines()
+                return None
+            except Exception as e:
+                self.setError("error executing command '{0}': {1}".format(commandText, e))
+                return None
+            finally:
+                self.__protocol.stopResponse()
+
+            self.lastResult         = response.result
+            self.lastResponseLines  = response.lines
+
+            return response.text
+
+    async def execSimpleOkCommand(self, commandText, timeout = 500):
+        ret = await self.command(commandText, timeout, ["OK", "ERROR"])
+        if (ret is None) or (self.lastResult != "OK"):
+            return False
+
+        return True
+
+    async def execSimpleCommandsList(self, commandsList):
+        for command in commandsList:
+            if not await self.execSimpleOkCommand(command[0], command[1]):
+                return False
+
+        return True
+
+    async def readDataLine(self, maxWaitTime = 500):
+        """
+        Returns non empty data string received outside of commands responses (unsolicited result codes are read by
+        readUrcLine())
+
+        :param maxWaitTime: max wait time for receiving
+        :return: received string or None on timeout
+        """
+        return await self.__protocol.readLine(maxWaitTime / 1000.0)
+
+    async def readUrcLine(self, prefix, maxWaitTime = 500):
+        """
+        Waits for unsolicited result code with given prefix. Result code which was received during other commands is
+        returned first, so codes which were received before sending of command must be removed with
+        discardPendingUrcs().
+
+        :param prefix: result code prefix, like '+HTTPACTION'
+        :param maxWaitTime: max wait time
+        :return: result code line or None on timeout
+        """
+        return await self.__protocol.readUrc(prefix, maxWaitTime / 1000.0)
+
+    def discardPendingUrcs(self, prefix):
+        """
+        Removes kept unsolicited result codes with given prefix
+
+        :param prefix: result code prefix, like '+CUSD'
+        :return: nothing
+        """
+        self.__protocol.discardUrcs(prefix)
+
+    async def begin(self, numberOfAttempts = 5):
+        async with self.__operationLock:
+            ok = False
+            for i in range(numberOfAttempts):
+                ret = await self.command("AT", 2000)
+                if (ret is not None) and (self.lastResult == "OK"):
+                    ok = True
+                    break
+
+                await asyncio.sleep(0.2)
+
+            if not ok:
+                return False
+
+            #disabling echo if needed
+            if "AT" in [str(line).strip() for line in self.lastResponseLines]:
+                self.logger.info("Disabling echo, calling 'ATE0'")
+                if not await self.execSimpleOkCommand("ATE0", 500):
+                    return False
+
+            commands = [
+                ["ATV1",        500],   #short answer for commands
+                ["AT+CMEE=0",   500],   #disabling error report
+                ["AT",          5000]   #checking state
+            ]
+
+            if not await self.execSimpleCommandsList(commands):
+                return False
+
+            #checking PIN state
+            msg = await self.command("AT+CPIN?")
+            if (msg is None) or (self.lastResult != "OK"):
+                return False
+
+            pinState = SimGsm.parsePinState(msg)
+            if (pinState is None) or (pinState == SimGsmPinRequestState.UNKNOWN):
+                self.setError("Wrong response for PIN state request: '{0}'".format(str(msg).strip()))
+                return False
+
+            self.pinState = pinState
+            return True
+
+    async def enterPin(self, pinCode):
+        return await self.execSimpleOkCommand("AT+CPIN=\"{0}\"".format(pinCode))
+
+    async def getIMEI(self):
+        data = await self.command("AT+GSN", 1000)
+        if (data is None) or (self.lastResult != "OK"):
+            return None
+
+        return str(data).strip()
+
+    async def sendPduMessage(self, pduHelper, numberOfAttempts = 3):
+        """
+        Sends SMS message in PDU mode
+
+        :param pduHelper: SimSmsPduCompiler object with message
+        :param numberOfAttempts: number of attempts for each message part
+        :return: True if all message parts was sent, otherwise returns False
+        """
+        d = pduHelper.compile()
+        if d is None:
+            self.setError("error compiling PDU sms")
+            return False
+
+        async with self.__operationLock:
+            tuneCommands = [
+                ["AT+CSCS=\"GSM\"",     500],
+                ["AT+CMGF=0",          1000]
+            ]
+
+            if not await self.execSimpleCommandsList(tuneCommands):
+                self.setError("error tuning module for sms sending")
+                return False
+
+            for (sca, pdu,) in d:
+                if not await self.__sendPduPart(sca, pdu, numberOfAttempts):
+                    self.setError("error sending sms...")
+                    return False
+
+            return True
+
+    async def __sendPduPart(self, sca, pdu, numberOfAttempts):
+        for i in range(numberOfAttempts):
+            ret = await self.command("AT+CMGS={0}".format(len(pdu) // 2), 1000, [">"])
+            if (ret is None) or (self.lastResult != ">"):
+                continue
+
+            ret = await self.command("{0}\x1a".format(sca + pdu), 10000, ["ERROR", "OK"])
+            if (ret is None) or (self.lastResult != "OK"):
+                continue
+
+            self.sendingResult = ret.strip()
+            return True
+
+        return False
+
+    def __httpParameters(self, server, port, path, bearerChannel):
+        """
+        Returns commands for HTTP session initialization and request parameters setting
+
+        :param server: server (host) address
+        :param port: http port
+        :param path: path to the script
+        :param bearerChannel: bearer channel number
+        :return: commands list
+        """
+        return [
+            [ "AT+HTTPINIT",                                                     2000    ],
+            [ "AT+HTTPPARA=\"CID\",\"{0}\"".format(bearerChannel),               1000    ],
+            [ "AT+HTTPPARA=\"URL\",\"{0}:{2}{1}\"".format(server, path, port),   500     ],
+            [ "AT+HTTPPARA=\"UA\",\"{0}\"".format(self.userAgent),               500     ],
+            [ "AT+HTTPPARA=\"REDIR\",\"1\"",                                     500     ],
+            [ "AT+HTTPPARA=\"TIMEOUT\",\"45\"",                                  500     ]
+        ]
+
+    async def __httpAction(self, method, maxWaitTime):
+        """
+        Starts HTTP request, waits for its result and reads response data
+
+        :param method: HTTP method code (0 - GET, 1 - POST)
+        :param maxWaitTime: max wait time for request result
+        :return: true if operation was successfully finished. Otherwise returns false
+        """
+        #late result of previous request must not be taken as result of this request
+        self.discardPendingUrcs("+HTTPACTION")
+
+        if not await self.execSimpleOkCommand("AT+HTTPACTION={0}".format(method), maxWaitTime):
+            self.setError("error starting HTTP request")
+            return False
+
+        #waiting for '+HTTPACTION: 0,200,15' unsolicited result code
+        dataLine = await self.readUrcLine("+HTTPACTION", maxWaitTime)
+        if dataLine is None:
+            self.setError("no HTTP request result")
+            return False
+
+        values = splitAndFilter(dataLine[len("+HTTPACTION"):].lstrip(":"), ",")
+        if (len(values) < 3) or (not values[1].isdigit()) or (not values[2].isdigit()):
+            self.setWarn("wrong HTTP result: '{0}'".format(dataLine))
+            return False
+
+        self.httpResult = int(values[1])
+        responseLength  = int(values[2])
+
+        if (self.httpResult not in [200, 206]) or (responseLength == 0):
+            await self.execSimpleOkCommand("AT+HTTPTERM", 500)
+            return True
+
+        ret = await self.command("AT+HTTPREAD=0,{0}".format(responseLength), 10000, ["OK"])
+        if (ret is None) or (self.lastResult != "OK"):
+            self.setError("error reading http response data")
+            return False
+
+        #response lines: '+HTTPREAD: <length>', data lines and line end after data
+        lines = self.lastResponseLines
+        for i in range(len(lines)):
+            if lines[i].startswith("+HTTPREAD"):
+                self.httpResponse = "\n".join(lines[i+1:]).rstrip("\r\n")
+                return True
+
+        self.setError("bad response (cant find '+HTTPREAD')")
+        return False
+
+    async def httpGet(self, server, port = 80, path = "/", bearerChannel = 1):
+        """
+        Makes HTTP GET request to the given server and script
+
+        :param server: server (host) address
+        :param port: http port
+        :param path: path to the script
+        :param bearerChannel: bearer channel number
+        :return: true if operation was successfully finished. Otherwise returns false
+        """
+        async with self.__operationLock:
+            self.httpResult   = 0
+            self.httpResponse = None
+
+            await self.execSimpleOkCommand("AT+HTTPTERM", 500)
+
+            if not await self.execSimpleCommandsList(self.__httpParameters(server, port, path, bearerChannel)):
+                self.setError("error executing HTTP GET sequence")
+                return False
+
+            return await self.__httpAction(0, 10000)
+
+    async def httpPOST(self, server, port, path, parameters, bearerChannel = 1):
+        """
+        Makes HTTP POST request to the given server and script
+
+        :param server: server (host) address
+        :param port: server port
+        :param path: path to the script
+        :param parameters: POST parameters
+        :param bearerChannel: bearer channel number
+        :return: True if operation was successfully finished. Otherwise returns False
+        """
+        async with self.__operationLock:
+            self.httpResult   = 0
+            self.httpResponse = None
+
+            await self.execSimpleOkCommand("AT+HTTPTERM", 500)
+
+            simpleCommands = self.__httpParameters(server, port, path, bearerChannel) + [
+                [ "AT+HTTPPARA=\"CONTENT\",\"application/x-www-form-urlencoded\"",  500  ]
+            ]
+
+            if not await self.execSimpleCommandsList(simpleCommands):
+                self.setError("error executing HTTP POST sequence")
+                return False
+
+            #uploading data
+            ret = await self.command("AT+HTTPDATA={0},10000".format(len(parameters)), 7000, ["DOWNLOAD", "ERROR"])
+            if (ret is None) or (self.lastResult != "DOWNLOAD"):
+                self.setError("can't upload HTTP POST data")
+                return False
+
+            if not await self.execSimpleOkCommand(parameters, 10000):
+                self.setError("can't upload HTTP POST data")
+                return False
+
+            return await self.__httpAction(1, 15000)
+
+    async def runUssdCode(self, ussdCode):
+        """
+        Runs USSD code and waits for result
+
+        :param ussdCode: USSD code, like '*111#'
+        :return: True if USSD result was received, otherwise returns False. Result will be stored in lastUssdResult
+        """
+        async with self.__operationLock:
+            self.lastUssdResult = None
+            self.lastUssdDcs    = None
+
+            #result of previous USSD request which was received too late must not be taken as result of this request
+            self.discardPendingUrcs("+CUSD")
+
+            ret = await self.command("AT+CUSD=1,\"{0}\",15".format(ussdCode), 20000)
+            if (ret is None) or (self.lastResult != "OK"):
+                self.setWarn("error running USSD command '{0}'".format(ussdCode))
+                return False
+
+            #result can be received together with command response or later, as unsolicited result code
+            ret = str(ret).strip()
+            if len(ret) == 0:
+                ret = await self.readUrcLine("+CUSD", 20000)
+                if ret is None:
+                    self.setWarn("error waiting for USSD command result")
+                    return False
+
+            result = SimUssdHandler.parseUssdResult(ret)
+            if result is None:
+                self.setWarn("error parsing USSD command result: '{0}'".format(ret))
+                return False
+
+            self.lastUssdResult, self.lastUssdDcs = result
+            return True
@@ -0,0 +1,336 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+This file is part of sim-module package. Incremental parsing of data received from SIM900 modules.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import re
+from lib.sim900.simshared import *
+
+class SimGsmCommandLine:
+    #basic command with numeric parameter, like 'E0', 'V1' or '&W'
+    __basicCommandRe    = re.compile(r"&?[A-Za-z]\d*")
+
+    #extended command is finished by semicolon or line end, semicolons in quoted parameters are not separators
+    __extendedCommandRe = re.compile(r"\+(?:[^;\"]|\"[^\"]*\")*")
+
+    __commandNameRe     = re.compile(r"^(?:\+[A-Za-z]+|&?[A-Za-z])")
+
+    @staticmethod
+    def split(body):
+        """
+        Splits command line (without 'AT' prefix) to commands, like ['V1', '+CMEE=0', '+CMGF=1'] for
+        'V1+CMEE=0;+CMGF=1' or ['+CUSD=1,"*1;1#",15'] for '+CUSD=1,"*1;1#",15'
+
+        :param body: command line without 'AT'
+        :return: commands list or None when line is wrong
+        """
+        ret = []
+        pos = 0
+
+        while pos < len(body):
+            if body[pos] == ";":
+                pos += 1
+                continue
+
+            if body[pos] == "+":
+                m = SimGsmCommandLine.__extendedCommandRe.match(body, pos)
+            else:
+                m = SimGsmCommandLine.__basicCommandRe.match(body, pos)
+
+            #not closed quote or not supported basic command (like dial string)
+            if (m is None) or ((m.end() < len(body)) and (body[m.end()] == "\"")):
+                return None
+
+            ret.append(m.group(0))
+            pos = m.end()
+
+        return ret
+
+    @staticmethod
+    def commandName(command):
+        """
+        Returns command name, like '+CMGS' for '+CMGS=23' or 'E' for 'E0'
+
+        :param command: command without 'AT' prefix
+        :return: command name or None when command is wrong
+        """
+        m = SimGsmCommandLine.__commandNameRe.match(command)
+        return m.group(0).upper() if m is not None else None
+
+class SimGsmLineFramer:
+    #processed data will be removed from buffer when it's size reaches this limit
+    COMPACT_THRESHOLD = 4096
+
+    def __init__(self):
+        self.__buffer       = bytearray()
+
+        #start of first not returned line
+        self.__start        = 0
+
+        #position from which separator searching must be continued
+        self.__scanOffset   = 0
+        self.__separator    = b"\n"
+
+    @property
+    def pendingSize(self):
+        """
+        Returns count of received bytes which was not returned as lines yet
+
+        :return: bytes count
+        """
+        return len(self.__buffer) - self.__start
+
+    def feed(self, data):
+        """
+        Appends received data to the framer
+
+        :param data: received bytes
+        :return: nothing
+        """
+        self.__buffer += data
+
+    def lines(self, codepage = "ascii", separator = b"\n", keepSeparator = True):
+        """
+        Generator which yields all completed lines. Each byte is scanned only once, each line is decoded only once.
+
+        :param codepage: code page of result strings, if it's a None - lines will be returned as a bytearray
+        :param separator: lines separator
+        :param keepSeparator: when True separator will be kept at the end of line
+        :return: completed lines
+        """
+        #separator was changed, so already scanned data must be scanned again
+        if separator != self.__separator:
+            self.__separator  = separator
+            self.__scanOffset = self.__start
+
+        while True:
+            idx = self.__buffer.find(separator, self.__scanOffset)
+            if idx == -1:
+                self.__scanOffset = max(self.__start, len(self.__buffer) - len(separator) + 1)
+                self.__compact()
+                return
+
+            end  = idx + len(separator)
+            line = self.__buffer[self.__start : (end if keepSeparator else idx)]
+
+            self.__start      = end
+            self.__scanOffset = end
+
+            yield line if codepage is None else line.decode(codepage)
+
+    def peekPending(self):
+        """
+        Returns bytes which was not returned as lines (without removing)
+
+        :return: pending bytes
+        """
+        return bytes(self.__buffer[self.__start:])
+
+    def unread(self, data):
+        """
+        Returns data back to the framer. This data will be processed before all pending data.
+
+        :param data: data for returning
+        :return: nothing
+        """
+        if len(data) == 0:
+            return
+
+        self.__buffer       = bytearray(data) + self.__buffer[self.__start:]
+        self.__start        = 0
+        self.__scanOffset   = 0
+
+    def takePending(self, maxCount = None):
+        """
+        Removes and returns bytes which was not returned as lines
+
+        :param maxCount: max bytes count, when None all pending bytes will be returned
+        :return: pending bytes
+        """
+        end = len(self.__buffer)
+        if maxCount is not None:
+            end = min(end, self.__start + maxCount)
+
+        ret          = bytes(self.__buffer[self.__start : end])
+        self.__start = end
+        if self.__scanOffset < end:
+            self.__scanOffset = end
+
+        self.__compact()
+        return ret
+
+    def clear(self):
+        """
+        Removes all data from framer
+
+        :return: nothing
+        """
+        self.__buffer       = bytearray()
+        self.__start        = 0
+        self.__scanOffset   = 0
+
+    def __compact(self):
+        if self.__start == len(self.__buffer):
+            self.clear()
+            return
+
+        if self.__start < self.COMPACT_THRESHOLD:
+            return
+
+        del self.__buffer[:self.__start]
+        self.__scanOffset  -= self.__start
+        self.__start        = 0
+
+class SimGsmResponseAccumulator:
+    #final result codes which are always finishing command (even when they are not expected)
+    ERROR_RESULTS           = ("ERROR", )
+
+    #final result codes which are followed by error code, like '+CME ERROR: 10'
+    ERROR_RESULT_PREFIXES   = ("+CME ERROR", "+CMS ERROR")
+
+    #results which are not followed by line end (prompts for data input)
+    PROMPT_RESULTS          = (">", )
+
+    #responses which are followed by raw data, first parameter of response is raw data length
+    RAW_DATA_PREFIXES       = ("+HTTPREAD:", )
+
+    def __init__(self, possibleResults, encoding = "ascii", lineFilter = None):
+        self.__possibleResults  = set(possibleResults)
+        self.__encoding         = encoding
+
+        #function which receives each non empty response line and returns True when line must be excluded from
+        #response (used for unsolicited result codes)
+        self.__lineFilter       = lineFilter
+        self.__framer           = SimGsmLineFramer()
+
+        #not finished line can be a result only when it's a short prompt (like '> ')
+        self.__prompts          = [r for r in self.__possibleResults if r in self.PROMPT_RESULTS]
+        self.__maxTailLength    = max([len(r) for r in self.__prompts] + [0]) + 2
+
+        #count of raw data bytes which must be skipped without result codes checking
+        self.__rawBytesLeft     = 0
+
+        #intermediate response lines (without line end symbols)
+        self.lines              = []
+
+        #found final result code
+        self.result             = None
+
+        #total count of received bytes
+        self.receivedBytes      = 0
+
+    @property
+    def finished(self):
+        return self.result is not None
+
+    @property
+    def text(self):
+        """
+        Returns all intermediate response lines as single string
+
+        :return: response text
+        """
+        return "\n".join(self.lines)
+
+    def __finalResult(self, line):
+        """
+        Checks that line is final result code
+
+        :param line: stripped line for checking
+        :return: True when line is final result code
+        """
+        if (line in self.__possibleResults) or (line in self.ERROR_RESULTS):
+            return True
+
+        for prefix in self.ERROR_RESULT_PREFIXES:
+            if line.startswith(prefix):
+                return True
+
+        return False
+
+    def __checkRawDataHeader(self, line):
+        for prefix in self.RAW_DATA_PREFIXES:
+            if not line.startswith(prefix):
+                continue
+
+            values = splitAndFilter(line[len(prefix):], ",")
+            if (len(values) > 0) and values[0].isdigit():
+                self.__rawBytesLeft = int(values[0])
+
+            return
+
+    def feed(self, data):
+        """
+        Processes new received data. Only new data is scanned.
+
+        :param data: received bytes
+        :return: True when final result code was found
+        """
+        if self.finished:
+            return True
+
+        self.receivedBytes += len(data)
+        self.__framer.feed(data)
+
+        for rawLine in self.__framer.lines(None):
+            line = rawLine.decode(self.__encoding)
+
+            if self.__rawBytesLeft > 0:
+                self.__rawBytesLeft -= len(rawLine)
+                self.lines.append(line.rstrip("\r\n"))
+                continue
+
+            stripped = line.strip()
+            if self.__finalResult(stripped):
+                self.result = stripped
+                return True
+
+            if (self.__lineFilter is not None) and (len(stripped) > 0) and self.__lineFilter(stripped):
+                continue
+
+            self.lines.append(line.rstrip("\r\n"))
+            self.__checkRawDataHeader(stripped)
+
+        #checking not finished line (prompts like '> ' have no line end)
+        if (self.__rawBytesLeft <= 0) and (0 < self.__framer.pendingSize <= self.__maxTailLength):
+            tail = self.__framer.peekPending().decode(self.__encoding).strip()
+            if (len(tail) > 0) and (tail in self.__prompts):
+                self.__framer.takePending()
+                self.result = tail
+                return True
+
+        return False
+
+    def takeRemainder(self):
+        """
+        Returns data which was received after final result code
+
+        :return: remaining bytes
+        """
+        return self.__framer.takePending()
@@ -0,0 +1,874 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Emulator of SIM900 module on pseudo terminal (POSIX systems only).
+
+Emulator implements subset of AT commands which is used by this package, so all handlers can be tested and
+benchmarked without real modules. Per command latency, port speed throttling and faults injection are supported.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import os
+import re
+import time
+import random
+import select
+import threading
+from lib.sim900.simshared import *
+from lib.sim900.atparser import SimGsmCommandLine
+
+try:
+    import tty
+except ImportError:
+    tty = None
+
+class SimGsmEmulatorFaultKind:
+    #command fails with 'ERROR' result
+    ERROR       = "error"
+
+    #command is ignored (no response)
+    TIMEOUT     = "timeout"
+
+    #random bytes are sent instead of response
+    GARBAGE     = "garbage"
+
+    #module restarts: all settings are reset and 'RDY' is sent
+    RESET       = "reset"
+
+class SimGsmEmulatorFault:
+    def __init__(self, kind, probability = 1.0, count = None):
+        """
+        Creates fault description
+
+        :param kind: fault kind (one of SimGsmEmulatorFaultKind values)
+        :param probability: probability of fault for each command execution
+        :param count: max count of faults, None for unlimited faults
+        """
+        self.kind           = kind
+        self.probability    = probability
+        self.count          = count
+
+class SimGsmEmulatorMode:
+    COMMAND     = 0
+
+    #waiting for SMS text or PDU (finished by Ctrl+Z)
+    SMS_DATA    = 1
+
+    #waiting for fixed count of HTTP data bytes
+    HTTP_DATA   = 2
+
+class SimGsmEmulator(AminisLastErrorHolderWithLogging):
+    SUPPORTED_RATES = (1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200)
+
+    def __init__(self, logger = None, imei = "490154203237518", seed = None):
+        AminisLastErrorHolderWithLogging.__init__(self, logger)
+
+        self.imei               = imei
+
+        #expected PIN code, when not None module requires PIN after start
+        self.pinCode            = None
+
+        #latency of commands in seconds (command name like '+CMGS' or 'AT' -> latency)
+        self.latency            = {}
+        self.defaultLatency     = 0.0
+
+        #delay before '+HTTPACTION' result code
+        self.httpActionLatency  = 0.0
+
+        #when True port speed is limited by baud rate set by 'AT+IPR' (or by initial baudRate)
+        self.throttle           = False
+        self.baudRate           = 115200
+
+        #command name -> SimGsmEmulatorFault
+        self.faults             = {}
+
+        #HTTP responses: URL -> (status code, body bytes) or function which receives (method, url, data)
+        self.httpResponses      = {}
+        self.defaultHttpResponse = (200, b"OK")
+
+        #USSD responses: code -> text
+        self.ussdResponses      = {}
+        self.defaultUssdResponse = "Balance 10.00"
+
+        #when True USSD result is sent as unsolicited result code after final result code (like network responses)
+        self.ussdResultAsUrc    = False
+
+        #sent messages (mode, parameter of AT+CMGS, message data)
+        self.sentMessages       = []
+
+        #SIM messages storage: index -> [status, PDU (hex string with SCA)], storage is not cleared by reset()
+        self.storageSize        = 30
+        self.storedMessages     = {}
+
+        #executed commands (for checking in tests)
+        self.commandsLog        = []
+
+        self.__random           = random.Random(seed)
+        self.__master           = None
+        self.__slave            = None
+        self.__portName         = None
+        self.__thread           = None
+        self.__stopEvent        = threading.Event()
+        self.__writeLock        = threading.Lock()
+        self.__storageLock      = threading.Lock()
+
+        #input processing function for each mode, function returns False when it needs more input data
+        self.__modeHandlers     = {
+            SimGsmEmulatorMode.COMMAND:     self.__processCommandInput,
+            SimGsmEmulatorMode.SMS_DATA:    self.__processSmsData,
+            SimGsmEmulatorMode.HTTP_DATA:   self.__processHttpData
+        }
+
+        #command name -> handler, handler receives query flag, test flag and parameters and returns True when command
+        #succeeded, False on error, None when final result is sent by handler
+        self.__commandHandlers  = {
+            "E":            self.__cmdE,
+            "V":            self.__cmdV,
+            "Q":            self.__cmdAccepted,
+            "X":            self.__cmdAccepted,
+            "Z":            self.__cmdAccepted,
+            "&F":           self.__cmdAccepted,
+            "&W":           self.__cmdAccepted,
+            "+GSN":         self.__cmdGSN,
+            "+CMEE":        self.__cmdCMEE,
+            "+CPIN":        self.__cmdCPIN,
+            "+CMGF":        self.__cmdCMGF,
+            "+CSCS":        self.__cmdCSCS,
+            "+IPR":         self.__cmdIPR,
+            "+CMGS":        self.__cmdCMGS,
+            "+CMGL":        self.__cmdCMGL,
+            "+CMGD":        self.__cmdCMGD,
+            "+CMGDA":       self.__cmdCMGDA,
+            "+CIPSHUT":     self.__cmdCIPSHUT,
+            "+CIPCLOSE":    self.__cmdCIPCLOSE,
+            "+SAPBR":       self.__cmdSAPBR,
+            "+HTTPINIT":    self.__cmdHTTPINIT,
+            "+HTTPTERM":    self.__cmdHTTPTERM,
+            "+HTTPPARA":    self.__cmdHTTPPARA,
+            "+HTTPDATA":    self.__cmdHTTPDATA,
+            "+HTTPACTION":  self.__cmdHTTPACTION,
+            "+HTTPREAD":    self.__cmdHTTPREAD,
+            "+CUSD":        self.__cmdCUSD
+        }
+
+        #fault kind -> function which emulates fault
+        self.__faultHandlers    = {
+            SimGsmEmulatorFaultKind.ERROR:      self.__writeError,
+            SimGsmEmulatorFaultKind.TIMEOUT:    lambda: None,
+            SimGsmEmulatorFaultKind.GARBAGE:    self.__writeGarbage,
+            SimGsmEmulatorFaultKind.RESET:      self.__restart
+        }
+
+        self.reset()
+
+    @property
+    def portName(self):
+        """
+        Returns name of pseudo terminal which must be used as serial port by handlers
+
+        :return: port name
+        """
+        return self.__portName
+
+    def reset(self):
+        """
+        Resets module state (like after power on)
+
+        :return: nothing
+        """
+        self.echo           = True
+        self.verbose        = True
+        self.cmee           = 0
+        self.cmgf           = 0
+        self.cscs           = "IRA"
+        self.pinReady       = self.pinCode is None
+        self.bearers        = {}
+        self.bearerParams   = {}
+        self.httpParams     = None
+        self.httpData       = b""
+        self.httpResponse   = None
+        self.messageRef     = 0
+
+        self.__mode         = SimGsmEmulatorMode.COMMAND
+        self.__input        = bytearray()
+        self.__dataLeft     = 0
+
+        #line feed after carriage return of command line is not a part of data which follows command
+        self.__skipLf       = False
+        self.__smsParameter = None
+
+    def start(self):
+        """
+        Opens pseudo terminal and starts emulation thread
+
+        :return: True if emulator was started, otherwise returns False
+        """
+        if tty is None or not hasattr(os, "openpty"):
+            self.setError("pseudo terminals are not supported on this system")
+            return False
+
+        try:
+            self.__master, self.__slave = os.openpty()
+            tty.setraw(self.__slave)
+            self.__portName = os.ttyname(self.__slave)
+        except Exception as e:
+            self.setError("error opening pseudo terminal: {0}".format(e))
+            return False
+
+        self.__stopEvent.clear()
+        self.__thread = threading.Thread(target = self.__run, name = "sim900-emulator")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+        return True
+
+    def stop(self):
+        """
+        Stops emulation and closes pseudo terminal
+
+        :return: nothing
+        """
+        self.__stopEvent.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+        for fd in (self.__master, self.__slave):
+            if fd is not None:
+                os.close(fd)
+
+        self.__master   = None
+        self.__slave    = None
+
+    def injectFault(self, command, kind, probability = 1.0, count = None):
+        """
+        Adds fault for command
+
+        :param command: command name, like '+CMGS' or 'AT' (for empty command line)
+        :param kind: fault kind (one of SimGsmEmulatorFaultKind values)
+        :param probability: probability of fault for each command execution
+        :param count: max count of faults, None for unlimited faults
+        :return: nothing
+        """
+        self.faults[command.upper()] = SimGsmEmulatorFault(kind, probability, count)
+
+    def sendUrc(self, line):
+        """
+        Sends unsolicited result code
+
+        :param line: result code, like '+CMTI: "SM",1'
+        :return: nothing
+        """
+        self.__write("\r\n{0}\r\n".format(line).encode("ascii"))
+
+    def receiveSms(self, pdu, status = 0):
+        """
+        Stores received message (SMS-DELIVER or SMS-STATUS-REPORT PDU with SCA) in first free storage slot and sends
+        '+CMTI' unsolicited result code
+
+        :param pdu: PDU as hex string
+        :param status: storage status (0 - received unread, 1 - received read, 2 - stored unsent, 3 - stored sent)
+        :return: storage index or None when storage is full
+        """
+        with self.__storageLock:
+            index = next((i for i in range(1, self.storageSize + 1) if i not in self.storedMessages), None)
+            if index is None:
+                return None
+
+            self.storedMessages[index] = [status, pdu.upper()]
+
+        if status in (0, 1):
+            self.sendUrc("+CMTI: \"SM\",{0}".format(index))
+
+        return index
+
+    def __throttleDelay(self, bytesCount):
+        if self.throttle and (self.baudRate > 0):
+            #each byte takes 10 bits (with start and stop bits)
+            time.sleep(bytesCount * 10.0 / self.baudRate)
+
+    def __write(self, data):
+        with self.__writeLock:
+            self.__throttleDelay(len(data))
+            while len(data) > 0:
+                written = os.write(self.__master, data)
+                data    = data[written:]
+
+    def __run(self):
+        while not self.__stopEvent.is_set():
+            try:
+                ready = select.select([self.__master], [], [], 0.05)[0]
+                if len(ready) == 0:
+                    continue
+
+                data = os.read(self.__master, 4096)
+            except OSError:
+                if self.__stopEvent.is_set():
+                    break
+
+                time.sleep(0.01)
+                continue
+
+            self.__throttleDelay(len(data))
+            self.__process(data)
+
+    def __process(self, data):
+        self.__input += data
+
+        while len(self.__input) > 0:
+            if self.__skipLineFeed():
+                continue
+
+            if not self.__modeHandlers[self.__mode]():
+                return
+
+    def __skipLineFeed(self):
+        """
+        Removes line feed which follows carriage return of command line
+
+        :return: True when line feed was removed
+        """
+        if not self.__skipLf:
+            return False
+
+        self.__skipLf = False
+        if self.__input[0] != 0x0a:
+            return False
+
+        if self.echo:
+            self.__write(b"\n")
+
+        del self.__input[:1]
+        return True
+
+    def __processCommandInput(self):
+        idx = self.__input.find(b"\r")
+        if idx == -1:
+            #line feed symbols after command lines are skipped
+            if self.__input.strip(b"\n") == b"":
+                self.__input = bytearray()
+
+            return False
+
+        line            = bytes(self.__input[:idx + 1])
+        self.__input    = self.__input[idx + 1:]
+        self.__skipLf   = True
+
+        if self.echo:
+            self.__write(line)
+
+        self.__processLine(line.decode("ascii", "replace").strip())
+        return True
+
+    def __processSmsData(self):
+        for idx, b in enumerate(self.__input):
+            #Ctrl+Z - sending message, ESC - cancelling
+            if b in (0x1a, 0x1b):
+                data            = bytes(self.__input[:idx])
+                self.__input    = self.__input[idx + 1:]
+                self.__mode     = SimGsmEmulatorMode.COMMAND
+                self.__skipLf   = False
+
+                if self.echo:
+                    self.__write(data)
+
+                if b == 0x1b:
+                    self.__writeResult("OK")
+                    return True
+
+                self.__sendMessage(data.decode("ascii", "replace"))
+                return True
+
+        return False
+
+    def __processHttpData(self):
+        count               = min(self.__dataLeft, len(self.__input))
+        self.httpData      += bytes(self.__input[:count])
+        self.__input        = self.__input[count:]
+        self.__dataLeft    -= count
+
+        if self.__dataLeft > 0:
+            return False
+
+        self.__mode = SimGsmEmulatorMode.COMMAND
+        self.__writeResult("OK")
+        return True
+
+    def __writeInfo(self, line):
+        self.__write("\r\n{0}\r\n".format(line).encode("ascii") if self.verbose else "{0}\r\n".format(line).encode("ascii"))
+
+    def __writeResult(self, result):
+        if self.verbose:
+            self.__write("\r\n{0}\r\n".format(result).encode("ascii"))
+            return
+
+        codes = {"OK": "0", "CONNECT": "1", "RING": "2", "NO CARRIER": "3", "ERROR": "4"}
+        self.__write("{0}\r".format(codes.get(result, result)).encode("ascii"))
+
+    def __writeError(self, code = 100):
+        if self.cmee == 0:
+            self.__writeResult("ERROR")
+        elif self.cmee == 1:
+            self.__writeResult("+CME ERROR: {0}".format(code))
+        else:
+            self.__writeResult("+CME ERROR: unknown")
+
+    def __checkFault(self, name):
+        fault = self.faults.get(name)
+        if fault is None:
+            return None
+
+        if (fault.count is not None) and (fault.count <= 0):
+            return None
+
+        if self.__random.random() >= fault.probability:
+            return None
+
+        if fault.count is not None:
+            fault.count -= 1
+
+        return fault.kind
+
+    def __writeGarbage(self):
+        self.__write(bytes([self.__random.randint(0x80, 0xfe) for i in range(8)]))
+
+    def __restart(self):
+        self.reset()
+        self.sendUrc("RDY")
+
+    def __injectFault(self, names, line):
+        """
+        Emulates fault of one of commands (when it's configured)
+
+        :param names: names of commands of command line
+        :param line: command line
+        :return: True when fault was emulated and command line must not be executed
+        """
+        for name in names:
+            fault = self.__checkFault(name)
+            if fault is None:
+                continue
+
+            self.logger.debug("emulator: injecting fault '%s' for '%s'", fault, line)
+            self.__faultHandlers[fault]()
+            return True
+
+        return False
+
+    def __processLine(self, line):
+        if len(line) == 0:
+            return
+
+        commands = SimGsmCommandLine.split(line[2:]) if line[:2].upper() == "AT" else None
+        if commands is None:
+            self.__writeError()
+            return
+
+        self.commandsLog.append(line)
+
+        names = [SimGsmCommandLine.commandName(command) for command in commands] if len(commands) > 0 else ["AT"]
+        time.sleep(max([self.latency.get(name, self.defaultLatency) for name in names]))
+
+        if self.__injectFault(names, line):
+            return
+
+        for command in commands:
+            result = self.__execute(command)
+
+            #command switched to data mode or sent own final result
+            if result is None:
+                return
+
+            if not result:
+                self.__writeError()
+                return
+
+        self.__writeResult("OK")
+
+    @staticmethod
+    def __parameters(value):
+        return [v.strip().strip("\"") for v in value.split(",")]
+
+    def __execute(self, command):
+        """
+        Executes single command
+
+        :param command: command without 'AT' prefix
+        :return: True when command succeeded, False on error, None when final result is sent by command
+        """
+        name    = SimGsmCommandLine.commandName(command)
+        handler = self.__commandHandlers.get(name)
+        if handler is None:
+            return False
+
+        rest = command[len(name):]
+
+        #basic commands have numeric parameter only, like 'E0'
+        if not command.startswith("+"):
+            return handler(False, False, rest)
+
+        return handler(rest == "?", rest == "=?", rest[1:] if rest.startswith("=") else "")
+
+    def __cmdE(self, query, test, value):
+        self.echo = value not in ("", "0")
+        return True
+
+    def __cmdV(self, query, test, value):
+        self.verbose = value not in ("", "0")
+        return True
+
+    def __cmdAccepted(self, query, test, value):
+        return True
+
+    def __cmdGSN(self, query, test, value):
+        if test:
+            return True
+
+        self.__writeInfo(self.imei)
+        return True
+
+    def __cmdCMEE(self, query, test, value):
+        if query:
+            self.__writeInfo("+CMEE: {0}".format(self.cmee))
+        elif test:
+            self.__writeInfo("+CMEE: (0-2)")
+        elif value in ("0", "1", "2"):
+            self.cmee = int(value)
+        else:
+            return False
+
+        return True
+
+    def __cmdCPIN(self, query, test, value):
+        if query:
+            self.__writeInfo("+CPIN: {0}".format("READY" if self.pinReady else "SIM PIN"))
+            return True
+
+        if test:
+            return True
+
+        if self.pinReady or (self.__parameters(value)[0] != self.pinCode):
+            return False
+
+        self.pinReady = True
+        return True
+
+    def __cmdCMGF(self, query, test, value):
+        if query:
+            self.__writeInfo("+CMGF: {0}".format(self.cmgf))
+        elif test:
+            self.__writeInfo("+CMGF: (0,1)")
+        elif value in ("0", "1"):
+            self.cmgf = int(value)
+        else:
+            return False
+
+        return True
+
+    def __cmdCSCS(self, query, test, value):
+        charsets = ("GSM", "UCS2", "IRA", "HEX", "PCCP936")
+
+        if query:
+            self.__writeInfo("+CSCS: \"{0}\"".format(self.cscs))
+        elif test:
+            self.__writeInfo("+CSCS: ({0})".format(",".join(["\"{0}\"".format(v) for v in charsets])))
+        elif value.strip("\"") in charsets:
+            self.cscs = value.strip("\"")
+        else:
+            return False
+
+        return True
+
+    def __cmdIPR(self, query, test, value):
+        if query:
+            self.__writeInfo("+IPR: {0}".format(self.baudRate))
+            return True
+
+        if test:
+            self.__writeInfo("+IPR: (),({0})".format(",".join(["0"] + [str(v) for v in self.SUPPORTED_RATES])))
+            return True
+
+        if (not value.isdigit()) or ((int(value) != 0) and (int(value) not in self.SUPPORTED_RATES)):
+            return False
+
+        #result is sent on old rate
+        self.__writeResult("OK")
+        if int(value) != 0:
+            self.baudRate = int(value)
+
+        return None
+
+    def __cmdCMGS(self, query, test, value):
+        if test:
+            return True
+
+        if query or (len(value) == 0) or (not self.pinReady):
+            return False
+
+        self.__smsParameter = value
+        self.__mode         = SimGsmEmulatorMode.SMS_DATA
+        self.__write(b"\r\n> ")
+
+        return None
+
+    def __sendMessage(self, data):
+        if self.cmgf == 0:
+            pdu = data.strip()
+            if (not re.match(r"^[0-9A-Fa-f]*$", pdu)) or (len(pdu) % 2 != 0):
+                self.__writeError(304)
+                return
+
+        self.sentMessages.append((self.cmgf, self.__smsParameter, data))
+        self.messageRef = (self.messageRef + 1) % 256
+
+        self.__writeInfo("+CMGS: {0}".format(self.messageRef))
+        self.__writeResult("OK")
+
+    def __cmdCMGL(self, query, test, value):
+        #only PDU mode listing is supported
+        if test:
+            self.__writeInfo("+CMGL: (0-4)")
+            return True
+
+        if query or (self.cmgf != 0) or (not value.isdigit()) or (int(value) > 4) or (not self.pinReady):
+            return False
+
+        status = int(value)
+        with self.__storageLock:
+            messages = [(i, m) for i, m in sorted(self.storedMessages.items()) if (status == 4) or (m[0] == status)]
+
+            lines = []
+            for index, message in messages:
+                #length of TPDU (without SCA)
+                length = len(message[1]) // 2 - int(message[1][:2], 16) - 1
+                lines.append("+CMGL: {0},{1},,{2}\r\n{3}\r\n".format(index, message[0], length, message[1]))
+
+                #listed messages become read
+                if message[0] == 0:
+                    message[0] = 1
+
+        if len(lines) > 0:
+            self.__write(("\r\n" + "".join(lines)).encode("ascii"))
+
+        return True
+
+    def __deleteStoredMessages(self, statuses):
+        with self.__storageLock:
+            for index in [i for i, m in self.storedMessages.items() if m[0] in statuses]:
+                del self.storedMessages[index]
+
+    def __cmdCMGD(self, query, test, value):
+        if test:
+            self.__writeInfo("+CMGD: (1-{0}),(0-4)".format(self.storageSize))
+            return True
+
+        values = self.__parameters(value)
+        if query or (not all(v.isdigit() for v in values)) or (len(values) > 2) or (not self.pinReady):
+            return False
+
+        index   = int(values[0])
+        delFlag = int(values[1]) if len(values) > 1 else 0
+
+        #delete flags: 1 - read messages, 2 - read and sent, 3 - read, sent and unsent, 4 - all messages
+        if delFlag > 0:
+            statuses = {1: (1, ), 2: (1, 3), 3: (1, 2, 3), 4: (0, 1, 2, 3)}.get(delFlag)
+            if statuses is None:
+                return False
+
+            self.__deleteStoredMessages(statuses)
+            return True
+
+        if (index < 1) or (index > self.storageSize):
+            self.__writeError(321)
+            return None
+
+        with self.__storageLock:
+            self.storedMessages.pop(index, None)
+
+        return True
+
+    def __cmdCMGDA(self, query, test, value):
+        #PDU mode types: 1 - read, 2 - unread, 3 - sent, 4 - unsent, 5 - received, 6 - all
+        types = {
+            "1": (1, ), "2": (0, ), "3": (3, ), "4": (2, ), "5": (0, 1), "6": (0, 1, 2, 3),
+            "DEL READ": (1, ), "DEL UNREAD": (0, ), "DEL SENT": (3, ), "DEL UNSENT": (2, ), "DEL INBOX": (0, 1),
+            "DEL ALL": (0, 1, 2, 3)
+        }
+
+        if test:
+            if self.cmgf == 0:
+                self.__writeInfo("+CMGDA: (1-6)")
+            else:
+                self.__writeInfo("+CMGDA: (\"DEL READ\",\"DEL UNREAD\",\"DEL SENT\",\"DEL UNSENT\",\"DEL INBOX\",\"DEL ALL\")")
+
+            return True
+
+        statuses = types.get(value.strip().strip("\"").upper())
+        if query or (statuses is None) or (not self.pinReady):
+            return False
+
+        self.__deleteStoredMessages(statuses)
+        return True
+
+    def __cmdCIPSHUT(self, query, test, value):
+        self.__writeResult("SHUT OK")
+        return None
+
+    def __cmdCIPCLOSE(self, query, test, value):
+        return False
+
+    def __cmdSAPBR(self, query, test, value):
+        if query or test:
+            return test
+
+        values = self.__parameters(value)
+        if (len(values) < 2) or (not values[0].isdigit()) or (not values[1].isdigit()):
+            return False
+
+        cmdType = int(values[0])
+        cid     = int(values[1])
+
+        if cmdType == 3:
+            if len(values) < 4:
+                return False
+
+            self.bearerParams[(cid, values[2].upper())] = ",".join(values[3:])
+        elif cmdType == 1:
+            if self.bearers.get(cid):
+                return False
+
+            self.bearers[cid] = "10.0.0.{0}".format(cid + 1)
+        elif cmdType == 0:
+            if not self.bearers.get(cid):
+                return False
+
+            self.bearers[cid] = None
+        elif cmdType == 2:
+            ip = self.bearers.get(cid)
+            self.__writeInfo("+SAPBR: {0},{1},\"{2}\"".format(cid, 1 if ip else 3, ip if ip else "0.0.0.0"))
+        else:
+            return False
+
+        return True
+
+    def __cmdHTTPINIT(self, query, test, value):
+        if self.httpParams is not None:
+            return False
+
+        self.httpParams     = {}
+        self.httpData       = b""
+        self.httpResponse   = None
+
+        return True
+
+    def __cmdHTTPTERM(self, query, test, value):
+        if self.httpParams is None:
+            return False
+
+        self.httpParams = None
+        return True
+
+    def __cmdHTTPPARA(self, query, test, value):
+        if (self.httpParams is None) or query or test:
+            return test
+
+        name, _, parameter = value.partition(",")
+        self.httpParams[name.strip().strip("\"").upper()] = parameter.strip().strip("\"")
+
+        return True
+
+    def __cmdHTTPDATA(self, query, test, value):
+        values = self.__parameters(value)
+        if (self.httpParams is None) or (len(values) < 1) or (not values[0].isdigit()):
+            return False
+
+        self.httpData       = b""
+        self.__dataLeft     = int(values[0])
+        self.__mode         = SimGsmEmulatorMode.HTTP_DATA
+        self.__writeInfo("DOWNLOAD")
+
+        if self.__dataLeft == 0:
+            self.__mode = SimGsmEmulatorMode.COMMAND
+            self.__writeResult("OK")
+
+        return None
+
+    def __httpResult(self, method):
+        url      = self.httpParams.get("URL", "")
+        response = self.httpResponses.get(url, self.defaultHttpResponse)
+        if callable(response):
+            response = response(method, url, self.httpData)
+
+        return response
+
+    def __cmdHTTPACTION(self, query, test, value):
+        if (self.httpParams is None) or (value not in ("0", "1", "2")):
+            return False
+
+        method      = int(value)
+        bearer      = self.httpParams.get("CID", "1")
+        status, body = (601, b"") if not self.bearers.get(int(bearer) if bearer.isdigit() else 1) else self.__httpResult(method)
+
+        self.httpResponse = body
+        self.__writeResult("OK")
+
+        time.sleep(self.httpActionLatency)
+        self.sendUrc("+HTTPACTION: {0},{1},{2}".format(method, status, len(body)))
+
+        return None
+
+    def __cmdHTTPREAD(self, query, test, value):
+        if (self.httpParams is None) or (self.httpResponse is None):
+            return False
+
+        values = self.__parameters(value) if len(value) > 0 else []
+        start  = int(values[0]) if len(values) > 0 else 0
+        size   = int(values[1]) if len(values) > 1 else len(self.httpResponse)
+
+        data = self.httpResponse[start : start + size]
+        self.__write("\r\n+HTTPREAD: {0}\r\n".format(len(data)).encode("ascii") + data + b"\r\n")
+
+        return True
+
+    def __cmdCUSD(self, query, test, value):
+        if query or test:
+            return True
+
+        values = self.__parameters(value)
+        if len(values) < 2:
+            return True
+
+        text = self.ussdResponses.get(values[1], self.defaultUssdResponse)
+        if not self.ussdResultAsUrc:
+            self.__writeInfo("+CUSD: 0,\"{0}\",15".format(text))
+            return True
+
+        self.__writeResult("OK")
+        self.sendUrc("+CUSD: 0,\"{0}\",15".format(text))
+
+        return None
\ No newline at end of file
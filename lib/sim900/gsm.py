@@ -29,10 +29,16 @@ functions of SIM 900 modules.
 Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
 """
 
+import re
 import time
+import collections
+import select
 import serial
 import logging
 from lib.sim900.simshared import *
+from lib.sim900.serialreader import SimSerialRingBuffer, SimSerialReaderThread
+from lib.sim900.atparser import SimGsmLineFramer, SimGsmResponseAccumulator, SimGsmCommandLine
+from lib.sim900.simtrace import SimTraceCommandSent, SimTraceBytesReceived, SimTraceResultMatched, SimTraceTimeout
 
 class GsmSpecialCharacters:
     ctrlz = 26        #//Ascii character for ctr+z. End of a SMS.
@@ -63,8 +69,84 @@ class SimGsmPinRequestState:
     SIM_PIN2            = 5
     SIM_PUK2            = 6
 
+class SimGsmUrc:
+    #prefixes of unsolicited result codes which are removed from commands responses even without registered handlers
+    KNOWN_PREFIXES      = (
+        "+CMTI", "+CMT", "+CDS", "+CDSI", "+CBM", "+CUSD", "+HTTPACTION", "+SAPBR", "+CRING", "+CLIP",
+        "+CFUN", "RING", "RDY", "Call Ready", "NORMAL POWER DOWN", "UNDER-VOLTAGE POWER DOWN", "UNDER-VOLTAGE WARNNING",
+        "OVER-VOLTAGE POWER DOWN", "OVER-VOLTAGE WARNNING"
+    )
+
+    #unsolicited result codes which are followed by data line (like '+CMT: ,25' and PDU line)
+    MULTILINE_PREFIXES  = ("+CMT", "+CDS", "+CBM")
+
+    #unsolicited result codes with quoted text which can contain line breaks (like USSD result)
+    QUOTED_PREFIXES     = ("+CUSD", )
+
+    #max count of unsolicited result codes without handlers which are kept for reading
+    MAX_PENDING         = 64
+
+class SimGsmPipelining:
+    #max length of command line (SIM900 accepts up to 556 symbols)
+    MAX_COMMAND_LINE_LENGTH = 556
+
+    #basic commands which can be concatenated (echo, quiet mode, verbose mode, result codes format)
+    BASIC_COMMANDS          = "EQVX"
+
+    #commands which are starting actions or are waiting for data, they are never concatenated
+    ACTION_COMMANDS         = (
+        "+HTTPINIT", "+HTTPTERM", "+HTTPACTION", "+HTTPREAD", "+HTTPDATA", "+CMGS", "+CMGW", "+CMSS", "+CMGR",
+        "+CMGL", "+CMGD", "+CMGDA", "+CUSD", "+CPIN", "+CFUN", "+IPR", "+CIPSTART", "+CIPSEND", "+CIPCLOSE",
+        "+CIPSHUT"
+    )
+
+class SimGsmSettings:
+    #extended commands which are setting module parameters, their values are cached
+    CACHED_COMMANDS     = ("+CMGF", "+CSCS", "+CMEE", "+CSMP", "+CNMI")
+
+    #basic commands which are setting module parameters (echo, quiet mode, verbose mode, result codes format)
+    CACHED_BASIC        = "EQVX"
+
+    #commands which are dropping HTTP session parameters
+    HTTP_COMMANDS       = ("+HTTPINIT", "+HTTPTERM")
+
+    #unsolicited result codes which are reporting module restart or power down
+    RESET_PREFIXES      = (
+        "RDY", "+CFUN", "NORMAL POWER DOWN", "UNDER-VOLTAGE POWER DOWN", "OVER-VOLTAGE POWER DOWN"
+    )
+
+class SimGsmBaudRate:
+    #rates which can be set by 'AT+IPR' command (when module does not report them)
+    SUPPORTED_RATES     = (1200, 2400, 4800, 9600, 19200, 38400, 57600, 115200)
+
+    #rates which are checked when module does not answer on current port rate
+    PROBE_RATES         = (115200, 57600, 38400, 19200, 9600)
+
+    #count of commands which must be executed without errors after rate changing
+    VERIFY_ROUNDS       = 5
+
+    #time (in seconds) which is needed to module for applying new rate
+    SWITCH_DELAY        = 0.1
+
+class SimGsmWaitStrategy:
+    #sleeping for fixed intervals between port polls
+    SLEEP               = 0
+
+    #blocking on port file descriptor (select/poll) till data arrives or operation time is over
+    SELECT              = 1
+
 class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
-    def __init__(self, serial, logger = None):
+    #max bytes count for single port reading operation
+    readChunkSize = 256
+
+    def __init__(
+            self,
+            serial,
+            logger              = None,
+            useReaderThread     = False,
+            readerBufferSize    = 65536,
+            waitStrategy        = SimGsmWaitStrategy.SLEEP
+    ):
         AminisLastErrorHolderWithLogging.__init__(self, logger)
         self.input      = bytearray()
         self.__serial   = serial
@@ -72,6 +154,54 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         #stores last executed command result
         self.lastResult = None
 
+        #stores intermediate response lines of last executed command
+        self.lastResponseLines = None
+
+        #function which receives tracing events (see simtrace module), when None tracing is disabled
+        self.traceSink = None
+
+        #registry of commands latency and results (see simmetrics module), when None metrics are not collected
+        self.metrics = None
+
+        #when True compatible commands of commands lists are concatenated in one command line
+        self.commandsPipelining = True
+
+        #stores results of each command of last executed commands list
+        self.lastCommandsResults = []
+
+        #when reader thread is used, only this thread reads port and all read functions consume data from ring buffer
+        self.__readerBuffer = SimSerialRingBuffer(readerBufferSize) if useReaderThread else None
+        self.__reader       = None
+
+        #received data which was not consumed yet by line reading functions
+        self.__framer       = SimGsmLineFramer()
+
+        #unsolicited result codes handlers (prefix -> handlers list)
+        self.__urcHandlers  = {}
+
+        #unsolicited result codes without handlers
+        self.__pendingUrcs  = collections.deque(maxlen = SimGsmUrc.MAX_PENDING)
+
+        #first line of multiline unsolicited result code
+        self.__urcPartial   = None
+
+        #strategy of waiting for input data when reader thread is not used
+        self.__waitStrategy = waitStrategy
+        self.__poller       = None
+        self.__pollerFd     = None
+
+    @property
+    def waitStrategy(self):
+        return self.__waitStrategy
+
+    @property
+    def useReaderThread(self):
+        return self.__readerBuffer is not None
+
+    @property
+    def portOpened(self):
+        return self.__serial.is_open
+
     def openPort(self):
         try:
             self.__serial.open()
@@ -83,6 +213,359 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
             self.setError("error opening port")
             return False
 
+        if self.useReaderThread:
+            self.startReader()
+
+        return True
+
+    def startReader(self):
+        """
+        Starts background reader thread (only when handler was created with useReaderThread = True)
+
+        :return: True if reader is running, otherwise returns False
+        """
+        if not self.useReaderThread:
+            return False
+
+        if (self.__reader is not None) and self.__reader.is_alive():
+            return True
+
+        self.__reader = SimSerialReaderThread(self.__serial, self.__readerBuffer, self.logger)
+        self.__reader.start()
+
+        return True
+
+    @property
+    def portBaudRate(self):
+        return self.__serial.baudrate
+
+    def setPortBaudRate(self, value):
+        """
+        Changes baud rate of the opened port. All received data is dropped.
+
+        :param value: new baud rate
+        :return: True if rate was changed, otherwise returns False
+        """
+        readerRunning = self.__reader is not None
+        self.stopReader()
+
+        try:
+            self.__serial.baudrate = value
+        except Exception as e:
+            self.setError("error changing port baud rate to {0}: {1}".format(value, e))
+            return False
+        finally:
+            self.flushInput()
+            if readerRunning:
+                self.startReader()
+
+        return True
+
+    def stopReader(self):
+        """
+        Stops background reader thread
+
+        :return: nothing
+        """
+        if self.__reader is None:
+            return
+
+        self.__reader.stop()
+        self.__reader = None
+
+    @staticmethod
+    def urcPrefix(line):
+        """
+        Returns prefix of unsolicited result code, like '+CMTI' for '+CMTI: "SM",3' or 'RING' for 'RING'
+
+        :param line: line for analysis
+        :return: prefix
+        """
+        if line.startswith("+"):
+            return line.split(":", 1)[0].strip()
+
+        return line.strip()
+
+    def registerUrcHandler(self, prefix, handler):
+        """
+        Registers handler for unsolicited result codes with given prefix. Handler will be called with whole result
+        code line (multiline codes, like '+CMT', are joined with new line symbol).
+
+        :param prefix: result code prefix, like '+CMTI' or 'RING'
+        :param handler: function with one argument
+        :return: nothing
+        """
+        self.__urcHandlers.setdefault(prefix, []).append(handler)
+
+    def unregisterUrcHandler(self, prefix, handler = None):
+        """
+        Removes handler of unsolicited result codes
+
+        :param prefix: result code prefix
+        :param handler: handler for removing, when None all handlers of given prefix will be removed
+        :return: nothing
+        """
+        if handler is None:
+            self.__urcHandlers.pop(prefix, None)
+            return
+
+        handlers = self.__urcHandlers.get(prefix, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+        if len(handlers) == 0:
+            self.__urcHandlers.pop(prefix, None)
+
+    def isUrc(self, line):
+        """
+        Checks that line is unsolicited result code (known or with registered handler)
+
+        :param line: stripped line
+        :return: True when line is unsolicited result code
+        """
+        prefix = self.urcPrefix(line)
+        return (prefix in self.__urcHandlers) or (prefix in SimGsmUrc.KNOWN_PREFIXES)
+
+    def dispatchUrc(self, line, keepUnhandled = True):
+        """
+        Passes unsolicited result code to registered handlers. When there are no handlers result code will be kept
+        for readUrcLine() calls.
+
+        :param line: unsolicited result code line
+        :param keepUnhandled: when False result code without handlers will not be kept
+        :return: True when code was passed to at least one handler
+        """
+        handlers = self.__urcHandlers.get(self.urcPrefix(line))
+        if not handlers:
+            if keepUnhandled:
+                self.__pendingUrcs.append(line)
+
+            return False
+
+        for handler in list(handlers):
+            try:
+                handler(line)
+            except Exception as e:
+                self.logger.error("error in unsolicited result code handler for '{0}': {1}".format(line, e))
+
+        return True
+
+    def discardPendingUrcs(self, prefix):
+        """
+        Removes kept unsolicited result codes with given prefix. Must be called before sending of command which result
+        is received as unsolicited result code, so late result of previous command is not taken as its result.
+
+        :param prefix: result code prefix, like '+CUSD'
+        :return: count of removed result codes
+        """
+        lines = [line for line in self.__pendingUrcs if self.urcPrefix(line) == prefix]
+        for line in lines:
+            self.__pendingUrcs.remove(line)
+
+        return len(lines)
+
+    @staticmethod
+    def isUrcIncomplete(line):
+        """
+        Checks that unsolicited result code needs next lines (data line of '+CMT' or rest of quoted USSD text)
+
+        :param line: result code lines joined with new line symbol
+        :return: True when next lines are needed
+        """
+        prefix = SimGsmSerialPortHandler.urcPrefix(line)
+        if prefix in SimGsmUrc.MULTILINE_PREFIXES:
+            return "\n" not in line
+
+        if prefix in SimGsmUrc.QUOTED_PREFIXES:
+            return (line.count("\"") % 2) != 0
+
+        return False
+
+    def __joinUrcLine(self, line):
+        """
+        Joins lines of multiline unsolicited result codes
+
+        :param line: stripped line
+        :return: whole result code or None when next lines are needed
+        """
+        if self.__urcPartial is not None:
+            line              = self.__urcPartial + "\n" + line
+            self.__urcPartial = None
+
+        if self.isUrcIncomplete(line):
+            self.__urcPartial = line
+            return None
+
+        return line
+
+    def __filterUrcLine(self, line, solicitedPrefixes):
+        """
+        Removes unsolicited result codes from command response and dispatches them
+
+        :param line: stripped response line
+        :param solicitedPrefixes: prefixes of responses of executed command (they are not unsolicited)
+        :return: True when line was removed from response
+        """
+        #lines of multiline unsolicited result code are kept together
+        if self.__urcPartial is None:
+            prefix = self.urcPrefix(line)
+            if prefix in solicitedPrefixes:
+                return False
+
+            if (prefix not in self.__urcHandlers) and (prefix not in SimGsmUrc.KNOWN_PREFIXES):
+                return False
+
+        line = self.__joinUrcLine(line)
+        if line is not None:
+            self.dispatchUrc(line)
+
+        return True
+
+    def processUrcs(self, maxWaitTime = 0):
+        """
+        Reads all received lines and dispatches unsolicited result codes. Other lines are skipped.
+
+        :param maxWaitTime: max wait time for new lines
+        :return: count of dispatched unsolicited result codes
+        """
+        count = 0
+        start = time.time()
+
+        while True:
+            line = self.readLn(max(0, maxWaitTime - timeDelta(start)))
+            if line is None:
+                return count
+
+            if len(line) == 0:
+                continue
+
+            if (self.__urcPartial is not None) or self.isUrc(line):
+                self.__filterUrcLine(line, ())
+                count += 1
+            else:
+                self.logger.debug("processUrcs(): skipping line '%s'", line)
+
+    def readUrcLine(self, prefix, maxWaitTime = 500):
+        """
+        Waits for unsolicited result code with given prefix. Other unsolicited result codes are dispatched. Result code
+        which was kept during other commands is returned first, so codes which were received before sending of command
+        must be removed with discardPendingUrcs().
+
+        :param prefix: result code prefix, like '+HTTPACTION'
+        :param maxWaitTime: max wait time
+        :return: result code line or None on timeout
+        """
+        for line in list(self.__pendingUrcs):
+            if self.urcPrefix(line) == prefix:
+                self.__pendingUrcs.remove(line)
+                return line
+
+        start = time.time()
+        while True:
+            timeLeft = maxWaitTime - timeDelta(start)
+            if timeLeft <= 0:
+                return None
+
+            line = self.readDataLine(timeLeft)
+            if line is None:
+                return None
+
+            if (self.__urcPartial is None) and (not self.isUrc(line)):
+                self.logger.debug("readUrcLine(): skipping line '%s'", line)
+                continue
+
+            line = self.__joinUrcLine(line)
+            if line is None:
+                continue
+
+            if self.urcPrefix(line) == prefix:
+                self.dispatchUrc(line, False)
+                return line
+
+            self.dispatchUrc(line)
+
+    def __readPortBytes(self, maxCount):
+        """
+        Reads available bytes from port (or from reader ring buffer when reader thread is used). Does not wait for data.
+        Reader thread is started by openPort() only, when it was stopped by reading error this error is raised (like
+        port reading error) after all received data was consumed.
+
+        :param maxCount: max bytes count for reading
+        :return: received bytes
+        """
+        if self.__readerBuffer is None:
+            ret = self.__serial.read(maxCount)
+        else:
+            ret = self.__readerBuffer.read(maxCount)
+            if (len(ret) == 0) and (self.__reader is not None) and (self.__reader.lastError is not None):
+                raise IOError("serial reader stopped: {0}".format(self.__reader.lastError))
+
+        if (self.traceSink is not None) and ret:
+            self.traceSink(SimTraceBytesReceived(ret))
+
+        return ret
+
+    def __readBytes(self, maxCount):
+        """
+        Reads available bytes. Data which was received but not consumed by line reading functions is returned first.
+
+        :param maxCount: max bytes count for reading
+        :return: received bytes
+        """
+        if self.__framer.pendingSize > 0:
+            return self.__framer.takePending(maxCount)
+
+        return self.__readPortBytes(maxCount)
+
+    def __waitForData(self, sleepInterval, start, maxWaitTime):
+        """
+        Waits for new input data. Without reader thread just sleeps for given interval, otherwise wakes up as soon as
+        data arrives (or operation time is over)
+
+        :param sleepInterval: sleep interval (in seconds) for polling mode
+        :param start: operation start time
+        :param maxWaitTime: max operation time (in milliseconds)
+        :return: nothing
+        """
+        remaining = (maxWaitTime - timeDelta(start)) / 1000.0
+
+        if self.__readerBuffer is not None:
+            self.__readerBuffer.waitForData(remaining)
+            return
+
+        if (self.__waitStrategy == SimGsmWaitStrategy.SELECT) and self.__waitForPortDescriptor(remaining):
+            return
+
+        time.sleep(sleepInterval)
+
+    def __waitForPortDescriptor(self, timeout):
+        """
+        Blocks on port file descriptor till it will have data for reading
+
+        :param timeout: max wait time in seconds
+        :return: True if waiting was done, False when port does not support descriptor waiting
+        """
+        try:
+            fd = self.__serial.fileno()
+        except Exception:
+            self.logger.warning("port has no file descriptor, using sleep wait strategy")
+            self.__waitStrategy = SimGsmWaitStrategy.SLEEP
+            return False
+
+        if timeout <= 0:
+            return True
+
+        #poll() is not limited by descriptor number, but it's not available on all platforms
+        if not hasattr(select, "poll"):
+            select.select([fd], [], [], timeout)
+            return True
+
+        if (self.__poller is None) or (self.__pollerFd != fd):
+            self.__poller   = select.poll()
+            self.__pollerFd = fd
+            self.__poller.register(fd, select.POLLIN | select.POLLPRI)
+
+        self.__poller.poll(timeout * 1000.0)
         return True
 
     def __sendRawBytes(self, data, maxWaitTime = 1000):
@@ -97,7 +580,8 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         sentBytes    = 0
         start        = time.time()
 
-        self.logger.debug("{0}, sending: {1}".format(inspect.stack()[0][3], data))
+        if self.traceSink is not None:
+            self.traceSink(SimTraceCommandSent(data))
 
         while sentBytes < bytesToSend:
             if timeDelta(start) >= maxWaitTime:
@@ -162,6 +646,10 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         """
         try:
             self.__serial.flushInput()
+            self.__framer.clear()
+
+            if self.__readerBuffer is not None:
+                self.__readerBuffer.clear()
         except Exception as e:
             self.setError("error flushing: {0}".format(e))
         except:
@@ -191,8 +679,7 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
 
                 receivedBytesQty = 0
                 while True:
-                    bytesToRead = 10 if ((bytesCount - len(buffer)) >= 10) else 1
-                    b = self.__serial.read(bytesToRead)
+                    b = self.__readBytes(bytesCount - len(buffer))
 
                     if (b is None) or (len(b) == 0):
                         break
@@ -205,7 +692,7 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
 
                 #if we have nothing in input - let's go sleep for some time
                 if receivedBytesQty == 0:
-                    time.sleep(0.003)
+                    self.__waitForData(0.003, start, maxWaitTime)
 
             #comming there by timeout
             return None
@@ -219,45 +706,14 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
 
 
     def readNullTerminatedLn(self, maxWaitTime = 5000, codepage = "ascii"):
-        start     = time.time()
-
-        start     = time.time()
-        buffer    = bytearray()
-        try:
-            while True:
-                #checking for timeout
-                if timeDelta(start) >= maxWaitTime:
-                    return None
-
-                receivedBytesQty = 0
-                while True:
-                    b = self.__serial.read(1)
-
-                    if (b is None) or (len(b) == 0):
-                        break
-
-                    #checking that we have NULL symbol in
-                    idx = b.find(0x00)
-                    if idx != -1:
-                        buffer.extend(b[:idx])
-                        return buffer.decode(codepage)
-
-                    buffer += bytearray(b)
-                    receivedBytesQty += len(b)
-
-                #if we have nothing in input - let's go sleep for some time
-                if receivedBytesQty == 0:
-                    time.sleep(0.003)
-
-            #comming there by timeout
-            return None
+        """
+        Returns string terminated by NULL symbol (NULL symbol is not included in result)
 
-        except Exception as e:
-            self.setError(e)
-            return None
-        except:
-            self.setError("reading error...")
-            return None
+        :param maxWaitTime: max wait interval for operation
+        :param codepage: code page of result string
+        :return: received string
+        """
+        return self.__readFramedLine(maxWaitTime, codepage, b"\x00", False)
 
     def readLn(self, maxWaitTime = 5000, codepage = "ascii"):
         """
@@ -267,38 +723,39 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         :param codepage: code page of result string
         :return: received string
         """
+        line = self.__readFramedLine(maxWaitTime, codepage, b"\n", True)
+        if (line is None) or (codepage is None):
+            return line
+
+        return line.strip()
+
+    def __readFramedLine(self, maxWaitTime, codepage, separator, keepSeparator):
+        """
+        Returns first completed line from input data. Data received after line end is kept for next reading.
+
+        :param maxWaitTime: max wait interval for operation
+        :param codepage: code page of result string, if it's a None - will return a bytearray
+        :param separator: line separator
+        :param keepSeparator: when True separator will be kept at the end of line
+        :return: received line or None on timeout
+        """
         start     = time.time()
-        buffer    = bytearray()
         try:
             while True:
+                for line in self.__framer.lines(codepage, separator, keepSeparator):
+                    return line
+
+                b = self.__readPortBytes(self.readChunkSize)
+                if (b is not None) and (len(b) > 0):
+                    self.__framer.feed(b)
+                    continue
+
                 #checking for timeout
                 if timeDelta(start) >= maxWaitTime:
                     return None
 
-                receivedBytesQty = 0
-                while True:
-                    b = self.__serial.read(1)
-
-                    if (b is None) or (len(b) == 0):
-                        break
-
-                    buffer += bytearray(b)
-                    receivedBytesQty += len(b)
-
-                    if codepage is not None:
-                        #checking for line end symbols
-                        line = buffer.decode(codepage)
-                        if '\n' in line:
-                            return line.strip()
-                    elif ord('\n') in buffer:
-                        return buffer
-
                 #if we have nothing in input - let's go sleep for some time
-                if receivedBytesQty == 0:
-                    time.sleep(0)
-
-            #comming there by timeout
-            return None
+                self.__waitForData(0.001, start, maxWaitTime)
 
         except Exception as e:
             self.setError(e)
@@ -316,34 +773,27 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         :param codepage: code page of result string, if it's a None - will return a bytearray
         :return: received string
         """
-        ret     = None
         start   = time.time()
 
         while True:
             #checking for timeout
-            if timeDelta(start) >= maxWaitTime:
+            timeLeft = maxWaitTime - timeDelta(start)
+            if timeLeft <= 0:
                 break
 
             #reading string
-            #TODO: need to fix timeout (substract already spent time interval)
-            line = self.readLn(maxWaitTime, codepage)
+            line = self.readLn(timeLeft, codepage)
 
-            #removing garbage symbols
-            if line is not None:
-                line = str(line).strip()
+            #returning None if None received
+            if line is None:
+                return None
 
-                #if we have non empty string let's return it
-                if len(line) > 0:
-                    return line
-                else:
-                    #if we have empty line - let's continue reading
-                    continue
-            else:
-                #returning None if None received
-                if line is None:
-                    return None
+            #removing garbage symbols
+            line = str(line).strip()
 
-                continue
+            #if we have non empty string let's return it, otherwise let's continue reading
+            if len(line) > 0:
+                return line
 
         #we will come here by timeout
         return None
@@ -367,6 +817,8 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
 
         :return: nothing
         """
+        self.stopReader()
+
         try:
             self.__serial.close()
         except Exception as e:
@@ -417,8 +869,6 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         :param targetString:
         :return:
         """
-        ret = ""
-
         #searching for target string
         while len(strings) > 0:
             s = str(strings[-1]).strip()
@@ -428,11 +878,7 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
                 break
 
         #compiling result
-        qty = len(strings)
-        for i in range(qty):
-            ret += strings[i]
-
-        return ret
+        return "".join(strings)
 
     @staticmethod
     def parseStrings(buffer, encoding = "ascii"):
@@ -455,68 +901,158 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         return ret
 
     def commandAndStdResult(self, commandText, maxWaitTime = 5000, possibleResults = None):
-        self.lastResult = None
+        """
+        Sends command and waits for one of final result codes
+
+        :param commandText: command for execution
+        :param maxWaitTime: max wait time for result
+        :param possibleResults: expected final result codes, by default - "OK" and "ERROR"
+        :return: response text (without final result code) or None on error or timeout
+        """
+        self.lastResult         = None
+        self.lastResponseLines  = None
+
+        start     = time.time()
+        response  = self.__sendCommand(commandText, possibleResults)
 
+        try:
+            while True:
+                if timeDelta(start) >= maxWaitTime:
+                    break
+
+                b = self.__readBytes(self.readChunkSize)
+
+                #if we have no data - let's wait for it
+                if (b is None) or (len(b) == 0):
+                    self.__waitForData(0.005, start, maxWaitTime)
+                    continue
+
+                #only new data is parsed here
+                if response.feed(b):
+                    self.__commandFinished(commandText, response, start)
+                    return response.text
+
+            self.__commandTimedOut(commandText, response, start, maxWaitTime)
+            return None
+        except Exception as e:
+            self.setError(e)
+            return None
+        except:
+            self.setError("reading error...")
+            return None
+
+    def __sendCommand(self, commandText, possibleResults):
+        """
+        Sends command and creates accumulator for its response
+
+        :param commandText: command for execution
+        :param possibleResults: expected final result codes, by default - "OK" and "ERROR"
+        :return: response accumulator
+        """
         #setting up standard results
         if possibleResults is None:
             possibleResults = ["OK", "ERROR"]
 
-        start     = time.time()
-        buffer    = bytearray()
+        #responses with command names are not unsolicited result codes
+        solicited = set(re.findall(r"\+[A-Z]+", str(commandText).upper()))
+        response  = SimGsmResponseAccumulator(
+            possibleResults,
+            lineFilter = lambda line: self.__filterUrcLine(line, solicited)
+        )
 
         self.flush()
 
         #sending command
         self.simpleWriteLn(commandText)
+        return response
 
-        try:
-            while True:
-                if timeDelta(start) >= maxWaitTime:
-                    break
+    def __commandFinished(self, commandText, response, start):
+        self.lastResult         = response.result
+        self.lastResponseLines  = response.lines
 
-                readBytesQty = 0
-                while True:
-                    b = self.__serial.read(100)
+        #data received after final result code (like unsolicited codes) must not be lost
+        self.__framer.unread(response.takeRemainder())
 
-                    if (b is not None) and (len(b) >= 1):
-                        buffer += bytearray(b)
-                        self.logger.debug("{0}: buffer = {1}".format(inspect.stack()[0][3], buffer))
+        if self.traceSink is not None:
+            self.traceSink(
+                SimTraceResultMatched(commandText, response.result, len(response.lines), timeDelta(start))
+            )
 
-                        readBytesQty += len(b)
-                        continue
-                    else:
-                        break
+        if self.metrics is not None:
+            self.metrics.observe(
+                commandText,
+                response.result,
+                timeDelta(start),
+                len(commandText) + 2,
+                response.receivedBytes
+            )
 
-                #if we have no data - let's go sleep for tiny amount of time
-                if readBytesQty == 0:
-                    time.sleep(0.005)
-                    continue
+    def __commandTimedOut(self, commandText, response, start, maxWaitTime):
+        if self.traceSink is not None:
+            self.traceSink(SimTraceTimeout(commandText, maxWaitTime, response.receivedBytes))
 
-                #parsing result strings
-                strings = SimGsm.parseStrings(buffer[:])
-                self.logger.debug("{0}: strings = {1}".format(inspect.stack()[0][3], strings))
+        if self.metrics is not None:
+            self.metrics.observe(commandText, None, timeDelta(start), len(commandText) + 2, response.receivedBytes)
 
-                if strings is None:
-                    time.sleep(0.01)
-                    continue
+    def commandLines(self, commandText, maxWaitTime = 5000, possibleResults = None):
+        """
+        Generator which sends command and yields response lines as soon as they are received (long responses, like
+        messages listing, are not accumulated). Final result code is stored in lastResult when generator is finished,
+        lastResponseLines is empty. When iteration is stopped before final result code, rest of response is skipped.
+
+        :param commandText: command for execution
+        :param maxWaitTime: max wait time for result
+        :param possibleResults: expected final result codes, by default - "OK" and "ERROR"
+        :return: response lines (without final result code)
+        """
+        self.lastResult         = None
+        self.lastResponseLines  = None
+
+        start    = time.time()
+        response = self.__sendCommand(commandText, possibleResults)
+        finished = False
+
+        try:
+            while not finished:
+                if timeDelta(start) >= maxWaitTime:
+                    break
 
-                #if we have some strings let's parse it
-                if len(strings) > 0:
-                    lastString = SimGsm.getLastNonEmptyString(strings[:])
+                b = self.__readBytes(self.readChunkSize)
 
-                    if lastString in possibleResults:
-                        self.lastResult = lastString
-                        return SimGsm.removeEndResult(strings[:], lastString)
+                #if we have no data - let's wait for it
+                if (b is None) or (len(b) == 0):
+                    self.__waitForData(0.005, start, maxWaitTime)
+                    continue
 
-                    time.sleep(0.05)
+                finished = response.feed(b)
 
-            return None
+                #lines are removed from response after returning
+                lines = response.lines[:]
+                del response.lines[:]
+
+                for line in lines:
+                    yield line
         except Exception as e:
             self.setError(e)
-            return None
-        except:
-            self.setError("reading error...")
-            return None
+        finally:
+            #response must be read completely (even when iteration was stopped), otherwise it will be received as
+            #response of next command
+            try:
+                while (not response.finished) and (timeDelta(start) < maxWaitTime):
+                    b = self.__readBytes(self.readChunkSize)
+                    if (b is None) or (len(b) == 0):
+                        self.__waitForData(0.005, start, maxWaitTime)
+                        continue
+
+                    response.feed(b)
+                    del response.lines[:]
+            except Exception as e:
+                self.setError(e)
+
+            if response.finished:
+                self.__commandFinished(commandText, response, start)
+            else:
+                self.__commandTimedOut(commandText, response, start, maxWaitTime)
 
     def execSimpleCommand(self, commandText, result, timeout = 500):
         ret = self.commandAndStdResult(commandText, timeout, [result])
@@ -526,7 +1062,7 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
         return True
 
     def execSimpleOkCommand(self, commandText, timeout = 500):
-        self.logger.debug("executing command '{0}'".format(commandText))
+        self.logger.debug("executing command '%s'", commandText)
 
         ret = self.commandAndStdResult(commandText, timeout, ["OK", "ERROR"])
         if (ret is None) or (self.lastResult != "OK"):
@@ -534,23 +1070,495 @@ class SimGsmSerialPortHandler(AminisLastErrorHolderWithLogging):
 
         return True
 
-    def execSimpleCommandsList(self, commandsList):
+    @staticmethod
+    def isPipelinableCommand(commandText):
+        """
+        Checks that command can be concatenated with other commands in one command line. Only commands which are
+        setting parameters can be concatenated, so they can be executed again when concatenated line fails.
+
+        :param commandText: command for checking
+        :return: True when command can be concatenated
+        """
+        text = str(commandText).strip()
+        if (len(text) < 3) or (text[:2].upper() != "AT"):
+            return False
+
+        body = text[2:]
+
+        #basic configuration commands, like 'ATV1' or 'ATE0'
+        if re.match(r"^[{0}]\d?$".format(SimGsmPipelining.BASIC_COMMANDS), body, re.IGNORECASE):
+            return True
+
+        #extended commands must be set commands, like 'AT+CMGF=1'
+        m = re.match(r"^(\+[A-Za-z]+)=(.*)$", body)
+        if (m is None) or (m.group(2) == "?"):
+            return False
+
+        name = m.group(1).upper()
+        if name in SimGsmPipelining.ACTION_COMMANDS:
+            return False
+
+        #'AT+SAPBR=3,...' sets bearer parameter, other 'AT+SAPBR' commands are actions
+        if (name == "+SAPBR") and (not m.group(2).startswith("3,")):
+            return False
+
+        return True
+
+    @staticmethod
+    def joinCommands(commands):
+        """
+        Concatenates commands in one command line, like 'ATV1+CMEE=0;+CMGF=1'
+
+        :param commands: commands for concatenation (each command must start with 'AT')
+        :return: command line
+        """
+        ret             = "AT"
+        prevExtended    = False
+
+        for command in commands:
+            body = str(command).strip()[2:]
+
+            #extended command must be finished by semicolon when other command follows it
+            if prevExtended:
+                ret += ";"
+
+            ret         += body
+            prevExtended = body.startswith("+")
+
+        return ret
+
+    def __pipelineGroups(self, commandsList):
+        """
+        Splits commands list to groups which can be executed in one command line
+
+        :param commandsList: commands list (command and timeout)
+        :return: groups list
+        """
+        groups  = []
+        group   = []
+        length  = 2
+
         for command in commandsList:
-            if not self.execSimpleOkCommand(command[0], command[1]):
+            if not self.isPipelinableCommand(command[0]):
+                if len(group) > 0:
+                    groups.append(group)
+
+                groups.append([command])
+                group  = []
+                length = 2
+                continue
+
+            commandLength = len(str(command[0]).strip()) - 1
+            if (len(group) > 0) and (length + commandLength > SimGsmPipelining.MAX_COMMAND_LINE_LENGTH):
+                groups.append(group)
+                group  = []
+                length = 2
+
+            group.append(command)
+            length += commandLength
+
+        if len(group) > 0:
+            groups.append(group)
+
+        return groups
+
+    def __execCommandsGroup(self, group):
+        """
+        Executes commands group in one command line. When command line fails commands are executed one by one.
+
+        :param group: commands list (command and timeout)
+        :return: results list for each command (True, False or None when command was not executed)
+        """
+        if len(group) > 1:
+            commandLine = self.joinCommands([command[0] for command in group])
+            timeout     = sum([command[1] for command in group])
+
+            if self.execSimpleOkCommand(commandLine, timeout):
+                return [True] * len(group)
+
+            self.logger.debug("pipelined command line failed, executing commands one by one: %s", commandLine)
+
+        ret = []
+        for command in group:
+            ret.append(self.execSimpleOkCommand(command[0], command[1]))
+            if not ret[-1]:
+                break
+
+        return ret + [None] * (len(group) - len(ret))
+
+    def execSimpleCommandsList(self, commandsList, pipelined = None):
+        """
+        Executes commands list. Stops on first failed command. Results of each command are stored in
+        lastCommandsResults (True, False or None when command was not executed).
+
+        :param commandsList: commands list (command and timeout)
+        :param pipelined: when True compatible commands will be concatenated in one command line, when None
+            commandsPipelining attribute will be used
+        :return: True when all commands was executed successfully, otherwise returns False
+        """
+        if pipelined is None:
+            pipelined = self.commandsPipelining
+
+        if pipelined:
+            groups = self.__pipelineGroups(commandsList)
+        else:
+            groups = [[command] for command in commandsList]
+
+        self.lastCommandsResults = []
+        for group in groups:
+            self.lastCommandsResults += self.__execCommandsGroup(group)
+
+            if not self.lastCommandsResults[-1]:
+                self.lastCommandsResults += [None] * (len(commandsList) - len(self.lastCommandsResults))
                 return False
 
         return True
 
 class SimGsm(SimGsmSerialPortHandler):
-    def __init__(self, serial, logger = None):
-        SimGsmSerialPortHandler.__init__(self, serial, logger)
+    def __init__(self, serial, logger = None, **kwargs):
+        SimGsmSerialPortHandler.__init__(self, serial, logger, **kwargs)
 
         self.__state    = SimGsmState.UNKNOWN
         self.pinState = SimGsmPinRequestState.UNKNOWN
 
-    def begin(self, numberOfAttempts = 5):
+        #when True commands which are setting already set values are not sent to the module
+        self.settingsCaching = True
+
+        #last known module settings (setting key -> value)
+        self.__settings = {}
+
+        #data transfer speed measured after baud rate changing (bytes per second)
+        self.effectiveBytesPerSecond = None
+
+    @staticmethod
+    def parseSettings(commandText):
+        """
+        Parses command line which sets module parameters. Returns setting key and value for each command of line, for
+        example [('+CMGF', '1')] for 'AT+CMGF=1' or [('V', '1'), ('+CMEE', '0')] for 'ATV1+CMEE=0'. Successful test
+        commands (like 'AT+CMGS=?') are cached too.
+
+        :param commandText: command line
+        :return: settings list or None when command line contains commands which are not setting parameters
+        """
+        text = str(commandText).strip()
+        if (len(text) < 3) or (text[:2].upper() != "AT"):
+            return None
+
+        commands = SimGsmCommandLine.split(text[2:])
+        if not commands:
+            return None
+
+        ret = []
+        for command in commands:
+            setting = SimGsm.__parseSetting(command)
+            if setting is None:
+                return None
+
+            ret.append(setting)
+
+        return ret
+
+    @staticmethod
+    def __parseSetting(command):
+        """
+        Returns setting key and value for single command of command line
+
+        :param command: command without 'AT' prefix, like '+CMGF=1' or 'V1'
+        :return: setting key and value or None when command is not setting parameter
+        """
+        #basic command, like 'E0' or 'V1'
+        if not command.startswith("+"):
+            name = SimGsmCommandLine.commandName(command)
+            if name not in SimGsmSettings.CACHED_BASIC:
+                return None
+
+            return name, command[1:] if len(command) > 1 else "0"
+
+        m = re.match(r"^(\+[A-Za-z]+)=(.*)$", command)
+        if m is None:
+            return None
+
+        name  = m.group(1).upper()
+        value = m.group(2)
+
+        if value == "?":
+            return name + "=?", ""
+
+        if name in SimGsmSettings.CACHED_COMMANDS:
+            return name, value
+
+        if name == "+SAPBR":
+            #'AT+SAPBR=3,1,"APN","internet"' - bearer parameter
+            values = value.split(",", 3)
+            if (len(values) < 4) or (values[0].strip() != "3"):
+                return None
+
+            return "+SAPBR:{0}:{1}".format(values[1].strip(), values[2].strip("\" ").upper()), values[3]
+
+        if name == "+HTTPPARA":
+            #'AT+HTTPPARA="URL","host:80/path"' - HTTP session parameter
+            values = value.split(",", 1)
+            if len(values) < 2:
+                return None
+
+            return "+HTTPPARA:{0}".format(values[0].strip("\" ").upper()), values[1]
+
+        return None
+
+    def invalidateSettings(self, prefix = None):
+        """
+        Removes cached module settings, so all setting commands will be sent to the module again
+
+        :param prefix: when not None only settings with keys starting from this prefix will be removed
+        :return: nothing
+        """
+        if prefix is None:
+            self.__settings = {}
+            return
+
+        for key in [key for key in self.__settings if key.startswith(prefix)]:
+            del self.__settings[key]
+
+    def isSettingCached(self, commandText):
+        """
+        Checks that command line sets only values which are already set
+
+        :param commandText: command line
+        :return: True when command line can be skipped
+        """
+        if not self.settingsCaching:
+            return False
+
+        settings = self.parseSettings(commandText)
+        if settings is None:
+            return False
+
+        for key, value in settings:
+            if self.__settings.get(key) != value:
+                return False
+
+        return True
+
+    @property
+    def isHttpInitialized(self):
+        return "+HTTPINIT" in self.__settings
+
+    def __updateSettings(self, commandText, result):
+        name    = re.match(r"^(?:AT)?(\+[A-Z]+)?", str(commandText).strip().upper()).group(1)
+        isError = (result == "ERROR") or str(result).startswith("+CME ERROR") or str(result).startswith("+CMS ERROR")
+
+        #failed 'AT+HTTPTERM' means only that HTTP session was not initialized
+        if isError and (name in SimGsmSettings.HTTP_COMMANDS):
+            self.invalidateSettings("+HTTP")
+            return
+
+        #module state is unknown after timeouts and errors
+        if (result is None) or isError:
+            if len(self.__settings) > 0:
+                self.logger.debug("settings cache invalidated after '%s' (result = %s)", commandText, result)
+
+            self.invalidateSettings()
+            return
+
+        if result != "OK":
+            return
+
+        if name in SimGsmSettings.HTTP_COMMANDS:
+            self.invalidateSettings("+HTTP")
+            if name == "+HTTPINIT":
+                self.__settings["+HTTPINIT"] = ""
+
+            return
+
+        settings = self.parseSettings(commandText)
+        if settings is not None:
+            self.__settings.update(settings)
+
+    def commandAndStdResult(self, commandText, maxWaitTime = 5000, possibleResults = None):
+        ret = SimGsmSerialPortHandler.commandAndStdResult(self, commandText, maxWaitTime, possibleResults)
+        self.__updateSettings(commandText, self.lastResult)
+
+        return ret
+
+    def commandLines(self, commandText, maxWaitTime = 5000, possibleResults = None):
+        try:
+            yield from SimGsmSerialPortHandler.commandLines(self, commandText, maxWaitTime, possibleResults)
+        finally:
+            self.__updateSettings(commandText, self.lastResult)
+
+    def dispatchUrc(self, line, keepUnhandled = True):
+        if self.urcPrefix(line) in SimGsmSettings.RESET_PREFIXES:
+            self.logger.debug("settings cache invalidated by '%s'", line)
+            self.invalidateSettings()
+
+        return SimGsmSerialPortHandler.dispatchUrc(self, line, keepUnhandled)
+
+    def execSimpleOkCommand(self, commandText, timeout = 500):
+        if self.isSettingCached(commandText):
+            self.logger.debug("skipping command '%s', values are already set", commandText)
+            self.lastResult = "OK"
+            return True
+
+        return SimGsmSerialPortHandler.execSimpleOkCommand(self, commandText, timeout)
+
+    def execSimpleCommandsList(self, commandsList, pipelined = None):
+        cached   = [self.isSettingCached(command[0]) for command in commandsList]
+        required = [command for command, isCached in zip(commandsList, cached) if not isCached]
+
+        ret = SimGsmSerialPortHandler.execSimpleCommandsList(self, required, pipelined)
+
+        #results of skipped commands are successful
+        results = iter(self.lastCommandsResults)
+        self.lastCommandsResults = [True if isCached else next(results) for isCached in cached]
+
+        return ret
+
+    def __probeCommand(self, attempts = 2, timeout = 300):
+        for i in range(attempts):
+            self.flushInput()
+            if self.execSimpleOkCommand("AT", timeout):
+                return True
+
+        return False
+
+    def probeBaudRate(self):
+        """
+        Searches port baud rate on which module answers. Current port rate is checked first.
+
+        :return: found baud rate or None when module does not answer
+        """
+        rates = [self.portBaudRate] + [rate for rate in SimGsmBaudRate.PROBE_RATES if rate != self.portBaudRate]
+
+        for rate in rates:
+            if (rate != self.portBaudRate) and (not self.setPortBaudRate(rate)):
+                continue
+
+            if self.__probeCommand():
+                self.logger.debug("module answers on %s baud", rate)
+                return rate
+
+        self.setError("module does not answer on any of baud rates: {0}".format(rates))
+        return None
+
+    @staticmethod
+    def parseSupportedBaudRates(response):
+        """
+        Parses response of 'AT+IPR=?' command, like '+IPR: (),(0,1200,2400,4800,9600,19200,38400,57600,115200)'
+
+        :param response: response text
+        :return: supported rates list (sorted in descending order, without autobaud value) or None
+        """
+        response = str(response).strip()
+        if not response.startswith("+IPR"):
+            return None
+
+        rates = set([int(v) for v in re.findall(r"\d+", response.split(":", 1)[-1])])
+        rates.discard(0)
+
+        return sorted(rates, reverse = True) if len(rates) > 0 else None
+
+    def __verifyBaudRate(self):
+        """
+        Checks current rate by commands executing, measures data transfer speed
+
+        :return: measured speed in bytes per second or None when commands was not executed
+        """
+        bytesCount  = 0
+        start       = time.time()
+
+        for i in range(SimGsmBaudRate.VERIFY_ROUNDS):
+            ret = self.commandAndStdResult("AT+GSN", 1000)
+            if (ret is None) or (self.lastResult != "OK"):
+                return None
+
+            #command with line end and response with final result code
+            bytesCount += len("AT+GSN") + 2 + len(ret) + 6
+
+        elapsed = max(time.time() - start, 0.001)
+        return bytesCount / elapsed
+
+    def __switchBaudRate(self, rate):
+        if not self.execSimpleOkCommand("AT+IPR={0}".format(rate), 1000):
+            return False
+
+        time.sleep(SimGsmBaudRate.SWITCH_DELAY)
+        return self.setPortBaudRate(rate)
+
+    def upgradeBaudRate(self, maxBaudRate = 115200):
+        """
+        Switches module and port to the fastest rate on which module works without errors. When new rate fails
+        module is returned to the previous rate.
+
+        :param maxBaudRate: max allowed rate
+        :return: True if module works on new or previous rate, otherwise returns False
+        """
+        originalRate = self.portBaudRate
+
+        ret   = self.commandAndStdResult("AT+IPR=?", 1000)
+        rates = self.parseSupportedBaudRates(ret) if (ret is not None) and (self.lastResult == "OK") else None
+        if rates is None:
+            rates = sorted(SimGsmBaudRate.SUPPORTED_RATES, reverse = True)
+
+        for rate in [rate for rate in rates if originalRate < rate <= maxBaudRate]:
+            self.logger.info("trying to switch baud rate from {0} to {1}".format(originalRate, rate))
+
+            if not self.__switchBaudRate(rate):
+                #module could switch rate before answering
+                if self.probeBaudRate() is None:
+                    return False
+
+                continue
+
+            speed = self.__verifyBaudRate()
+            if speed is not None:
+                self.effectiveBytesPerSecond = speed
+                self.logger.info("baud rate switched to {0}, effective speed {1:.0f} bytes/s".format(rate, speed))
+                return True
+
+            self.setWarn("errors on {0} baud, returning to {1}".format(rate, originalRate))
+            if (not self.__switchBaudRate(originalRate)) or (not self.__probeCommand()):
+                if self.probeBaudRate() is None:
+                    return False
+
+        self.effectiveBytesPerSecond = self.__verifyBaudRate()
+        return self.effectiveBytesPerSecond is not None
+
+    def __negotiateBaudRate(self, numberOfAttempts, maxBaudRate):
+        """
+        Initializes session on the rate on which module answers, then switches module and port to the fastest rate
+
+        :param numberOfAttempts: attempts count for module checking
+        :param maxBaudRate: max allowed rate for upgrading
+        :return: True if module is ready, otherwise returns False
+        """
+        self.flush()
+
+        if self.probeBaudRate() is None:
+            return False
+
+        if not self.begin(numberOfAttempts):
+            return False
+
+        return self.upgradeBaudRate(maxBaudRate)
+
+    def begin(self, numberOfAttempts = 5, upgradeBaudRate = False, maxBaudRate = 115200):
+        """
+        Initializes session with module
+
+        :param numberOfAttempts: attempts count for module checking
+        :param upgradeBaudRate: when True port rate of module is searched and both module and port are switched to
+            the fastest rate (see upgradeBaudRate())
+        :param maxBaudRate: max allowed rate for upgrading
+        :return: True if module is ready, otherwise returns False
+        """
+        if upgradeBaudRate:
+            return self.__negotiateBaudRate(numberOfAttempts, maxBaudRate)
+
         ok  = False
 
+        #module could be restarted or reconfigured
+        self.invalidateSettings()
+
         self.flush()
 
         needDisableEcho = False
@@ -569,11 +1577,8 @@ class SimGsm(SimGsmSerialPortHandler):
                 #we have ECHO, need reconfigure
                 needDisableEcho = True
                 line = self.readDataLine(500, "ascii")
-                if line == "OK":
-                    ok = True
-                    break
 
-            elif line == "OK":
+            if line == "OK":
                 ok = True
                 break
 
@@ -585,7 +1590,9 @@ class SimGsm(SimGsmSerialPortHandler):
             self.logger.info("Disabling echo, calling 'ATE0'")
             self.simpleWriteLn("ATE0")
             time.sleep(0.5)
-            self.flush()
+            self.flushInput()
+
+        self.__settings["E"] = "0"
 
         commands = [
             ["ATV1",        500],   #short answer for commands
@@ -593,10 +1600,9 @@ class SimGsm(SimGsmSerialPortHandler):
             ["AT",          5000]   #checking state
         ]
 
-        for cmd in commands:
-            self.logger.debug("configuring, calling: {0}".format(cmd[0]))
-            if not self.execSimpleOkCommand(commandText=cmd[0],timeout=cmd[1]):
-                return False
+        self.logger.debug("configuring, calling: %s", [cmd[0] for cmd in commands])
+        if not self.execSimpleCommandsList(commands):
+            return False
 
         #checking PIN state
         if not self.__checkPin():
@@ -604,6 +1610,33 @@ class SimGsm(SimGsmSerialPortHandler):
 
         return True
 
+    @staticmethod
+    def parsePinState(response):
+        """
+        Parses response of 'AT+CPIN?' command
+
+        :param response: response text, like '+CPIN: READY'
+        :return: PIN request state (one of SimGsmPinRequestState values) or None when response is wrong
+        """
+        values = splitAndFilter(str(response).strip(), ":")
+
+        if (len(values) < 2) or (values[0] != "+CPIN"):
+            return None
+
+        v = " ".join([v for v in values[1:]])
+
+        states = {
+            "READY"         : SimGsmPinRequestState.NOPINNEEDED,
+            "SIM PIN"       : SimGsmPinRequestState.SIM_PIN,
+            "SIM PUK"       : SimGsmPinRequestState.SIM_PUK,
+            "PH_SIM PIN"    : SimGsmPinRequestState.PH_SIM_PIN,
+            "PH_SIM PUK"    : SimGsmPinRequestState.PH_SIM_PUK,
+            "SIM PIN2"      : SimGsmPinRequestState.SIM_PIN2,
+            "SIM PUK2"      : SimGsmPinRequestState.SIM_PUK2
+        }
+
+        return states.get(v, SimGsmPinRequestState.UNKNOWN)
+
     def __checkPin(self):
         msg = self.commandAndStdResult("AT+CPIN?")
         if msg is None:
@@ -614,36 +1647,14 @@ class SimGsm(SimGsmSerialPortHandler):
 
         msg = str(msg).strip()
 
-        values = splitAndFilter(msg, ":")
-        msg.split(":")
-
-        if len(values) < 2:
-            self.setError("Wrong response for PIN state request")
-            return False
-
-        if values[0] != "+CPIN":
-            self.setError("Wrong response for PIN state request. First value = '{0}'".format(values[0]))
+        pinState = self.parsePinState(msg)
+        if pinState is None:
+            self.setError("Wrong response for PIN state request: '{0}'".format(msg))
             return False
 
-        v = " ".join([v for v in values[1:]])
-
-        if v == "READY":
-            self.pinState = SimGsmPinRequestState.NOPINNEEDED
-        elif v == "SIM PIN":
-            self.pinState = SimGsmPinRequestState.SIM_PIN
-        elif v == "SIM PUK":
-            self.pinState = SimGsmPinRequestState.SIM_PUK
-        elif v == "PH_SIM PIN":
-            self.pinState = SimGsmPinRequestState.PH_SIM_PIN
-        elif v == "PH_SIM PUK":
-            self.pinState = SimGsmPinRequestState.PH_SIM_PUK
-        elif v == "SIM PIN2":
-            self.pinState = SimGsmPinRequestState.SIM_PIN2
-        elif v == "SIM PUK2":
-            self.pinState = SimGsmPinRequestState.SIM_PUK2
-        else:
-            self.pinState = SimGsmPinRequestState.UNKNOWN
-            self.setError("Unknown PIN request answer: {0}".format(v))
+        self.pinState = pinState
+        if pinState == SimGsmPinRequestState.UNKNOWN:
+            self.setError("Unknown PIN request answer: {0}".format(msg))
             return False
 
         return True
@@ -32,8 +32,8 @@ Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Rese
 from lib.sim900.gsm import SimGsm
 
 class SimImeiRetriever(SimGsm):
-    def __init__(self, port, logger):
-        SimGsm.__init__(self, port, logger)
+    def __init__(self, port, logger, **kwargs):
+        super().__init__(port, logger, **kwargs)
 
     def getIMEI(self):
         self.logger.debug("retrieving IMEI")
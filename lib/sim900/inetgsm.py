@@ -39,8 +39,8 @@ class SimInetGSMConnection:
     inetClosed      = 3
 
 class SimInetGSM(SimGsm):
-    def __init__(self, port, logger):
-        SimGsm.__init__(self, port, logger)
+    def __init__(self, port, logger, **kwargs):
+        super().__init__(port, logger, **kwargs)
 
         self.__ip                 = None
 
@@ -89,16 +89,16 @@ class SimInetGSM(SimGsm):
             ["OK"]
         )
         if (ret is None) or (self.lastResult != "OK"):
-            self.setError("{0}: error, lastResult={1}, ret={2}".format(inspect.stack()[0][3], self.lastResult, ret))
+            self.setError("checkGprsBearer: error, lastResult={0}, ret={1}".format(self.lastResult, ret))
             return False
 
         ret = str(ret).strip()
-        self.logger.debug("{0}: result = {1}".format(inspect.stack()[0][3], ret))
+        self.logger.debug("checkGprsBearer: result = %s", ret)
 
         response = str(ret).split(":")
 
         if len(response) < 2:
-            self.setError("{0}:error, wrong response length, ret = {1}".format(inspect.stack()[0][3], ret))
+            self.setError("checkGprsBearer:error, wrong response length, ret = {0}".format(ret))
             return False
 
         #parsing string like:
@@ -106,14 +106,14 @@ class SimInetGSM(SimGsm):
         #  +SAPBR: 1,3,"0.0.0.0"         - when disconnected (channel 1)
 
         if response[0] != "+SAPBR":
-            self.setWarn("{0}: warning, response is not '+SAPBR', response = {1}".format(inspect.stack()[0][3], response[0]))
+            self.setWarn("checkGprsBearer: warning, response is not '+SAPBR', response = {0}".format(response[0]))
             return False
 
         response = splitAndFilter(response[1], ",")
-        self.logger.debug("{0}: sapbr result = \"{1}\"".format(inspect.stack()[0][3], response))
+        self.logger.debug("checkGprsBearer: sapbr result = \"%s\"", response)
 
         if len(response) < 3:
-            self.setError("{0}: wrong SAPBR result length, (sapbr result = '{1}')".format(inspect.stack()[0][3], response[1]))
+            self.setError("checkGprsBearer: wrong SAPBR result length, (sapbr result = '{0}')".format(response[1]))
             return False
 
         if response[0] != str(bearerNumber):
@@ -204,7 +204,54 @@ class SimInetGSM(SimGsm):
 
         :return: True if when operation processing was without errors, otherwise returns False
         """
-        return self.execSimpleOkCommand("AT+HTTPTERM", 500)
+        ret = self.execSimpleOkCommand("AT+HTTPTERM", 500)
+
+        #session is terminated (or its state is unknown), so it must be initialized again by next request
+        self.invalidateSettings("+HTTP")
+        return ret
+
+    def __httpInitCommands(self):
+        """
+        Returns commands for HTTP session initialization. Session is reused (with already set parameters) when it
+        was initialized before and module state was not changed after that.
+
+        :return: commands list
+        """
+        if self.isHttpInitialized:
+            return []
+
+        #session can be opened before, we dont care of result
+        self.terminateHttpRequest()
+
+        return [[ "AT+HTTPINIT", 2000 ]]
+
+    def __execHttpCommands(self, commands):
+        """
+        Executes HTTP session initialization (when it's needed) and given commands. When reused session was
+        terminated by module, it's initialized again and commands are executed again.
+
+        :param commands: commands list (command and timeout)
+        :return: True when all commands was executed successfully, otherwise returns False
+        """
+        reused = self.isHttpInitialized
+        if self.execSimpleCommandsList(self.__httpInitCommands() + commands):
+            return True
+
+        self.__httpRequestFailed()
+        if not reused:
+            return False
+
+        self.logger.info("HTTP session was terminated by module, initializing it again")
+        return self.execSimpleCommandsList(self.__httpInitCommands() + commands)
+
+    def __httpRequestFailed(self):
+        """
+        Drops cached HTTP session state after failed request, so next request will initialize session again
+
+        :return: False
+        """
+        self.invalidateSettings("+HTTP")
+        return False
 
     def __parseHttpResult(self, httpResult, bearerChannel = None):
         """
@@ -213,32 +260,32 @@ class SimInetGSM(SimGsm):
         :param bearerChannel: bearer channel
         :return: returns http result code and response length
         """
-        self.logger.debug("{0}: dataLine = {1}".format(inspect.stack()[0][3], httpResult))
+        self.logger.debug("__parseHttpResult: dataLine = %s", httpResult)
 
         response = splitAndFilter(httpResult, ":")
         if len(response) < 2:
-            self.setWarn("{0}: wrong HTTP response length, length = {1}".format(inspect.stack()[0][3], len(response)))
+            self.setWarn("__parseHttpResult: wrong HTTP response length, length = {0}".format(len(response)))
             return None
 
         if response[0] != "+HTTPACTION":
-            self.setWarn("{0}: http response is not a '+HTTPACTION', response = '{1}'".format(inspect.stack()[0][3], response[0]))
+            self.setWarn("__parseHttpResult: http response is not a '+HTTPACTION', response = '{0}'".format(response[0]))
             return None
 
         response = splitAndFilter(response[1], ",")
 
         if len(response) < 3:
-            self.setWarn("{0}: wrong response length".format(inspect.stack()[0][3]))
+            self.setWarn("__parseHttpResult: wrong response length")
             return None
 
         #checking bearer channel if necessary
         if bearerChannel is not None:
             if response[0] != str(bearerChannel):
-                self.setWarn("{0}: bad bearer number".format(inspect.stack()[0][3]))
+                self.setWarn("__parseHttpResult: bad bearer number")
                 return None
 
         httpResultCode = str(response[1])
         if not httpResultCode.isnumeric():
-            self.setWarn("{0}: response code is not numeric!".format(inspect.stack()[0][3]))
+            self.setWarn("__parseHttpResult: response code is not numeric!")
             return None
 
         httpResultCode = int(httpResultCode)
@@ -247,7 +294,7 @@ class SimInetGSM(SimGsm):
 
         responseLength = str(response[2])
         if not responseLength.isnumeric():
-            self.setWarn("{0}: response length is not numeric".format(inspect.stack()[0][3]))
+            self.setWarn("__parseHttpResult: response length is not numeric")
             return False
 
         return [httpResultCode, int(responseLength)]
@@ -260,7 +307,7 @@ class SimInetGSM(SimGsm):
         :param responseLength: response length
         :return: True if reading was successful, otherwise returns false
         """
-        self.logger.debug("asking for http response (length = {0})".format(responseLength))
+        self.logger.debug("asking for http response (length = %s)", responseLength)
 
         #trying to read HTTP response data
         ret = self.commandAndStdResult(
@@ -270,7 +317,7 @@ class SimInetGSM(SimGsm):
         )
 
         if (ret is None) or (self.lastResult != "OK"):
-            self.setError("{0}: error reading http response data".format(inspect.stack()[0][3]))
+            self.setError("__readHttpResponse: error reading http response data")
             return False
 
         #removing leading \n symbols
@@ -291,19 +338,19 @@ class SimInetGSM(SimGsm):
 
         httpReadResultString = str(httpReadResultString).strip()
         if len(httpReadResultString) == 0:
-            self.setError("{0}: wrong http response. Result is empty".format(inspect.stack()[0][3]))
+            self.setError("__readHttpResponse: wrong http response. Result is empty")
             return False
 
         httpReadResult = str(httpReadResultString).strip()
-        self.logger.debug("{0}: httpReadResult = {1}".format(inspect.stack()[0][3], httpReadResult))
+        self.logger.debug("__readHttpResponse: httpReadResult = %s", httpReadResult)
 
         httpReadResult = splitAndFilter(httpReadResult, ":")
         if (len(httpReadResult) < 2) or (httpReadResult[0] != "+HTTPREAD"):
-            self.setError("{0}: bad response (cant find '+HTTPREAD'".format(inspect.stack()[0][3]))
+            self.setError("__readHttpResponse: bad response (cant find '+HTTPREAD'")
             return False
 
         if int(httpReadResult[1]) != responseLength:
-            self.setWarn("{0}: bad response, wrong responseLength = {1}".format(inspect.stack()[0][3], responseLength))
+            self.setWarn("__readHttpResponse: bad response, wrong responseLength = {0}".format(responseLength))
             return False
 
         self.__httpResponse = ret
@@ -351,12 +398,8 @@ class SimInetGSM(SimGsm):
         """
         self.__clearHttpResponse()
 
-        #TODO: close only when opened
-        self.terminateHttpRequest()
-
         #HTTP GET request sequence
         simpleCommands = [
-            [ "AT+HTTPINIT",                                                     2000    ],
             [ "AT+HTTPPARA=\"CID\",\"{0}\"".format(bearerChannel),               1000    ],
             [ "AT+HTTPPARA=\"URL\",\"{0}:{2}{1}\"".format(server, path,port),    500     ],
             [ "AT+HTTPPARA=\"UA\",\"{0}\"".format(self.userAgent),               500     ],
@@ -365,21 +408,24 @@ class SimInetGSM(SimGsm):
             [ "AT+HTTPACTION=0",                                                 10000   ]
         ]
 
+        #late result of previous request must not be taken as result of this request
+        self.discardPendingUrcs("+HTTPACTION")
+
         #executing http get sequence
-        if not self.execSimpleCommandsList(simpleCommands):
+        if not self.__execHttpCommands(simpleCommands):
             self.setError("error executing HTTP GET sequence")
             return False
 
-        #reading HTTP request result
-        dataLine = self.readDataLine(10000)
+        #reading HTTP request result (unsolicited result code)
+        dataLine = self.readUrcLine("+HTTPACTION", 10000)
 
         if dataLine is None:
-            return False
+            return self.__httpRequestFailed()
 
         #parsing string like this "+HTTPACTION:0,200,15"
         httpResult = self.__parseHttpResult(dataLine, 0)
         if httpResult is None:
-            return False
+            return self.__httpRequestFailed()
 
         #assigning HTTP result code
         self.__httpResult = httpResult[0]
@@ -401,7 +447,7 @@ class SimInetGSM(SimGsm):
 
         self.logger.debug("reading http response data")
         if not self.__readHttpResponse(0, responseLength):
-            return False
+            return self.__httpRequestFailed()
 
         return True
 
@@ -423,12 +469,8 @@ class SimInetGSM(SimGsm):
 
         self.__clearHttpResponse()
 
-        #TODO: close only when opened
-        self.terminateHttpRequest()
-
         #HTTP POST request commands sequence
         simpleCommands = [
-            [ "AT+HTTPINIT",                                                    2000 ],
             [ "AT+HTTPPARA=\"CID\",\"{0}\"".format(bearerChannel),              1000 ],
             [ "AT+HTTPPARA=\"URL\",\"{0}:{1}{2}\"".format(server, port, path),  500  ],
             [ "AT+HTTPPARA=\"CONTENT\",\"application/x-www-form-urlencoded\"",  500  ],
@@ -438,7 +480,7 @@ class SimInetGSM(SimGsm):
         ]
 
         #executing commands sequence
-        if not self.execSimpleCommandsList(simpleCommands):
+        if not self.__execHttpCommands(simpleCommands):
             return False
 
 
@@ -451,33 +493,36 @@ class SimInetGSM(SimGsm):
         )
 
         if (ret is None) or (self.lastResult != "DOWNLOAD"):
-            self.setError("{0}: can't upload HTTP POST data".format(inspect.stack()[0][3]))
-            return False
+            self.setError("httpPOST: can't upload HTTP POST data")
+            return self.__httpRequestFailed()
 
         self.simpleWriteLn(parameters)
 
         dataLine = self.readDataLine(500)
         if (dataLine is None) or (dataLine != "OK"):
-            self.setError("{0}: can't upload HTTP POST data".format(inspect.stack()[0][3]))
-            return
+            self.setError("httpPOST: can't upload HTTP POST data")
+            return self.__httpRequestFailed()
 
         self.logger.debug("actually making request")
 
+        #late result of previous request must not be taken as result of this request
+        self.discardPendingUrcs("+HTTPACTION")
+
         #TODO: check CPU utilization
         if not self.execSimpleOkCommand("AT+HTTPACTION=1", 15000):
-            return False
+            return self.__httpRequestFailed()
 
-        #reading HTTP request result
-        dataLine = self.readDataLine(15000)
+        #reading HTTP request result (unsolicited result code)
+        dataLine = self.readUrcLine("+HTTPACTION", 15000)
 
         if dataLine is None:
-            self.setError("{0}: empty HTTP request result string".format(inspect.stack()[0][3]))
-            return False
+            self.setError("httpPOST: empty HTTP request result string")
+            return self.__httpRequestFailed()
 
         #parsing string like this "+HTTPACTION:0,200,15"
         httpResult = self.__parseHttpResult(dataLine, bearerChannel)
         if httpResult is None:
-            return False
+            return self.__httpRequestFailed()
 
         #assigning HTTP result code
         self.__httpResult = httpResult[0]
@@ -503,7 +548,7 @@ class SimInetGSM(SimGsm):
         self.logger.debug("reading http request response data")
 
         if not self.__readHttpResponse(0, responseLength):
-            return False
+            return self.__httpRequestFailed()
 
         return True
 
@@ -0,0 +1,409 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Pool of SIM900 modules which are working in parallel.
+
+Each module is served by own worker thread with own tasks queue. Tasks are assigned to healthy modules with
+smallest expected waiting time (queue depth and recent latency). Modules which can't be initialized or which are
+failing repeatedly are removed from rotation and their queued tasks are passed to other modules.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import time
+import queue
+import threading
+import concurrent.futures
+from lib.sim900.simshared import *
+from lib.sim900.gsm import SimGsmPinRequestState
+
+class SimModemState:
+    STARTING    = 0
+    HEALTHY     = 1
+    UNHEALTHY   = 2
+    STOPPED     = 3
+
+class SimModemPoolTask:
+    __slots__ = ("operation", "args", "kwargs", "future")
+
+    def __init__(self, operation, args, kwargs, future):
+        self.operation  = operation
+        self.args       = args
+        self.kwargs     = kwargs
+        self.future     = future
+
+class SimModemPoolWorker(threading.Thread):
+    #weight of last task execution time in latency estimation
+    LATENCY_ALPHA   = 0.3
+
+    def __init__(self, pool, handler, name):
+        threading.Thread.__init__(self, name = name)
+        self.daemon         = True
+
+        self.handler        = handler
+        self.state          = SimModemState.STARTING
+
+        #estimated task execution time in seconds
+        self.latency        = pool.initialLatency
+
+        self.failures       = 0
+        self.executedCount  = 0
+        self.failedCount    = 0
+
+        self.__pool         = pool
+        self.__queue        = queue.Queue()
+        self.__stopEvent    = threading.Event()
+        self.__busy         = False
+
+    @property
+    def pending(self):
+        """
+        Returns count of queued tasks plus task in progress
+
+        :return: tasks count
+        """
+        return self.__queue.qsize() + (1 if self.__busy else 0)
+
+    def put(self, task):
+        self.__queue.put(task)
+
+    def stop(self):
+        self.__stopEvent.set()
+        self.__queue.put(None)
+
+    def __initialize(self):
+        handler = self.handler
+
+        if not self.__pool.portsOpened:
+            #port is reopened when module is initialized again after failures (device could be reconnected)
+            if handler.portOpened:
+                handler.closePort()
+
+            if not handler.openPort():
+                handler.logger.error("{0}: error opening port: {1}".format(self.name, handler.errorText))
+                return False
+
+        if not handler.begin(self.__pool.beginAttempts):
+            handler.logger.error("{0}: error initializing module: {1}".format(self.name, handler.errorText))
+            return False
+
+        if handler.pinState == SimGsmPinRequestState.SIM_PIN:
+            if (self.__pool.pinCode is None) or (not handler.enterPin(self.__pool.pinCode)):
+                handler.logger.error("{0}: PIN required".format(self.name))
+                return False
+
+        return True
+
+    def takeQueued(self):
+        """
+        Removes all queued tasks
+
+        :return: tasks list
+        """
+        ret = []
+        while True:
+            try:
+                task = self.__queue.get_nowait()
+            except queue.Empty:
+                return ret
+
+            if task is not None:
+                ret.append(task)
+
+    def __execute(self, task):
+        if not task.future.set_running_or_notify_cancel():
+            return
+
+        start = time.time()
+        try:
+            if isinstance(task.operation, str):
+                ret = getattr(self.handler, task.operation)(*task.args, **task.kwargs)
+            else:
+                ret = task.operation(self.handler, *task.args, **task.kwargs)
+        except Exception as e:
+            self.handler.logger.error("{0}: task failed with exception: {1}".format(self.name, e))
+            self.__registerResult(False, start)
+            task.future.set_exception(e)
+            return
+
+        self.__registerResult((ret is not None) and (ret is not False), start)
+        task.future.set_result(ret)
+
+    def __registerResult(self, ok, start):
+        elapsed             = time.time() - start
+        self.latency        = self.LATENCY_ALPHA * elapsed + (1.0 - self.LATENCY_ALPHA) * self.latency
+        self.executedCount += 1
+
+        if ok:
+            self.failures = 0
+            return
+
+        self.failures      += 1
+        self.failedCount   += 1
+
+        if self.failures >= self.__pool.maxFailures:
+            self.handler.logger.error("{0}: {1} failures in a row, removing from rotation".format(self.name, self.failures))
+            self.__pool.onWorkerUnhealthy(self)
+
+    def run(self):
+        while True:
+            if self.state != SimModemState.HEALTHY:
+                if self.__stopEvent.is_set():
+                    break
+
+                if self.state == SimModemState.UNHEALTHY:
+                    #waiting for next attempt of module initialization
+                    if self.__stopEvent.wait(self.__pool.recoveryInterval):
+                        break
+
+                if not self.__initialize():
+                    self.__pool.onWorkerUnhealthy(self)
+                    continue
+
+                self.failures   = 0
+                self.__pool.onWorkerHealthy(self)
+
+            #all tasks which was queued before stopping are executed
+            task = self.__queue.get()
+            if task is None:
+                break
+
+            self.__busy = True
+            try:
+                self.__execute(task)
+            finally:
+                self.__busy = False
+
+        self.state = SimModemState.STOPPED
+
+        #tasks which was not executed
+        for task in self.takeQueued():
+            task.future.cancel()
+
+class SimModemPool(AminisLastErrorHolderWithLogging):
+    def __init__(
+            self,
+            handlers,
+            logger              = None,
+            maxFailures         = 3,
+            recoveryInterval    = 60,
+            beginAttempts       = 5,
+            pinCode             = None,
+            portsOpened         = False
+    ):
+        """
+        Creates modules pool
+
+        :param handlers: handlers of modules (like SimGsmSmsHandler or SimInetGSM), each handler must use own port
+        :param logger: logger
+        :param maxFailures: count of failed tasks in a row after which module is removed from rotation
+        :param recoveryInterval: interval (in seconds) between attempts to initialize module which is out of rotation
+        :param beginAttempts: attempts count for begin() calls
+        :param pinCode: PIN code which will be entered when module requires it
+        :param portsOpened: when True ports of handlers are already opened
+        """
+        AminisLastErrorHolderWithLogging.__init__(self, logger)
+
+        self.maxFailures        = maxFailures
+        self.recoveryInterval   = recoveryInterval
+        self.beginAttempts      = beginAttempts
+        self.pinCode            = pinCode
+        self.portsOpened        = portsOpened
+
+        #latency estimation for modules without executed tasks
+        self.initialLatency     = 1.0
+
+        self.__lock             = threading.Lock()
+        self.__started          = False
+        self.__workers          = [
+            SimModemPoolWorker(self, handler, "modem-{0}".format(i)) for i, handler in enumerate(handlers)
+        ]
+
+        #tasks which was submitted when there was no healthy modules (they are waiting for initialization)
+        self.__waitingTasks     = []
+
+    @property
+    def handlers(self):
+        return [worker.handler for worker in self.__workers]
+
+    @property
+    def healthyCount(self):
+        return len([worker for worker in self.__workers if worker.state == SimModemState.HEALTHY])
+
+    def start(self):
+        """
+        Starts workers. Modules are initialized in background, tasks can be submitted immediately.
+
+        :return: nothing
+        """
+        with self.__lock:
+            if self.__started:
+                return
+
+            self.__started = True
+
+        for worker in self.__workers:
+            worker.start()
+
+    def stop(self, timeout = None):
+        """
+        Stops workers after execution of all already queued tasks and closes ports
+
+        :param timeout: max wait time (in seconds) for each worker
+        :return: nothing
+        """
+        with self.__lock:
+            waitingTasks        = self.__waitingTasks
+            self.__waitingTasks = []
+
+        for task in waitingTasks:
+            task.future.cancel()
+
+        for worker in self.__workers:
+            worker.stop()
+
+        for worker in self.__workers:
+            if worker.is_alive():
+                worker.join(timeout)
+
+            if not self.portsOpened:
+                worker.handler.closePort()
+
+    def __selectWorker(self):
+        """
+        Selects healthy worker with smallest expected waiting time
+
+        :return: worker or None when there are no healthy workers
+        """
+        ret     = None
+        retCost = None
+
+        for worker in self.__workers:
+            if worker.state != SimModemState.HEALTHY:
+                continue
+
+            cost = (worker.pending + 1) * worker.latency
+            if (ret is None) or (cost < retCost):
+                ret     = worker
+                retCost = cost
+
+        return ret
+
+    def __dispatch(self, task):
+        with self.__lock:
+            worker = self.__selectWorker()
+            if worker is None:
+                self.__waitingTasks.append(task)
+                return
+
+            worker.put(task)
+
+    def submit(self, operation, *args, **kwargs):
+        """
+        Submits task for execution by one of modules
+
+        :param operation: name of handler method (like 'sendPduMessage') or function which receives handler as first
+            argument
+        :param args: operation arguments
+        :param kwargs: operation keyword arguments
+        :return: future with operation result or None when pool has no modules which can execute task
+        """
+        with self.__lock:
+            alive = [worker for worker in self.__workers if worker.state != SimModemState.STOPPED]
+
+        if len(alive) == 0:
+            self.setError("there are no modules for task execution")
+            return None
+
+        future = concurrent.futures.Future()
+        self.__dispatch(SimModemPoolTask(operation, args, kwargs, future))
+
+        return future
+
+    def sendSms(self, phoneNumber, messageText, numberOfAttempts = 3):
+        return self.submit("sendSms", phoneNumber, messageText, numberOfAttempts)
+
+    def sendPduMessage(self, pduHelper, numberOfAttempts = 3):
+        return self.submit("sendPduMessage", pduHelper, numberOfAttempts)
+
+    def httpGet(self, server, port = 80, path = "/", bearerChannel = 1):
+        """
+        Makes HTTP GET request by one of modules
+
+        :return: future with tuple (True or False, http result code, http response)
+        """
+        return self.submit(
+            lambda handler: (handler.httpGet(server, port, path, bearerChannel), handler.httpResult, handler.httpResponse)
+        )
+
+    def onWorkerHealthy(self, worker):
+        """
+        Called by worker when module is ready for tasks execution
+
+        :param worker: worker
+        :return: nothing
+        """
+        with self.__lock:
+            worker.state        = SimModemState.HEALTHY
+            waitingTasks        = self.__waitingTasks
+            self.__waitingTasks = []
+
+        for task in waitingTasks:
+            self.__dispatch(task)
+
+    def onWorkerUnhealthy(self, worker):
+        """
+        Called by worker when module is removed from rotation. Queued tasks of worker are passed to other modules.
+
+        :param worker: worker
+        :return: nothing
+        """
+        with self.__lock:
+            worker.state    = SimModemState.UNHEALTHY
+            tasks           = worker.takeQueued()
+
+        for task in tasks:
+            self.__dispatch(task)
+
+    def modemsState(self):
+        """
+        Returns state of each module
+
+        :return: list of dictionaries
+        """
+        return [
+            {
+                "name":             worker.name,
+                "state":            worker.state,
+                "pending":          worker.pending,
+                "latency":          worker.latency,
+                "failures":         worker.failures,
+                "executedCount":    worker.executedCount,
+                "failedCount":      worker.failedCount
+            }
+            for worker in self.__workers
+        ]
\ No newline at end of file
@@ -0,0 +1,210 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+This file is part of sim-module package. Background serial port reader and ring buffer for received data.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import threading
+
+class SimSerialRingBuffer:
+    def __init__(self, capacity = 65536):
+        self.__data         = bytearray(capacity)
+        self.__capacity     = capacity
+        self.__head         = 0
+        self.__size         = 0
+
+        #count of bytes which was dropped because buffer was full
+        self.__overflow     = 0
+
+        self.__condition    = threading.Condition()
+
+    @property
+    def capacity(self):
+        return self.__capacity
+
+    @property
+    def size(self):
+        """
+        Returns count of bytes which are waiting for reading
+
+        :return: bytes count
+        """
+        with self.__condition:
+            return self.__size
+
+    @property
+    def overflowCount(self):
+        """
+        Returns count of bytes which was dropped because buffer was full
+
+        :return: dropped bytes count
+        """
+        return self.__overflow
+
+    def write(self, data):
+        """
+        Appends data to the buffer. When buffer is full the oldest bytes will be dropped.
+
+        :param data: data for appending
+        :return: nothing
+        """
+        dataLength = len(data)
+        if dataLength == 0:
+            return
+
+        with self.__condition:
+            #only tail of the data can be stored when data is bigger than buffer
+            if dataLength > self.__capacity:
+                self.__overflow += dataLength - self.__capacity
+                data             = data[-self.__capacity:]
+                dataLength       = self.__capacity
+
+            #dropping oldest bytes when we have no free space
+            freeSpace = self.__capacity - self.__size
+            if dataLength > freeSpace:
+                dropped          = dataLength - freeSpace
+                self.__overflow += dropped
+                self.__head      = (self.__head + dropped) % self.__capacity
+                self.__size     -= dropped
+
+            tail      = (self.__head + self.__size) % self.__capacity
+            firstPart = min(dataLength, self.__capacity - tail)
+
+            self.__data[tail : tail + firstPart] = data[:firstPart]
+            if firstPart < dataLength:
+                self.__data[:dataLength - firstPart] = data[firstPart:]
+
+            self.__size += dataLength
+            self.__condition.notify_all()
+
+    def read(self, maxCount):
+        """
+        Reads up to maxCount bytes from buffer. Does not wait for data.
+
+        :param maxCount: max bytes count for reading
+        :return: bytes read from buffer (can be empty)
+        """
+        with self.__condition:
+            count = min(maxCount, self.__size)
+            if count == 0:
+                return bytes()
+
+            firstPart = min(count, self.__capacity - self.__head)
+            ret       = bytes(self.__data[self.__head : self.__head + firstPart])
+            if firstPart < count:
+                ret += bytes(self.__data[:count - firstPart])
+
+            self.__head  = (self.__head + count) % self.__capacity
+            self.__size -= count
+
+            return ret
+
+    def waitForData(self, timeout):
+        """
+        Waits till buffer will have some data
+
+        :param timeout: max wait time in seconds
+        :return: True when buffer has data, otherwise returns False
+        """
+        with self.__condition:
+            if self.__size > 0:
+                return True
+
+            if timeout <= 0:
+                return False
+
+            self.__condition.wait(timeout)
+            return self.__size > 0
+
+    def clear(self):
+        """
+        Removes all data from buffer
+
+        :return: nothing
+        """
+        with self.__condition:
+            self.__head = 0
+            self.__size = 0
+
+class SimSerialReaderThread(threading.Thread):
+    def __init__(self, serial, ringBuffer, logger, pollInterval = 0.1):
+        threading.Thread.__init__(self, name = "sim-serial-reader")
+        self.daemon         = True
+
+        self.__serial       = serial
+        self.__buffer       = ringBuffer
+        self.__logger       = logger
+        self.__pollInterval = pollInterval
+        self.__stopEvent    = threading.Event()
+
+        #last reading error (if reader stopped because of error)
+        self.lastError      = None
+
+    def __waitingBytesCount(self):
+        try:
+            return self.__serial.in_waiting
+        except AttributeError:
+            #old versions of pyserial
+            return self.__serial.inWaiting()
+
+    def run(self):
+        #reader owns port now, so reading can be blocking (with timeout, to allow thread stopping)
+        oldTimeout = self.__serial.timeout
+        self.__serial.timeout = self.__pollInterval
+
+        try:
+            while not self.__stopEvent.is_set():
+                data = self.__serial.read(1)
+                if (data is None) or (len(data) == 0):
+                    continue
+
+                count = self.__waitingBytesCount()
+                if count > 0:
+                    data += self.__serial.read(count)
+
+                self.__buffer.write(data)
+        except Exception as e:
+            if not self.__stopEvent.is_set():
+                self.lastError = e
+                self.__logger.error("serial reader stopped: {0}".format(e))
+        finally:
+            try:
+                self.__serial.timeout = oldTimeout
+            except Exception:
+                pass
+
+    def stop(self, timeout = 1.0):
+        """
+        Stops reading thread
+
+        :param timeout: max wait time (in seconds) for thread finishing
+        :return: nothing
+        """
+        self.__stopEvent.set()
+        if self.is_alive() and (threading.current_thread() is not self):
+            self.join(timeout)
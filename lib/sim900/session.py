@@ -0,0 +1,155 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Single session with SIM900 module shared by all handlers.
+
+Session owns port and received data buffer. SMS, HTTP, USSD and IMEI functions are available as facets, all calls
+of facets methods are serialized by one lock, so session can be used by several threads.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import inspect
+import threading
+from lib.sim900.gsm import SimGsm
+from lib.sim900.imei import SimImeiRetriever
+from lib.sim900.inetgsm import SimInetGSM
+from lib.sim900.smshandler import SimGsmSmsHandler
+from lib.sim900.ussdhandler import SimUssdHandler
+
+class SimGsmSessionHandler(SimGsmSmsHandler, SimInetGSM, SimUssdHandler, SimImeiRetriever):
+    def __init__(self, port, logger = None, **kwargs):
+        #handlers are initializing bases cooperatively, so common handler state (port buffers) is initialized once
+        super().__init__(port, logger, **kwargs)
+
+class SimGsmSessionFacet:
+    def __init__(self, handler, lock, capability):
+        """
+        Creates facet of session
+
+        :param handler: session handler
+        :param lock: session lock
+        :param capability: handler class which methods are available through this facet
+        """
+        self.__handler      = handler
+        self.__lock         = lock
+        self.__capability   = capability
+
+    def __getattr__(self, name):
+        #methods and properties of capability class and data attributes of handler (like errorText) are available
+        available = hasattr(self.__capability, name) or (name in vars(self.__handler))
+        if name.startswith("_") or (not available):
+            raise AttributeError("'{0}' has no attribute '{1}'".format(self.__capability.__name__, name))
+
+        value = getattr(self.__handler, name)
+        if not callable(value):
+            return value
+
+        lock = self.__lock
+
+        def lockedCall(*args, **kwargs):
+            with lock:
+                ret = value(*args, **kwargs)
+
+                #generators (like drainInbox()) are working with module during iteration, so they are iterated
+                #completely before lock releasing. Use handler within 'with session:' block for lazy iteration.
+                if inspect.isgenerator(ret):
+                    ret = list(ret)
+
+            return ret
+
+        return lockedCall
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+
+        with self.__lock:
+            setattr(self.__handler, name, value)
+
+class SimGsmSession:
+    def __init__(self, port, logger = None, **kwargs):
+        """
+        Creates session with SIM900 module
+
+        :param port: serial port
+        :param logger: logger
+        :param kwargs: additional parameters of port handler (like useReaderThread)
+        """
+        self.__handler  = SimGsmSessionHandler(port, logger, **kwargs)
+        self.__lock     = threading.RLock()
+
+        self.gsm        = SimGsmSessionFacet(self.__handler, self.__lock, SimGsm)
+        self.sms        = SimGsmSessionFacet(self.__handler, self.__lock, SimGsmSmsHandler)
+        self.inet       = SimGsmSessionFacet(self.__handler, self.__lock, SimInetGSM)
+        self.ussd       = SimGsmSessionFacet(self.__handler, self.__lock, SimUssdHandler)
+        self.imei       = SimGsmSessionFacet(self.__handler, self.__lock, SimImeiRetriever)
+
+    @property
+    def handler(self):
+        """
+        Returns handler which implements all functions. Handler methods are not serialized, session lock must be
+        acquired before using it.
+
+        :return: handler
+        """
+        return self.__handler
+
+    @property
+    def lock(self):
+        return self.__lock
+
+    @property
+    def errorText(self):
+        return self.__handler.errorText
+
+    def __enter__(self):
+        """
+        Acquires session lock, so several operations can be executed without interruption by other threads, like:
+
+            with session:
+                if session.inet.httpGet(server):
+                    response = session.inet.httpResponse
+
+        :return: session
+        """
+        self.__lock.acquire()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.__lock.release()
+        return False
+
+    def openPort(self):
+        return self.gsm.openPort()
+
+    def closePort(self):
+        return self.gsm.closePort()
+
+    def begin(self, numberOfAttempts = 5, upgradeBaudRate = False, maxBaudRate = 115200):
+        return self.gsm.begin(numberOfAttempts, upgradeBaudRate, maxBaudRate)
\ No newline at end of file
@@ -0,0 +1,256 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+This file is part of sim-module package. Latency and outcome metrics of AT commands.
+
+Registry can be attached to any handler (metrics attribute) and it will be updated on each executed command. One
+registry can be shared between several handlers.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import threading
+from lib.sim900.atparser import SimGsmCommandLine
+
+class SimGsmMetricsOutcome:
+    OK      = "OK"
+    ERROR   = "ERROR"
+    TIMEOUT = "timeout"
+
+class SimGsmCommandMetrics:
+    __slots__ = ("count", "outcomes", "bytesSent", "bytesReceived", "buckets", "totalTime", "maxTime")
+
+    def __init__(self, bucketsCount):
+        self.count          = 0
+
+        #outcome -> count
+        self.outcomes       = {}
+        self.bytesSent      = 0
+        self.bytesReceived  = 0
+
+        #not cumulative counters of latency histogram, last counter is for values above last bound
+        self.buckets        = [0] * (bucketsCount + 1)
+
+        #execution time in milliseconds
+        self.totalTime      = 0.0
+        self.maxTime        = 0.0
+
+class SimGsmMetricsRegistry:
+    #upper bounds of latency histogram buckets (milliseconds)
+    DEFAULT_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 60000)
+
+    #name for sent data which is not an AT command (PDU, HTTP data and etc)
+    DATA_COMMAND    = "<DATA>"
+
+    #name for command lines which can't be parsed, so labels values never depend on commands parameters
+    OTHER_COMMAND   = "OTHER"
+
+    def __init__(self, buckets = None, prefix = "sim_at_command"):
+        self.__buckets  = tuple(sorted(buckets if buckets is not None else self.DEFAULT_BUCKETS))
+        self.__prefix   = prefix
+        self.__commands = {}
+        self.__lock     = threading.Lock()
+
+    @property
+    def buckets(self):
+        return self.__buckets
+
+    @staticmethod
+    def normalizeCommand(commandText):
+        """
+        Returns command name without parameters, for example 'AT+CMGS' for 'AT+CMGS=23'. For pipelined command lines
+        names of all basic and extended commands are joined with ';' (like 'ATV;+CMEE' for 'ATV1+CMEE=0'). Command
+        lines which can't be parsed are registered as 'OTHER'.
+
+        :param commandText: command line
+        :return: normalized command name
+        """
+        text = str(commandText).strip()
+        if text[:2].upper() != "AT":
+            return SimGsmMetricsRegistry.DATA_COMMAND
+
+        commands = SimGsmCommandLine.split(text[2:])
+        names    = [SimGsmCommandLine.commandName(command) for command in commands] if commands is not None else [None]
+        if None in names:
+            return SimGsmMetricsRegistry.OTHER_COMMAND
+
+        return "AT" + ";".join(names)
+
+    @staticmethod
+    def outcomeOf(result):
+        """
+        Converts final result code to the outcome
+
+        :param result: final result code, None when command timed out
+        :return: outcome (one of SimGsmMetricsOutcome values or result code itself for other results, like '>')
+        """
+        if result is None:
+            return SimGsmMetricsOutcome.TIMEOUT
+
+        if (result == "ERROR") or result.startswith("+CME ERROR") or result.startswith("+CMS ERROR"):
+            return SimGsmMetricsOutcome.ERROR
+
+        return result
+
+    def observe(self, commandText, result, elapsed, bytesSent = 0, bytesReceived = 0):
+        """
+        Registers executed command
+
+        :param commandText: command line
+        :param result: final result code, None on timeout
+        :param elapsed: execution time in milliseconds
+        :param bytesSent: count of sent bytes
+        :param bytesReceived: count of received bytes
+        :return: nothing
+        """
+        name    = self.normalizeCommand(commandText)
+        outcome = self.outcomeOf(result)
+
+        bucket  = len(self.__buckets)
+        for i, bound in enumerate(self.__buckets):
+            if elapsed <= bound:
+                bucket = i
+                break
+
+        with self.__lock:
+            metrics = self.__commands.get(name)
+            if metrics is None:
+                metrics = SimGsmCommandMetrics(len(self.__buckets))
+                self.__commands[name] = metrics
+
+            metrics.count           += 1
+            metrics.outcomes[outcome] = metrics.outcomes.get(outcome, 0) + 1
+            metrics.bytesSent       += bytesSent
+            metrics.bytesReceived   += bytesReceived
+            metrics.buckets[bucket] += 1
+            metrics.totalTime       += elapsed
+            metrics.maxTime          = max(metrics.maxTime, elapsed)
+
+    def reset(self):
+        """
+        Removes all collected values
+
+        :return: nothing
+        """
+        with self.__lock:
+            self.__commands = {}
+
+    def toDict(self):
+        """
+        Returns copy of collected values as dictionary (command name -> values)
+
+        :return: dictionary with metrics
+        """
+        ret = {}
+        with self.__lock:
+            for name, metrics in self.__commands.items():
+                cumulative = 0
+                histogram  = []
+                for i, count in enumerate(metrics.buckets):
+                    cumulative += count
+                    histogram.append((self.__buckets[i] if i < len(self.__buckets) else float("inf"), cumulative))
+
+                ret[name] = {
+                    "count":            metrics.count,
+                    "outcomes":         dict(metrics.outcomes),
+                    "bytesSent":        metrics.bytesSent,
+                    "bytesReceived":    metrics.bytesReceived,
+                    "totalTime":        metrics.totalTime,
+                    "maxTime":          metrics.maxTime,
+                    "avgTime":          metrics.totalTime / metrics.count if metrics.count > 0 else 0.0,
+                    "histogram":        histogram
+                }
+
+        return ret
+
+    @staticmethod
+    def __escapeLabel(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    @staticmethod
+    def __formatLabels(labels):
+        return ",".join(
+            ["{0}=\"{1}\"".format(k, SimGsmMetricsRegistry.__escapeLabel(v)) for k, v in labels]
+        )
+
+    def toPrometheus(self, labels = None):
+        """
+        Returns collected values in Prometheus text exposition format. Latencies are exported in seconds.
+
+        :param labels: additional labels which will be added to all values (like {"modem": "/dev/ttyAMA0"})
+        :return: metrics text
+        """
+        extra   = sorted(labels.items()) if labels is not None else []
+        prefix  = self.__prefix
+        values  = self.toDict()
+        names   = sorted(values.keys())
+
+        ret = [
+            "# HELP {0}s_total Count of executed AT commands by final result.".format(prefix),
+            "# TYPE {0}s_total counter".format(prefix)
+        ]
+        for name in names:
+            for outcome in sorted(values[name]["outcomes"].keys()):
+                ret.append("{0}s_total{{{1}}} {2}".format(
+                    prefix,
+                    self.__formatLabels(extra + [("command", name), ("result", outcome)]),
+                    values[name]["outcomes"][outcome]
+                ))
+
+        for key, metricName, helpText in (
+                ("bytesSent", "sent_bytes_total", "Count of bytes sent to the module."),
+                ("bytesReceived", "received_bytes_total", "Count of bytes received from the module.")
+        ):
+            ret.append("# HELP {0}_{1} {2}".format(prefix, metricName, helpText))
+            ret.append("# TYPE {0}_{1} counter".format(prefix, metricName))
+            for name in names:
+                ret.append("{0}_{1}{{{2}}} {3}".format(
+                    prefix,
+                    metricName,
+                    self.__formatLabels(extra + [("command", name)]),
+                    values[name][key]
+                ))
+
+        ret.append("# HELP {0}_duration_seconds AT command execution time.".format(prefix))
+        ret.append("# TYPE {0}_duration_seconds histogram".format(prefix))
+        for name in names:
+            for bound, count in values[name]["histogram"]:
+                le = "+Inf" if bound == float("inf") else repr(bound / 1000.0)
+                ret.append("{0}_duration_seconds_bucket{{{1}}} {2}".format(
+                    prefix,
+                    self.__formatLabels(extra + [("command", name), ("le", le)]),
+                    count
+                ))
+
+            commandLabels = self.__formatLabels(extra + [("command", name)])
+            ret.append("{0}_duration_seconds_sum{{{1}}} {2}".format(
+                prefix,
+                commandLabels,
+                repr(values[name]["totalTime"] / 1000.0)
+            ))
+            ret.append("{0}_duration_seconds_count{{{1}}} {2}".format(prefix, commandLabels, values[name]["count"]))
+
+        return "\n".join(ret) + "\n"
\ No newline at end of file
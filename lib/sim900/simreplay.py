@@ -0,0 +1,326 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Recording and replaying of serial port sessions.
+
+SimRecordingTransport wraps serial port and writes all data which was read or written to binary trace file.
+SimReplayTransport can be used instead of serial port: it returns recorded module responses with original timing
+(relative to sent commands) or as fast as possible.
+
+Trace file format: 8 bytes signature, then records. Each record is header (record type - 1 byte, time from
+session start in microseconds - 8 bytes, data length - 4 bytes, little endian) followed by data.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import time
+import struct
+import threading
+from lib.sim900.simshared import *
+
+class SimTraceRecordType:
+    OPEN        = ord("O")
+    CLOSE       = ord("C")
+    READ        = ord("R")
+    WRITE       = ord("W")
+
+    #port baud rate was changed, data is new rate (4 bytes, little endian)
+    BAUD_RATE   = ord("B")
+
+class SimTraceFile:
+    SIGNATURE   = b"SIMTRC1\n"
+    HEADER      = struct.Struct("<BQI")
+
+    @staticmethod
+    def read(fileName):
+        """
+        Reads all records of trace file
+
+        :param fileName: trace file name
+        :return: list of tuples (record type, time in seconds from session start, data)
+        """
+        with open(fileName, "rb") as f:
+            content = f.read()
+
+        if not content.startswith(SimTraceFile.SIGNATURE):
+            raise ValueError("'{0}' is not a trace file".format(fileName))
+
+        ret     = []
+        offset  = len(SimTraceFile.SIGNATURE)
+        header  = SimTraceFile.HEADER
+
+        while offset + header.size <= len(content):
+            recordType, timestamp, length = header.unpack_from(content, offset)
+            offset += header.size
+
+            #last record can be incomplete when recording was interrupted
+            if offset + length > len(content):
+                break
+
+            ret.append((recordType, timestamp / 1000000.0, content[offset : offset + length]))
+            offset += length
+
+        return ret
+
+class SimRecordingTransport:
+    def __init__(self, serial, fileName):
+        """
+        Creates recording wrapper of serial port
+
+        :param serial: serial port object
+        :param fileName: trace file name
+        """
+        self.__dict__["_SimRecordingTransport__serial"] = serial
+        self.__file     = open(fileName, "wb")
+        self.__lock     = threading.Lock()
+        self.__start    = time.monotonic()
+
+        self.__file.write(SimTraceFile.SIGNATURE)
+
+    def __record(self, recordType, data = b""):
+        timestamp = int((time.monotonic() - self.__start) * 1000000)
+
+        with self.__lock:
+            if self.__file is None:
+                return
+
+            self.__file.write(SimTraceFile.HEADER.pack(recordType, timestamp, len(data)))
+            self.__file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.__serial, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_SimRecordingTransport__"):
+            self.__dict__[name] = value
+            return
+
+        setattr(self.__serial, name, value)
+        if name == "baudrate":
+            self.__record(SimTraceRecordType.BAUD_RATE, struct.pack("<I", int(value)))
+
+    def open(self):
+        self.__serial.open()
+        self.__record(SimTraceRecordType.OPEN)
+
+    def close(self):
+        self.__serial.close()
+        self.__record(SimTraceRecordType.CLOSE)
+
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+
+    def read(self, size = 1):
+        data = self.__serial.read(size)
+        if len(data) > 0:
+            self.__record(SimTraceRecordType.READ, bytes(data))
+
+        return data
+
+    def write(self, data):
+        ret = self.__serial.write(data)
+
+        #only really sent data is recorded
+        sent = len(data) if ret is None else ret
+        if sent > 0:
+            self.__record(SimTraceRecordType.WRITE, bytes(data[:sent]))
+
+        return ret
+
+    def closeTrace(self):
+        """
+        Finishes recording (port is not closed)
+
+        :return: nothing
+        """
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+class SimReplayTransport(AminisLastErrorHolderWithLogging):
+    def __init__(self, fileName, realTime = True, logger = None):
+        """
+        Creates port which returns recorded module responses. Each response is returned when all data which was
+        written before it in recorded session is written again.
+
+        :param fileName: trace file name
+        :param realTime: when True responses are delayed like in recorded session (relative to the written
+            commands), otherwise they are returned immediately
+        :param logger: logger
+        """
+        AminisLastErrorHolderWithLogging.__init__(self, logger)
+
+        self.realTime       = realTime
+        self.timeout        = 0
+        self.baudrate       = 115200
+        self.is_open        = False
+
+        #count of written bytes which are differ from recorded ones
+        self.mismatchCount  = 0
+
+        #responses: (written bytes count before response, delay after that write in seconds, data)
+        self.__responses    = []
+        self.__expected     = bytearray()
+
+        writtenCount        = 0
+        lastWriteTime       = 0.0
+        for recordType, timestamp, data in SimTraceFile.read(fileName):
+            if recordType == SimTraceRecordType.WRITE:
+                writtenCount   += len(data)
+                lastWriteTime   = timestamp
+                self.__expected += data
+            elif recordType == SimTraceRecordType.READ:
+                self.__responses.append((writtenCount, timestamp - lastWriteTime, data))
+
+        self.__next         = 0
+        self.__written      = 0
+
+        #time when count of written bytes reached given value (written bytes count -> time)
+        self.__writeTimes   = {0: time.monotonic()}
+
+        self.__input        = bytearray()
+        self.__condition    = threading.Condition()
+
+    @property
+    def finished(self):
+        """
+        Returns True when all recorded responses was returned
+
+        :return: True when replay is finished
+        """
+        with self.__condition:
+            return (self.__next >= len(self.__responses)) and (len(self.__input) == 0)
+
+    def open(self):
+        self.is_open = True
+        self.__writeTimes[0] = time.monotonic()
+
+    def close(self):
+        self.is_open = False
+
+    def flush(self):
+        pass
+
+    def flushInput(self):
+        with self.__condition:
+            self.__release()
+            self.__input = bytearray()
+
+    def reset_input_buffer(self):
+        self.flushInput()
+
+    def __nextReleaseTime(self):
+        """
+        Returns time when next response will be available
+
+        :return: time (monotonic) or None when next response waits for written data
+        """
+        if self.__next >= len(self.__responses):
+            return None
+
+        writtenCount, delay, data = self.__responses[self.__next]
+        writeTime = self.__writeTimes.get(writtenCount)
+        if writeTime is None:
+            return None
+
+        return writeTime + delay if self.realTime else writeTime
+
+    def __release(self):
+        now = time.monotonic()
+        while True:
+            releaseTime = self.__nextReleaseTime()
+            if (releaseTime is None) or (releaseTime > now):
+                return
+
+            self.__input += self.__responses[self.__next][2]
+            self.__next  += 1
+
+    @property
+    def in_waiting(self):
+        with self.__condition:
+            self.__release()
+            return len(self.__input)
+
+    def inWaiting(self):
+        return self.in_waiting
+
+    def write(self, data):
+        data = bytes(data)
+
+        with self.__condition:
+            expected = bytes(self.__expected[self.__written : self.__written + len(data)])
+            if expected != data:
+                if self.mismatchCount == 0:
+                    self.setWarn("written data differs from recorded session: {0} instead of {1}".format(data, expected))
+
+                self.mismatchCount += 1
+
+            #responses are bound to written bytes count, so times of all reached counts are stored
+            now = time.monotonic()
+            for i in range(self.__next, len(self.__responses)):
+                writtenCount = self.__responses[i][0]
+                if writtenCount > self.__written + len(data):
+                    break
+
+                if writtenCount not in self.__writeTimes:
+                    self.__writeTimes[writtenCount] = now
+
+            self.__written += len(data)
+            self.__condition.notify_all()
+
+        return len(data)
+
+    def read(self, size = 1):
+        """
+        Reads recorded responses like pyserial port: when timeout is None waits till size bytes will be received, when
+        it's 0 returns available bytes immediately, otherwise waits till size bytes will be received or timeout is over
+
+        :param size: max bytes count for reading
+        :return: read bytes
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+        with self.__condition:
+            while True:
+                self.__release()
+                if len(self.__input) >= size:
+                    break
+
+                now = time.monotonic()
+                if (deadline is not None) and (now >= deadline):
+                    break
+
+                #waiting till next response or timeout, without them - till next written data
+                waitTimes = [t - now for t in (deadline, self.__nextReleaseTime()) if t is not None]
+                self.__condition.wait(max(min(waitTimes), 0.0) if len(waitTimes) > 0 else None)
+
+            ret = bytes(self.__input[:size])
+            del self.__input[:size]
+
+        return ret
\ No newline at end of file
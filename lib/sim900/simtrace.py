@@ -0,0 +1,110 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+"""
+This file is part of sim-module package. Tracing events of communication with SIM900 modules.
+
+Handlers produce events only when trace sink is attached (traceSink attribute), sink is any function with one
+argument - event object.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import time
+import logging
+
+class SimTraceEvent:
+    __slots__ = ("timestamp", )
+
+    def __init__(self):
+        self.timestamp = time.time()
+
+class SimTraceCommandSent(SimTraceEvent):
+    __slots__ = ("data", )
+
+    def __init__(self, data):
+        SimTraceEvent.__init__(self)
+        self.data = data
+
+    def __str__(self):
+        return "sent: {0}".format(bytes(self.data))
+
+class SimTraceBytesReceived(SimTraceEvent):
+    __slots__ = ("data", )
+
+    def __init__(self, data):
+        SimTraceEvent.__init__(self)
+        self.data = data
+
+    def __str__(self):
+        return "received: {0}".format(bytes(self.data))
+
+class SimTraceResultMatched(SimTraceEvent):
+    __slots__ = ("command", "result", "linesCount", "elapsed")
+
+    def __init__(self, command, result, linesCount, elapsed):
+        SimTraceEvent.__init__(self)
+        self.command    = command
+        self.result     = result
+        self.linesCount = linesCount
+
+        #command execution time in milliseconds
+        self.elapsed    = elapsed
+
+    def __str__(self):
+        return "command '{0}' finished with '{1}' ({2} lines, {3:.1f} ms)".format(
+            self.command,
+            self.result,
+            self.linesCount,
+            self.elapsed
+        )
+
+class SimTraceTimeout(SimTraceEvent):
+    __slots__ = ("command", "maxWaitTime", "receivedBytes")
+
+    def __init__(self, command, maxWaitTime, receivedBytes):
+        SimTraceEvent.__init__(self)
+        self.command        = command
+        self.maxWaitTime    = maxWaitTime
+        self.receivedBytes  = receivedBytes
+
+    def __str__(self):
+        return "command '{0}' timed out after {1} ms ({2} bytes received)".format(
+            self.command,
+            self.maxWaitTime,
+            self.receivedBytes
+        )
+
+class SimLoggingTraceSink:
+    def __init__(self, logger = None, level = logging.DEBUG):
+        self.logger = logger
+        if self.logger is None:
+            self.logger = logging.getLogger(__name__)
+
+        self.level  = level
+
+    def __call__(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s", event)
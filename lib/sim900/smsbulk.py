@@ -0,0 +1,297 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Bulk compiling of SMS messages in PDU format.
+
+Messages are compiled in chunks, large batches are compiled in process pool. Count of chunks which are compiled
+(or waiting for result consuming) at the same time is limited, so memory usage doesn't depend on batch size.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import os
+import random
+import itertools
+import collections
+import concurrent.futures
+from lib.sim900.simshared import *
+from lib.sim900.smshandler import SimSmsPduCompiler
+
+class SimSmsPduBulkWorker:
+    #options which are compiler attributes
+    ATTRIBUTE_OPTIONS           = ("flashMessage", "nationalLanguages", "allowTransliteration")
+
+    #options which are set with compiler methods
+    VALIDATION_PERIOD_OPTIONS   = {
+        "validationPeriodInMinutes" : "setValidationPeriodInMinutes",
+        "validationPeriodInHours"   : "setValidationPeriodInHours",
+        "validationPeriodInDays"    : "setValidationPeriodInDays",
+        "validationPeriodInWeeks"   : "setValidationPeriodInWeeks"
+    }
+
+    #max count of compilers with different options
+    MAX_COMPILERS               = 64
+
+    #max count of cached message templates
+    MAX_TEMPLATES               = 256
+
+    def __init__(self, smsCenterNumber = ""):
+        self.smsCenterNumber    = smsCenterNumber
+
+        #options key -> configured compiler
+        self.__compilers        = {}
+
+        #(options key, text) -> compiled template (broadcast text is encoded only once)
+        self.__templates        = {}
+
+        #encoded addresses are shared between all compilers
+        self.__addressCache     = {}
+
+        #count of messages which were not compiled and last error
+        self.failedCount        = 0
+        self.errorText          = ""
+
+    @staticmethod
+    def __optionsKey(options):
+        if not options:
+            return ()
+
+        return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in options.items()))
+
+    def __createCompiler(self, options):
+        compiler = SimSmsPduCompiler(self.smsCenterNumber)
+        compiler.addressCache = self.__addressCache
+
+        for name, value in (options or {}).items():
+            if name in self.ATTRIBUTE_OPTIONS:
+                setattr(compiler, name, value)
+            elif name in self.VALIDATION_PERIOD_OPTIONS:
+                if not getattr(compiler, self.VALIDATION_PERIOD_OPTIONS[name])(value):
+                    raise ValueError("invalid value of option '{0}': {1}".format(name, value))
+            else:
+                raise ValueError("unknown option '{0}'".format(name))
+
+        return compiler
+
+    def __compiler(self, key, options):
+        compiler = self.__compilers.get(key)
+        if compiler is not None:
+            return compiler
+
+        compiler = self.__createCompiler(options)
+        if len(self.__compilers) >= self.MAX_COMPILERS:
+            self.__compilers.clear()
+
+        self.__compilers[key] = compiler
+        return compiler
+
+    def __template(self, text, options):
+        optionsKey = self.__optionsKey(options)
+        key        = (optionsKey, text)
+        template   = self.__templates.get(key)
+        if template is not None:
+            return template
+
+        compiler         = self.__compiler(optionsKey, options)
+        compiler.smsText = text
+        template         = compiler.compileTemplate()
+
+        if len(self.__templates) >= self.MAX_TEMPLATES:
+            self.__templates.clear()
+
+        self.__templates[key] = template
+        return template
+
+    def compileMessage(self, message):
+        """
+        Compiles one message
+
+        :param message: tuple (recipient, text) or (recipient, text, options)
+        :return: list of (sca, tpdu) tuples or None when message can't be compiled
+        """
+        try:
+            recipient, text = message[0], message[1]
+            options         = message[2] if len(message) > 2 else None
+
+            template = self.__template(text, options)
+
+            #each multipart message gets own message id
+            messageId = None
+            if template.partsCount > 1:
+                messageId = random.randint(0, 65535)
+
+            return template.compile(recipient, messageId)
+        except Exception as e:
+            self.failedCount += 1
+            self.errorText    = "error compiling message for '{0}': {1}".format(message[0] if message else "", e)
+
+            return None
+
+    def compileChunk(self, messages):
+        """
+        Compiles list of messages
+
+        :param messages: messages list
+        :return: tuple (list of compiled messages, count of failed messages, last error)
+        """
+        failedCount      = self.failedCount
+        ret              = [self.compileMessage(m) for m in messages]
+
+        return ret, self.failedCount - failedCount, self.errorText
+
+#worker of current process (for process pool)
+_processWorker = None
+
+def _initProcessWorker(smsCenterNumber):
+    global _processWorker
+
+    #forked processes are inheriting random generator state, so message ids must be generated with own seed
+    random.seed()
+    _processWorker = SimSmsPduBulkWorker(smsCenterNumber)
+
+def _compileChunkInProcess(messages):
+    return _processWorker.compileChunk(messages)
+
+class SimSmsPduBulkCompiler(AminisLastErrorHolder):
+    def __init__(self, smsCenterNumber = "", processes = None, chunkSize = 1000, maxPendingChunks = None, parallelThreshold = 20000):
+        """
+        Bulk compiler of PDU messages
+
+        :param smsCenterNumber: SMS center number
+        :param processes: count of worker processes (None - count of CPUs)
+        :param chunkSize: count of messages which are compiled by worker at once
+        :param maxPendingChunks: max count of chunks which are compiled or waiting for consuming (None - two chunks
+            per worker process)
+        :param parallelThreshold: batches which are smaller than this value are compiled in current process
+        """
+        AminisLastErrorHolder.__init__(self)
+
+        self.smsCenterNumber    = smsCenterNumber
+        self.processes          = processes
+        self.chunkSize          = chunkSize
+        self.maxPendingChunks   = maxPendingChunks
+        self.parallelThreshold  = parallelThreshold
+
+        #count of messages which were not compiled during last compile() call
+        self.failedCount        = 0
+
+    def __chunks(self, messages):
+        while True:
+            chunk = list(itertools.islice(messages, self.chunkSize))
+            if len(chunk) == 0:
+                return
+
+            yield chunk
+
+    def __processChunkResult(self, result):
+        compiled, failedCount, errorText = result
+        if failedCount > 0:
+            self.failedCount += failedCount
+            self.setError(errorText)
+
+        return compiled
+
+    def compile(self, messages):
+        """
+        Generator which compiles messages lazily, results are returned in the same order as messages.
+
+        :param messages: iterable of (recipient, text) or (recipient, text, options) tuples, options is a dict with
+            compiler settings: flashMessage, nationalLanguages, allowTransliteration, validationPeriodInMinutes,
+            validationPeriodInHours, validationPeriodInDays or validationPeriodInWeeks
+        :return: list of (sca, tpdu) tuples for each message (None when message can't be compiled)
+        """
+        self.clearError()
+        self.failedCount = 0
+
+        messages = iter(messages)
+        head     = list(itertools.islice(messages, self.parallelThreshold))
+
+        #small batch is compiled in current process
+        if len(head) < self.parallelThreshold:
+            yield from self.__compileLocally(head)
+            return
+
+        messages = itertools.chain(head, messages)
+        del head
+
+        yield from self.__compileInPool(messages)
+
+    def __compileLocally(self, messages):
+        """
+        Generator which compiles messages in current process
+
+        :param messages: messages list
+        :return: compiled messages
+        """
+        worker = SimSmsPduBulkWorker(self.smsCenterNumber)
+        for chunk in self.__chunks(iter(messages)):
+            yield from self.__processChunkResult(worker.compileChunk(chunk))
+
+    def __compileInPool(self, messages):
+        """
+        Generator which compiles messages in worker processes. New chunks are submitted only when count of pending
+        chunks is less than limit, so not consumed results are not accumulated.
+
+        :param messages: messages iterator
+        :return: compiled messages
+        """
+        processes  = self.processes
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        maxPending = self.maxPendingChunks
+        if maxPending is None:
+            maxPending = 2 * processes
+
+        executor   = concurrent.futures.ProcessPoolExecutor(
+            processes,
+            initializer = _initProcessWorker,
+            initargs    = (self.smsCenterNumber, )
+        )
+
+        pending = collections.deque()
+        chunks  = self.__chunks(messages)
+
+        try:
+            while True:
+                #new chunks are taken only when there is a place for them (backpressure)
+                while len(pending) < maxPending:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+
+                    pending.append(executor.submit(_compileChunkInProcess, chunk))
+
+                if len(pending) == 0:
+                    break
+
+                yield from self.__processChunkResult(pending.popleft().result())
+        finally:
+            for future in pending:
+                future.cancel()
+
+            executor.shutdown()
\ No newline at end of file
@@ -0,0 +1,446 @@
+#The MIT License (MIT)
+#
+#Copyright (c) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua )
+#
+#Permission is hereby granted, free of charge, to any person obtaining a copy
+#of this software and associated documentation files (the "Software"), to deal
+#in the Software without restriction, including without limitation the rights
+#to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#copies of the Software, and to permit persons to whom the Software is
+#furnished to do so, subject to the following conditions:
+#
+#The above copyright notice and this permission notice shall be included in all
+#copies or substantial portions of the Software.
+#
+#THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#SOFTWARE.
+
+
+"""
+This file is part of sim-module package. Encoding and decoding of SMS user data.
+
+sim-module package allows to communicate with SIM 900 modules: send SMS, make HTTP requests and use other
+functions of SIM 900 modules.
+
+Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
+"""
+
+import unicodedata
+
+def pack7Bits(septets, fillBits = 0):
+    """
+    Packs septets (values 0 - 127) to octets according to GSM 03.38, like b'hellohello' to
+    bytes.fromhex('E8329BFD4697D9EC37'). Each septet is processed once.
+
+    :param septets: bytes (or any iterable of integers) with septets for packing
+    :param fillBits: count of zero bits before first septet (used for alignment after user data header)
+    :return: packed bytes
+    """
+    ret         = bytearray()
+    accumulator = 0
+    bitsCount   = fillBits
+
+    for septet in septets:
+        accumulator |= (septet & 0x7f) << bitsCount
+        bitsCount   += 7
+
+        if bitsCount >= 8:
+            ret.append(accumulator & 0xff)
+            accumulator >>= 8
+            bitsCount    -= 8
+
+    if bitsCount > 0:
+        ret.append(accumulator & 0xff)
+
+    return bytes(ret)
+
+def unpack7Bits(data, septetsCount = None, fillBits = 0):
+    """
+    Unpacks septets from octets packed according to GSM 03.38
+
+    :param data: packed bytes
+    :param septetsCount: count of septets (TP-UDL value without header), when None all complete septets are returned
+    :param fillBits: count of fill bits before first septet
+    :return: bytes with septets
+    """
+    if septetsCount is None:
+        septetsCount = (len(data) * 8 - fillBits) // 7
+
+    ret         = bytearray()
+    accumulator = 0
+    bitsCount   = 0
+    skipBits    = fillBits
+
+    for octet in data:
+        accumulator |= octet << bitsCount
+        bitsCount   += 8
+
+        if skipBits > 0:
+            accumulator >>= skipBits
+            bitsCount    -= skipBits
+            skipBits      = 0
+
+        while (bitsCount >= 7) and (len(ret) < septetsCount):
+            ret.append(accumulator & 0x7f)
+            accumulator >>= 7
+            bitsCount    -= 7
+
+        if len(ret) >= septetsCount:
+            break
+
+    return bytes(ret)
+
+#GSM 03.38 default alphabet, index is septet value (0x1B is escape to extension table)
+GSM_DEFAULT_ALPHABET = (
+    "@£$¥èéùìòÇ\nØø\rÅå"
+    "Δ_ΦΓΛΩΠΨΣΘΞ\x1bÆæßÉ"
+    " !\"#¤%&'()*+,-./"
+    "0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNO"
+    "PQRSTUVWXYZÄÖÑÜ§"
+    "¿abcdefghijklmno"
+    "pqrstuvwxyzäöñüà"
+)
+
+#GSM 03.38 default alphabet extension table (septet value after escape -> symbol)
+GSM_DEFAULT_EXTENSION = {
+    0x0A: "\f",
+    0x14: "^",
+    0x28: "{",
+    0x29: "}",
+    0x2F: "\\",
+    0x3C: "[",
+    0x3D: "~",
+    0x3E: "]",
+    0x40: "|",
+    0x65: "€"
+}
+
+#escape to extension table
+GSM_ESCAPE = 0x1B
+
+#lossy replacements of symbols which are not in GSM 03.38 default alphabet (accented letters are replaced with
+#base letters, so they are not listed here)
+GSM_TRANSLITERATION = {
+    "\u2018": "'",   "\u2019": "'",   "\u201a": "'",   "\u201b": "'",   "\u2032": "'",   "\u00b4": "'",
+    "`":      "'",   "\u2039": "'",   "\u203a": "'",
+    "\u201c": "\"",  "\u201d": "\"",  "\u201e": "\"",  "\u201f": "\"",  "\u2033": "\"",  "\u00ab": "\"",
+    "\u00bb": "\"",
+    "\u2010": "-",   "\u2011": "-",   "\u2012": "-",   "\u2013": "-",   "\u2014": "-",   "\u2015": "-",
+    "\u2212": "-",
+    "\u2026": "...", "\u2022": "*",   "\u00b7": ".",   "\t":     " ",
+    "\u00a0": " ",   "\u2002": " ",   "\u2003": " ",   "\u2007": " ",   "\u2009": " ",   "\u202f": " ",
+    "\u200b": "",    "\u200d": "",    "\ufeff": "",
+    "ç":      "Ç",   "ł":      "l",   "Ł":      "L",   "đ":      "d",   "Đ":      "D",   "œ":      "oe",
+    "Œ":      "OE"
+}
+
+class SimGsmNationalLanguage:
+    """
+    National language identifiers of 3GPP TS 23.038 (used in national language shift information elements)
+    """
+    DEFAULT     = 0
+    TURKISH     = 1
+    SPANISH     = 2
+    PORTUGUESE  = 3
+
+#national language locking shift tables (replace default alphabet), index is septet value
+GSM_NATIONAL_LOCKING_SHIFT = {
+    SimGsmNationalLanguage.TURKISH: (
+        "@£$¥€éùıòÇ\nĞğ\rÅå"
+        "Δ_ΦΓΛΩΠΨΣΘΞ\x1bŞşßÉ"
+        " !\"#¤%&'()*+,-./"
+        "0123456789:;<=>?"
+        "İABCDEFGHIJKLMNO"
+        "PQRSTUVWXYZÄÖÑÜ§"
+        "çabcdefghijklmno"
+        "pqrstuvwxyzäöñüà"
+    ),
+    SimGsmNationalLanguage.PORTUGUESE: (
+        "@£$¥êéúíóç\nÔô\rÁá"
+        "Δ_ªÇÀ∞^\\€Ó|\x1bÂâÊÉ"
+        " !\"#º%&'()*+,-./"
+        "0123456789:;<=>?"
+        "ÍABCDEFGHIJKLMNO"
+        "PQRSTUVWXYZÃÕÚÜ§"
+        "~abcdefghijklmno"
+        "pqrstuvwxyzãõ`üà"
+    )
+}
+
+#national language single shift tables (replace default alphabet extension table)
+GSM_NATIONAL_SINGLE_SHIFT = {
+    SimGsmNationalLanguage.TURKISH: {
+        0x0A: "\f", 0x14: "^",  0x28: "{",  0x29: "}",  0x2F: "\\", 0x3C: "[",  0x3D: "~",  0x3E: "]",
+        0x40: "|",  0x47: "Ğ",  0x49: "İ",  0x53: "Ş",  0x63: "ç",  0x65: "€",  0x67: "ğ",  0x69: "ı",
+        0x73: "ş"
+    },
+    SimGsmNationalLanguage.SPANISH: {
+        0x09: "ç",  0x0A: "\f", 0x14: "^",  0x28: "{",  0x29: "}",  0x2F: "\\", 0x3C: "[",  0x3D: "~",
+        0x3E: "]",  0x40: "|",  0x41: "Á",  0x49: "Í",  0x4F: "Ó",  0x55: "Ú",  0x61: "á",  0x65: "€",
+        0x69: "í",  0x6F: "ó",  0x75: "ú"
+    },
+    SimGsmNationalLanguage.PORTUGUESE: {
+        0x05: "ê",  0x09: "ç",  0x0A: "\f", 0x0B: "Ô",  0x0C: "ô",  0x0E: "Á",  0x0F: "á",  0x12: "Φ",
+        0x13: "Γ",  0x14: "^",  0x15: "Ω",  0x16: "Π",  0x17: "Ψ",  0x18: "Σ",  0x19: "Θ",  0x1F: "Ê",
+        0x28: "{",  0x29: "}",  0x2F: "\\", 0x3C: "[",  0x3D: "~",  0x3E: "]",  0x40: "|",  0x41: "À",
+        0x49: "Í",  0x4F: "Ó",  0x55: "Ú",  0x5B: "Ã",  0x5C: "Õ",  0x61: "Â",  0x65: "€",  0x69: "í",
+        0x6F: "ó",  0x75: "ú",  0x7B: "ã",  0x7C: "õ",  0x7F: "â"
+    }
+}
+
+def gsmNationalTables(lockingShift = SimGsmNationalLanguage.DEFAULT, singleShift = SimGsmNationalLanguage.DEFAULT):
+    """
+    Returns alphabet and extension table for national language shifts. Default alphabet (or extension table) is
+    used when language has no such table.
+
+    :param lockingShift: national language of locking shift table
+    :param singleShift: national language of single shift table
+    :return: tuple (alphabet, extension table)
+    """
+    return (
+        GSM_NATIONAL_LOCKING_SHIFT.get(lockingShift, GSM_DEFAULT_ALPHABET),
+        GSM_NATIONAL_SINGLE_SHIFT.get(singleShift, GSM_DEFAULT_EXTENSION)
+    )
+
+#(locking shift, single shift) -> (symbol -> septets)
+_gsmEncodingTables = {}
+
+def _gsmEncodingTable(lockingShift, singleShift):
+    key   = (lockingShift, singleShift)
+    table = _gsmEncodingTables.get(key)
+    if table is not None:
+        return table
+
+    alphabet, extension = gsmNationalTables(lockingShift, singleShift)
+
+    #symbols of alphabet are preferred, they are taking one septet
+    table = dict((c, bytes([GSM_ESCAPE, i])) for i, c in extension.items())
+    table.update((c, bytes([i])) for i, c in enumerate(alphabet) if i != GSM_ESCAPE)
+
+    _gsmEncodingTables[key] = table
+    return table
+
+def encodeGsm7Bits(text, lockingShift = SimGsmNationalLanguage.DEFAULT, singleShift = SimGsmNationalLanguage.DEFAULT):
+    """
+    Converts text to septets of GSM 03.38 default alphabet. Symbols of extension table are encoded as two septets.
+
+    :param text: text for encoding
+    :param lockingShift: national language of locking shift table (replaces default alphabet)
+    :param singleShift: national language of single shift table (replaces extension table)
+    :return: bytes with septets or None when text has symbols which are not in GSM alphabet
+    """
+    table = _gsmEncodingTable(lockingShift, singleShift)
+    try:
+        return b"".join([table[c] for c in text])
+    except KeyError:
+        return None
+
+def decodeGsm7Bits(septets, lockingShift = SimGsmNationalLanguage.DEFAULT, singleShift = SimGsmNationalLanguage.DEFAULT):
+    """
+    Converts septets of GSM 03.38 default alphabet to text
+
+    :param septets: bytes with septets
+    :param lockingShift: national language of locking shift table (replaces default alphabet)
+    :param singleShift: national language of single shift table (replaces extension table)
+    :return: decoded text
+    """
+    alphabet, extension = gsmNationalTables(lockingShift, singleShift)
+
+    ret     = []
+    escaped = False
+
+    for septet in septets:
+        if escaped:
+            escaped = False
+
+            #unknown extension symbols are shown as symbols of default alphabet
+            ret.append(extension.get(septet, alphabet[septet]))
+            continue
+
+        if septet == GSM_ESCAPE:
+            escaped = True
+            continue
+
+        ret.append(alphabet[septet])
+
+    #escape at the end is shown as space
+    if escaped:
+        ret.append(" ")
+
+    return "".join(ret)
+
+def gsm7BitsLength(text, lockingShift = SimGsmNationalLanguage.DEFAULT, singleShift = SimGsmNationalLanguage.DEFAULT):
+    """
+    Returns count of septets which are needed for text encoding with GSM 03.38 default alphabet
+
+    :param text: text
+    :param lockingShift: national language of locking shift table (replaces default alphabet)
+    :param singleShift: national language of single shift table (replaces extension table)
+    :return: septets count or None when text can't be encoded
+    """
+    table = _gsmEncodingTable(lockingShift, singleShift)
+    try:
+        return sum([len(table[c]) for c in text])
+    except KeyError:
+        return None
+
+#symbol -> (locking shift languages which alphabets contain symbol, single shift languages which extension tables
+#contain symbol), default alphabet and extension table are registered as SimGsmNationalLanguage.DEFAULT
+_gsmSymbolsLanguages = {}
+
+#symbols which are present in all alphabets (they are always encoded as one septet)
+_gsmCommonSymbols    = set()
+
+def _gsmSymbolLanguages():
+    if len(_gsmSymbolsLanguages) > 0:
+        return _gsmSymbolsLanguages, _gsmCommonSymbols
+
+    lockingShifts = dict(GSM_NATIONAL_LOCKING_SHIFT)
+    lockingShifts[SimGsmNationalLanguage.DEFAULT] = GSM_DEFAULT_ALPHABET
+
+    singleShifts  = dict(GSM_NATIONAL_SINGLE_SHIFT)
+    singleShifts[SimGsmNationalLanguage.DEFAULT] = GSM_DEFAULT_EXTENSION
+
+    ret = {}
+    for language, alphabet in lockingShifts.items():
+        for i, c in enumerate(alphabet):
+            if i != GSM_ESCAPE:
+                ret.setdefault(c, (set(), set()))[0].add(language)
+
+    for language, extension in singleShifts.items():
+        for c in extension.values():
+            ret.setdefault(c, (set(), set()))[1].add(language)
+
+    _gsmSymbolsLanguages.update(
+        (c, (frozenset(lockings), frozenset(singles))) for c, (lockings, singles) in ret.items()
+    )
+    _gsmCommonSymbols.update(c for c, (lockings, singles) in ret.items() if len(lockings) == len(lockingShifts))
+
+    return _gsmSymbolsLanguages, _gsmCommonSymbols
+
+def classifyGsm7Bits(text):
+    """
+    Classifies distinct symbols of text: for each symbol which is not present in all alphabets count of symbols and
+    national language tables which contain it are recorded, so septets count can be calculated for any tables
+    combination without text encoding
+
+    :param text: text
+    :return: list of tuples (symbols count, (locking shift languages, single shift languages)) or None when text has
+        symbols which are not present in any table
+    """
+    languages, commonSymbols = _gsmSymbolLanguages()
+
+    ret = []
+    for symbol in set(text).difference(commonSymbols):
+        symbolLanguages = languages.get(symbol)
+        if symbolLanguages is None:
+            return None
+
+        ret.append((text.count(symbol), symbolLanguages))
+
+    return ret
+
+def classifiedGsm7BitsLength(text, classes, lockingShift = SimGsmNationalLanguage.DEFAULT, singleShift = SimGsmNationalLanguage.DEFAULT):
+    """
+    Returns count of septets which are needed for encoding of classified text (symbols of alphabet are taking one
+    septet, symbols of extension table are taking two septets)
+
+    :param text: text
+    :param classes: result of classifyGsm7Bits()
+    :param lockingShift: national language of locking shift table (replaces default alphabet)
+    :param singleShift: national language of single shift table (replaces extension table)
+    :return: septets count or None when text can't be encoded
+    """
+    ret = len(text)
+    for count, (lockingShifts, singleShifts) in classes:
+        if lockingShift in lockingShifts:
+            continue
+
+        if singleShift not in singleShifts:
+            return None
+
+        ret += count
+
+    return ret
+
+def splitSeptets(septets, partSize):
+    """
+    Splits septets to parts, escape septet is never separated from following septet
+
+    :param septets: bytes with septets
+    :param partSize: max septets count in part
+    :return: list of parts
+    """
+    ret     = []
+    start   = 0
+    count   = len(septets)
+
+    #escape septet is always a first septet of escape sequence (it's never encoded as a symbol), so only last septet
+    #of each part must be checked
+    while start < count:
+        end = min(start + partSize, count)
+        if (end < count) and (septets[end - 1] == GSM_ESCAPE):
+            end -= 1
+
+        ret.append(septets[start:end])
+        start = end
+
+    return ret
+
+def splitUcs2(data, partSize):
+    """
+    Splits UCS2 (UTF-16 big endian) data to parts, surrogate pairs are never separated
+
+    :param data: encoded text
+    :param partSize: max bytes count in part (must be even)
+    :return: list of parts
+    """
+    ret   = []
+    start = 0
+
+    while start < len(data):
+        end = min(start + partSize, len(data))
+
+        #high surrogate must stay with following low surrogate
+        if (end < len(data)) and (0xD8 <= data[end - 2] <= 0xDB):
+            end -= 2
+
+        ret.append(data[start:end])
+        start = end
+
+    return ret
+
+
+#symbol -> replacement (transliterated symbols cache)
+_gsmTransliterationCache = {}
+
+def _transliterateSymbol(symbol, table):
+    ret = _gsmTransliterationCache.get(symbol)
+    if ret is not None:
+        return ret
+
+    ret = GSM_TRANSLITERATION.get(symbol)
+    if ret is None:
+        #removing diacritical marks (combining symbols after decomposition)
+        base = "".join([c for c in unicodedata.normalize("NFD", symbol) if not unicodedata.combining(c)])
+        ret  = base if (len(base) > 0) and all(c in table for c in base) else symbol
+
+    _gsmTransliterationCache[symbol] = ret
+    return ret
+
+def transliterateToGsm7Bits(text):
+    """
+    Replaces symbols which are not in GSM 03.38 default alphabet with similar symbols (smart quotes, dashes,
+    accented letters and etc.). Transliteration is lossy, symbols without replacement are kept.
+
+    :param text: text for transliteration
+    :return: transliterated text
+    """
+    table = _gsmEncodingTable(SimGsmNationalLanguage.DEFAULT, SimGsmNationalLanguage.DEFAULT)
+    return "".join([c if c in table else _transliterateSymbol(c, table) for c in text])
\ No newline at end of file
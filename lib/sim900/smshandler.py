@@ -29,12 +29,51 @@ functions of SIM 900 modules.
 Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Reserved.
 """
 
-from lib.sim900.gsm import SimGsm
+from lib.sim900.gsm import SimGsm, SimGsmPipelining
 from lib.sim900.simshared import *
-import binascii
+from lib.sim900.smscodec import *
 import random
+import datetime
+
+class SimSmsMessagePlan:
+    """
+    Result of message encoding planning: selected encoding and encoded message parts
+    """
+    __slots__ = ("text", "is7Bits", "lockingShift", "singleShift", "transliterated", "pieces")
+
+    def __init__(self, text, is7Bits, pieces, lockingShift = 0, singleShift = 0, transliterated = False):
+        #text which will be sent (can differ from source text after transliteration)
+        self.text           = text
+        self.is7Bits        = is7Bits
+
+        #national languages of shift tables (7-bit encoding only)
+        self.lockingShift   = lockingShift
+        self.singleShift    = singleShift
+
+        #True when lossy transliteration was used
+        self.transliterated = transliterated
+
+        #encoded message parts: septets for 7-bit encoding and UCS2 encoded data otherwise
+        self.pieces         = pieces
+
+    @property
+    def partsCount(self):
+        return len(self.pieces)
+
+    def __str__(self):
+        if not self.is7Bits:
+            encoding = "UCS2"
+        elif (self.lockingShift, self.singleShift) != (0, 0):
+            encoding = "7-bit (locking shift {0}, single shift {1})".format(self.lockingShift, self.singleShift)
+        else:
+            encoding = "7-bit"
+
+        return "{0}{1}, {2} part(s)".format(encoding, ", transliterated" if self.transliterated else "", self.partsCount)
 
 class SimSmsPduCompiler(AminisLastErrorHolder):
+    #max count of encoded addresses in address cache
+    ADDRESS_CACHE_SIZE = 4096
+
     def __init__(self, smsCenterNumber="", targetPhoneNumber="", smsTextMessage=""):
         AminisLastErrorHolder.__init__(self)
 
@@ -49,9 +88,24 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
 
         self.flashMessage           = False
 
-        #validation period for message
+        #national languages which shift tables can be used for 7-bit encoding (like [SimGsmNationalLanguage.TURKISH]),
+        #by default only GSM 03.38 default alphabet and extension table are used (handsets without national tables
+        #can't show such messages)
+        self.nationalLanguages      = []
+
+        #when True lossy transliteration (smart quotes, dashes, accented letters) is used if it gives fewer parts
+        self.allowTransliteration   = False
+
+        #validation period for message (TP-VP value)
         self.__validationPeriod     = None
 
+        #optional cache of encoded TP-DA fields (recipient number -> encoded address bytes), can be shared between
+        #compilers
+        self.addressCache           = None
+
+        #last compiled SCA (sms center number, compiled SCA bytes)
+        self.__scaCache             = None
+
     def clear(self):
         """
         Clears all internal buffers
@@ -64,6 +118,8 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
         self.__smsRecipientNumber   = ""
         self.smsText                = ""
         self.flashMessage           = False
+        self.nationalLanguages      = []
+        self.allowTransliteration   = False
 
         self.__validationPeriod     = None
 
@@ -156,103 +212,78 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
         """
         Compiles SCA part of PDU request.
 
-        :return: compiled request
+        :return: compiled request (bytes)
         """
         if len(self.smsCenterNumber) == 0:
-            return "00"
+            return b"\x00"
 
-        smsCenterNumber = SimSmsPduCompiler.__encodePhoneNumber(self.smsCenterNumber)
-        sca = SimSmsPduCompiler.__byteToHex ( ((len(smsCenterNumber) // 2) + 1)) + "91" + smsCenterNumber
-        return sca
+        if (self.__scaCache is not None) and (self.__scaCache[0] == self.smsCenterNumber):
+            return self.__scaCache[1]
 
-    def __canUse7BitsEncoding(self, text = None):
-        """
-        Checks that message can be encoded in 7 bits.
+        smsCenterNumber = bytes.fromhex(SimSmsPduCompiler.__encodePhoneNumber(self.smsCenterNumber))
+        sca = bytes([len(smsCenterNumber) + 1, 0x91]) + smsCenterNumber
 
-        :param text: optional argument - text for checking, when not specified whole sms text will be checked
-        :return: true when text can be encoded in 7 bits, otherwise returns false
-        """
-
-        if text is None:
-            return all(ord(c) < 128 for c in self.smsText)
-
-        return all(ord(c) < 128 for c in text)
+        self.__scaCache = (self.smsCenterNumber, sca)
+        return sca
 
-    @staticmethod
-    def __encodeMessageIn7Bits(text):
+    def __compileDestinationAddress(self, number):
         """
-        Encodes ASCII text message block with 7 bit's encoding. So, each 8 symbols of message will be encoded in 7 bytes
+        Compiles TP-DA (TP-Destination-Address) part of PDU request, uses address cache when it's specified
 
-        :param text: text for encoding
-        :return: 7-bit encoded message
+        :param number: recipient number
+        :return: compiled TP-DA (bytes)
         """
+        number = self.__preprocessPhoneNumber(number)
+        cache  = self.addressCache
+        if cache is not None:
+            ret = cache.get(number)
+            if ret is not None:
+                return ret
 
-        data = bytearray(text.encode("ascii"))
-
-        #encoding
-        i = 1
-        while i < len(data):
-            j = len(data) - 1
-
-            while j>=i:
-                firstBit = 0x80 if ((data[j] % 2) > 0) else 0x00
+        ret = bytes([self.__clientPhoneNumberLength(number), 0x91]) + bytes.fromhex(self.__encodePhoneNumber(number))
 
-                data[j-1] = (data[j-1] & 0x7f) | firstBit
-                data[j]   = data[j] >> 1
+        if cache is not None:
+            if len(cache) >= self.ADDRESS_CACHE_SIZE:
+                cache.clear()
 
-                j -= 1
+            cache[number] = ret
 
-            i += 1
-
-        #looking for first 0x00 byte
-        index = 0
-        for b in data:
-            if b == 0x00:
-                break
-
-            index += 1
-
-        data = data[:index]
-
-        # 'hellohello' must be encoded as "E8329BFD4697D9EC37"
-        return binascii.hexlify(data).decode("ascii").upper()
+        return ret
 
-    def __encodeMessageAsUcs2(self, text):
+    @staticmethod
+    def __encodeMessageIn7Bits(septets, fillBits = 0):
         """
-        Encodes message with UCS2 encoding
+        Packs septets of message block with 7 bit's encoding. So, each 8 symbols of message will be encoded in 7 bytes
 
-        :param text: text for encoding
-        :return: UCS2 encoded message
+        :param septets: septets of GSM 03.38 alphabet for encoding
+        :param fillBits: count of fill bits after user data header
+        :return: 7-bit encoded message (bytes)
         """
 
-        try:
-            d = binascii.hexlify(text.encode("utf-16-be"))
-            return d.decode("ascii").upper()
-        except Exception as e:
-            self.setError("error encoding text: {0}".format(e))
-
-            return None
+        # 'hellohello' must be encoded as "E8329BFD4697D9EC37"
+        return pack7Bits(septets, fillBits)
 
     def __compilePduTypePart(self, isMultupartMessage):
         """
         Returns PDU Type part.
 
-        :param isMultupartMessage: must be true when message is multupart
+        :param isMultupartMessage: must be true when message has user data header (multipart message or message
+            with national language shift tables)
         :return: encoded PDU-Type
         """
 
         #returning PDU-Type when validation period is not specified
         if self.__validationPeriod is None:
             if not isMultupartMessage:
-                return "01"
+                return 0x01
 
-            return "41"
+            return 0x41
 
         #special value when multi-part message
         if isMultupartMessage:
-            return "51"
+            return 0x51
 
-        return "11"
+        return 0x11
 
     def __compilePduTpVpPart(self):
         """
@@ -277,7 +308,7 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
             self.setError("Wrong interval, must be between 1 and 720 minutes")
             return False
 
-        self.__validationPeriod = self.__byteToHex(count)
+        self.__validationPeriod = count
         return True
 
     def setValidationPeriodInHours(self, value):
@@ -304,7 +335,7 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
         if count>23:
             count = 23
 
-        self.__validationPeriod = self.__byteToHex(count + 144)
+        self.__validationPeriod = count + 144
         return True
 
     def setValidationPeriodInDays(self, value):
@@ -321,7 +352,7 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
             self.setError("Bad interval, value must be >= 2 days and <= 30 days")
             return False
 
-        self.__validationPeriod = self.__byteToHex(value + 166)
+        self.__validationPeriod = int(value) + 166
         return True
 
     def setValidationPeriodInWeeks(self, value):
@@ -338,26 +369,69 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
             return False
 
         value = value - 5
-        self.__validationPeriod = self.__byteToHex(value + 197)
+        self.__validationPeriod = int(value) + 197
         return True
 
-    def __compileTpdu(self, pieceNumber, totalPiecesCount, pieceText, messageId = None):
+    @staticmethod
+    def __nationalLanguageIes(lockingShift, singleShift):
+        """
+        Returns user data header information elements for national language shift tables
+
+        :param lockingShift: national language of locking shift table
+        :param singleShift: national language of single shift table
+        :return: information elements
         """
-        Compiles TPDU part of PDU message request.
-        :return: compiled TPDU
+        ret = bytearray()
+
+        #national language single shift
+        if singleShift != SimGsmNationalLanguage.DEFAULT:
+            ret += bytearray([0x24, 0x01, singleShift])
+
+        #national language locking shift
+        if lockingShift != SimGsmNationalLanguage.DEFAULT:
+            ret += bytearray([0x25, 0x01, lockingShift])
+
+        return ret
+
+    @staticmethod
+    def __udhSeptetsCount(udhLength):
+        """
+        Returns count of septets which are taken by user data header (with fill bits) in 7-bit encoded message
+
+        :param udhLength: length of user data header in bytes (including UDHL)
+        :return: septets count
+        """
+        return (udhLength * 8 + 6) // 7
+
+    def __compileTpduParts(self, pieceNumber, totalPiecesCount, pieceData, is7Bits, messageId = None, lockingShift = 0, singleShift = 0):
+        """
+        Compiles TPDU part of PDU message request without TP-DA (recipient address).
+
+        :param pieceNumber: number of message part (starting from 1)
+        :param totalPiecesCount: count of message parts
+        :param pieceData: septets of message part (for 7-bit encoding) or UCS2 encoded message part
+        :param is7Bits: True when message is encoded in 7 bits
+        :param messageId: reference number of multipart message
+        :param lockingShift: national language of locking shift table (7-bit encoding only)
+        :param singleShift: national language of single shift table (7-bit encoding only)
+        :return: tuple (TPDU part before TP-DA, TPDU part after TP-DA) as bytes
         """
         # TPDU = "PDU-Type" + "TP-MR" + "TP-DA" + "TP-PID" + "TP-DCS" + "TP-VP" + "TP-UDL" + "TP-UD"
         # PDU-Type is the same as SMS-SUBMIT-PDU
 
-        ret = ""
+        ret = bytearray()
         #checking that message have more than one part
         isMultipartMessage = totalPiecesCount > 1
 
+        #national language shift tables are specified in user data header
+        nationalIes = self.__nationalLanguageIes(lockingShift, singleShift) if is7Bits else bytearray()
+        hasUdh      = isMultipartMessage or (len(nationalIes) > 0)
+
         #adding PDU-Type
-        ret += self.__compilePduTypePart(isMultipartMessage)
+        ret.append(self.__compilePduTypePart(hasUdh))
 
         #adding TP-MR (TP-Message-Reference).
-        ret += self.__byteToHex(pieceNumber+100)
+        ret.append((pieceNumber + 100) & 0xff)
         # if totalPiecesCount > 1:
         #     #setting message reference manually
         #     ret += self.__byteToHex(pieceNumber)
@@ -365,67 +439,41 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
         #     #The "00" value here lets the phone set the message reference number itself.
         #     ret += "00"
 
-        #encoding TP-DA (TP-Destination-Address - recipient address)
-        ret += self.__byteToHex(self.__clientPhoneNumberLength(self.smsRecipientNumber)) + "91" + self.__encodePhoneNumber(self.smsRecipientNumber)
+        #TP-DA (TP-Destination-Address - recipient address) is added for each recipient
+        head = bytes(ret)
+        ret  = bytearray()
 
         #adding TP-PID (TP-Protocol ID)
-        ret += "00"
+        ret.append(0x00)
 
         #adding TP-DCS (TP-Data-Coding-Scheme)
-        #00h: 7-bit encoding (160 symbols [after packing], but only ASCII)
+        #00h: 7-bit encoding (160 septets of GSM 03.38 alphabet, extension table symbols are taking 2 septets)
         #08h: UCS2 encoding (Unicode), 70 symbols, 2 bytes per symbol
 
         #If first octet is "1" message will not be saved in mobile but only flashed on the screen
         #10h: Flash-message with 7-bit encoding
         #18h: Flash-message with UCS2 encoding
 
-        #checking that message CAN be encoded in 7 bits encoding
-        canBe7BitsEncoded = self.__canUse7BitsEncoding()
+        canBe7BitsEncoded = is7Bits
 
         if canBe7BitsEncoded:
-            tpDcs = "00"
+            tpDcs = 0x00
         else:
-            tpDcs = "08"
+            tpDcs = 0x08
 
         if self.flashMessage:
-            tpDcs[0] = "1"
+            tpDcs |= 0x10
 
-        ret += tpDcs
+        ret.append(tpDcs)
 
         #adding TP-VP (TP-Validity-Period) is it's specified
         if self.__validationPeriod is not None:
-            ret += self.__compilePduTpVpPart()
-
-        #encoding message (7-bit or UCS2)
-        if canBe7BitsEncoded:
-            encodedMessage = self.__encodeMessageIn7Bits(pieceText)
-        else:
-            encodedMessage = self.__encodeMessageAsUcs2(pieceText)
-
-        #checking that message was encoded correctly
-        if encodedMessage is None:
-            self.setError("error encoding message: {0}".format(self.errorText))
-            return None
-
-        #adding TP-UDL (TP-User-Data-Length - message length)
-        if not isMultipartMessage:
-            if canBe7BitsEncoded:
-                #adding TEXT LENGTH IN SYMBOLS
-                ret += self.__byteToHex(len(self.smsText))
-            else:
-                ret += self.__byteToHex(len(encodedMessage)//2)
-        else:
-            if canBe7BitsEncoded:
-                ret += self.__byteToHex(len(pieceText) + 8)
-            else:
-                ret += self.__byteToHex(len(encodedMessage)//2 + 6)
+            ret.append(self.__compilePduTpVpPart())
 
-        #adding UDHL + UDH for multipart messages
+        #compiling UDH for multipart messages and messages with national language shift tables
+        udh = bytearray()
         if isMultipartMessage:
             if canBe7BitsEncoded:
-                #length of UDH
-                udhl = bytearray([0x06])
-
                 #UDI IED entry type
                 iei  = bytearray([0x08])
 
@@ -449,9 +497,6 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
                 #compiling UDH
                 udh  = iei + iedl + ied
             else:
-                #length of UDH
-                udhl = bytearray([0x05])
-
                 #UDI IED entry type
                 iei  = bytearray([0x00])
 
@@ -474,48 +519,184 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
                 #compiling UDH
                 udh  = iei + iedl + ied
 
-            cudh = binascii.hexlify(udhl + udh).decode("ascii").upper()
-            print("cudh = '{0}'".format(cudh))
+        udh += nationalIes
+
+        #adding UDHL (length of UDH)
+        if hasUdh:
+            udh = bytearray([len(udh)]) + udh
+
+        #adding TP-UDL (TP-User-Data-Length - message length): septets count for 7-bit encoding (UDH is padded
+        #with fill bits to septets boundary) and bytes count for UCS2
+        if canBe7BitsEncoded:
+            udhSeptets = self.__udhSeptetsCount(len(udh))
+            ret.append(udhSeptets + len(pieceData))
+
+            encodedMessage = self.__encodeMessageIn7Bits(pieceData, udhSeptets * 7 - len(udh) * 8)
+        else:
+            ret.append(len(udh) + len(pieceData))
+
+            encodedMessage = pieceData
 
-            ret += cudh
+        #adding UDHL + UDH
+        ret += udh
 
         #adding TP-UD (TP-User-Data - SMS message encoded as described in TP-DCS)
         ret += encodedMessage
-        return ret
+        return head, bytes(ret)
 
-    def messagesCount(self):
-        if self.__canUse7BitsEncoding():
-            symbolsCount = len(self.smsText)
+    def __split7Bits(self, text, septetsCount, lockingShift, singleShift, maxPartsCount = None):
+        """
+        Encodes text and splits septets to message parts, user data header of each part takes place of septets. Text
+        is encoded only when it fits to maxPartsCount parts.
 
-            if symbolsCount <= 160:
-                return 1
+        :param text: text for encoding
+        :param septetsCount: count of septets which are needed for text encoding
+        :param lockingShift: national language of locking shift table
+        :param singleShift: national language of single shift table
+        :param maxPartsCount: when specified and message needs more parts None will be returned
+        :return: list of parts or None
+        """
+        nationalIesLength = len(self.__nationalLanguageIes(lockingShift, singleShift))
 
-            messagesCount = symbolsCount // 152
-            if symbolsCount % 152:
-                messagesCount += 1
+        #single part message (UDH is present only when national language shift tables are used)
+        udhLength = (nationalIesLength + 1) if nationalIesLength > 0 else 0
+        if septetsCount <= 160 - self.__udhSeptetsCount(udhLength):
+            return [encodeGsm7Bits(text, lockingShift, singleShift)]
 
-            return messagesCount
-        else:
-            symbolsCount = len(self.smsText)
+        #multipart message (UDHL + 6 bytes of concatenation information element + national IEs)
+        partSize = 160 - self.__udhSeptetsCount(1 + 6 + nationalIesLength)
+        if (maxPartsCount is not None) and (septetsCount > maxPartsCount * partSize):
+            return None
 
-            if symbolsCount <= 70:
-                return 1
+        return splitSeptets(encodeGsm7Bits(text, lockingShift, singleShift), partSize)
 
-            messagesCount = symbolsCount // 67
-            if symbolsCount % 67:
-                messagesCount += 1
+    def __nationalLanguagesCombinations(self):
+        """
+        Returns all combinations of national language shift tables which were allowed by caller (combinations with one
+        table first)
 
-            return messagesCount
+        :return: list of tuples (locking shift, single shift)
+        """
+        languages = self.nationalLanguages
+        if languages is None:
+            return []
+
+        lockingShifts = [language for language in languages if language in GSM_NATIONAL_LOCKING_SHIFT]
+        singleShifts  = [language for language in languages if language in GSM_NATIONAL_SINGLE_SHIFT]
+
+        ret  = [(SimGsmNationalLanguage.DEFAULT, language) for language in singleShifts]
+        ret += [(language, SimGsmNationalLanguage.DEFAULT) for language in lockingShifts]
+        ret += [(locking, single) for locking in lockingShifts for single in singleShifts]
+
+        return ret
 
     @staticmethod
-    def __byteToHex(value):
+    def __planUcs2(text):
+        data = text.encode("utf-16-be")
+        if len(data) <= 140:
+            return SimSmsMessagePlan(text, False, [data])
+
+        #UDH takes 6 bytes of each part
+        return SimSmsMessagePlan(text, False, splitUcs2(data, 134))
+
+    def __planText(self, text):
+        """
+        Encodes text and splits it to parts. Text is encoded in 7 bits when it's possible (national language
+        shift tables combination which needs fewest parts is selected), otherwise UCS2 encoding is used.
+
+        :param text: text for encoding
+        :return: message plan
+        """
+        default = SimGsmNationalLanguage.DEFAULT
+
+        #symbols are classified once, septets count of each tables combination is calculated from symbols classes
+        classes = classifyGsm7Bits(text)
+        if classes is None:
+            return self.__planUcs2(text)
+
+        best         = None
+        septetsCount = classifiedGsm7BitsLength(text, classes, default, default)
+        if septetsCount is not None:
+            best = SimSmsMessagePlan(text, True, self.__split7Bits(text, septetsCount, default, default))
+
+            #message can't be sent with fewer parts (national language tables can only decrease count of escaped
+            #symbols, but they are increasing UDH)
+            if (best.partsCount == 1) or (septetsCount == len(text)):
+                return best
+
+        #national language tables are used only when they are giving fewer parts than UCS2 (or default alphabet)
+        if best is None:
+            best = self.__planUcs2(text)
+
+        for lockingShift, singleShift in self.__nationalLanguagesCombinations():
+            septetsCount = classifiedGsm7BitsLength(text, classes, lockingShift, singleShift)
+            if septetsCount is None:
+                continue
+
+            pieces = self.__split7Bits(text, septetsCount, lockingShift, singleShift, best.partsCount - 1)
+            if (pieces is not None) and (len(pieces) < best.partsCount):
+                best = SimSmsMessagePlan(text, True, pieces, lockingShift, singleShift)
+
+        return best
+
+    def plan(self):
         """
-        Returns two-symbold hex-string representation of byte.
+        Selects cheapest encoding of message (which needs fewest parts): GSM 7-bit, 7-bit with national language
+        shift tables, 7-bit after transliteration (only when allowTransliteration is True) or UCS2. Lossless
+        encodings are preferred when parts count is the same.
 
-        :param value: byte for encoding
-        :return: encoded value
+        :return: message plan
         """
-        return "{:02X}".format(value)
+        ret = self.__planText(self.smsText)
+        if (not self.allowTransliteration) or (ret.is7Bits and (ret.partsCount == 1)):
+            return ret
+
+        text = transliterateToGsm7Bits(self.smsText)
+        if text == self.smsText:
+            return ret
+
+        transliterated = self.__planText(text)
+        if transliterated.partsCount < ret.partsCount:
+            transliterated.transliterated = True
+            return transliterated
+
+        return ret
+
+    def messagesCount(self):
+        return self.plan().partsCount
+
+    def compileTemplate(self):
+        """
+        Compiles message for sending to many recipients. Message is encoded once, only recipient address is
+        compiled for each recipient.
+
+        :return: compiled template
+        """
+        plan = self.plan()
+
+        #generating message id for multi-part messages
+        messageId = None
+        if plan.partsCount > 1:
+            messageId = random.randint(0, 65535)
+
+        parts = []
+        for i, piece in enumerate(plan.pieces):
+            parts.append(self.__compileTpduParts(i+1, plan.partsCount, piece, plan.is7Bits, messageId, plan.lockingShift, plan.singleShift))
+
+        #message id is placed in concatenation information element after TP-PID, TP-DCS, TP-VP, TP-UDL, UDHL,
+        #IEI and IEDL (16 bit value for 7-bit encoding and 8 bit value for UCS2)
+        referenceOffset = 6 + (1 if self.__validationPeriod is not None else 0)
+        referenceLength = 2 if plan.is7Bits else 1
+
+        return SimSmsPduTemplate(
+            self.__compileScaPart(),
+            parts,
+            plan,
+            messageId,
+            referenceOffset,
+            referenceLength,
+            self.__compileDestinationAddress
+        )
 
     def compile(self):
         """
@@ -523,38 +704,444 @@ class SimSmsPduCompiler(AminisLastErrorHolder):
 
         :return: SMS request in PDU format
         """
+        return self.compileTemplate().compile(self.smsRecipientNumber)
+
+    def compileBytes(self):
+        """
+        Compiles PDU request (SCA + TPDU) in binary form, for transports which are sending binary PDU
+
+        :return: list of (sca, tpdu) tuples (sca is bytes, tpdu is bytearray)
+        """
+        return self.compileTemplate().compileBytes(self.smsRecipientNumber)
+
+class SimSmsPduTemplate:
+    """
+    Compiled message which can be sent to many recipients. TP-DCS, TP-UDL, UDH and TP-UD of each part are compiled
+    once, only TP-DA (and message id of multipart message when it's specified) is changed for recipients.
+    """
+    def __init__(self, sca, parts, plan, messageId, referenceOffset, referenceLength, addressCompiler):
+        self.scaBytes           = sca
+        self.sca                = sca.hex().upper()
+        self.plan               = plan
+        self.messageId          = messageId
+
+        #list of tuples (TPDU part before TP-DA, TPDU part after TP-DA)
+        self.__parts            = parts
+
+        #position and length of message id in TPDU part after TP-DA (in bytes)
+        self.__referenceOffset  = referenceOffset
+        self.__referenceLength  = referenceLength
+
+        #function which compiles TP-DA for recipient number
+        self.__addressCompiler  = addressCompiler
+
+    @property
+    def partsCount(self):
+        return len(self.__parts)
+
+    def compileBytes(self, recipient, messageId = None):
+        """
+        Compiles PDU requests for recipient in binary form
+
+        :param recipient: recipient number
+        :param messageId: reference number of multipart message, when None message id of template is used
+        :return: list of (sca, tpdu) tuples (sca is bytes, tpdu is bytearray)
+        """
+        address = self.__addressCompiler(recipient)
+
+        reference = None
+        if (messageId is not None) and (len(self.__parts) > 1):
+            reference = (messageId & 0xffff).to_bytes(2, "big")[-self.__referenceLength:]
+
         ret = []
+        for head, tail in self.__parts:
+            #TPDU is compiled in preallocated buffer, message id is replaced in place
+            tailOffset = len(head) + len(address)
+            tpdu       = bytearray(tailOffset + len(tail))
 
-        symbolsCount    = len(self.smsText)
-        msgCount        = self.messagesCount()
-        isUcs2          = not self.__canUse7BitsEncoding()
+            tpdu[:len(head)]            = head
+            tpdu[len(head):tailOffset]  = address
+            tpdu[tailOffset:]           = tail
 
-        if isUcs2:
-            symbolsInPiece = 67
-        else:
-            symbolsInPiece = 152
+            if reference is not None:
+                offset = tailOffset + self.__referenceOffset
+                tpdu[offset:offset + len(reference)] = reference
 
-        #generating message id for multi-part messages
-        messageId = None
-        if msgCount > 1:
-            messageId = random.randint(0, 65535)
+            ret.append((self.scaBytes, tpdu))
 
-        for i in range(msgCount):
+        return ret
 
-            if msgCount == 1:
-                textPiece = self.smsText
-            else:
-                minIndex = i * symbolsInPiece
-                maxIndex = (minIndex + symbolsInPiece) if (minIndex + symbolsInPiece) < symbolsCount else (symbolsCount)
-                textPiece = self.smsText[minIndex : maxIndex]
+    def compile(self, recipient, messageId = None):
+        """
+        Compiles PDU requests for recipient
+
+        :param recipient: recipient number
+        :param messageId: reference number of multipart message, when None message id of template is used
+        :return: list of (sca, tpdu) tuples
+        """
+        return [(self.sca, tpdu.hex().upper()) for _, tpdu in self.compileBytes(recipient, messageId)]
+
+class SimSmsMessageType:
+    DELIVER         = 0x00
+    SUBMIT          = 0x01
+    STATUS_REPORT   = 0x02
+
+class SimSmsStorageStatus:
+    #message status in module storage (PDU mode values)
+    RECEIVED_UNREAD = 0
+    RECEIVED_READ   = 1
+    STORED_UNSENT   = 2
+    STORED_SENT     = 3
+    ALL             = 4
+
+class SimSmsDataCoding:
+    GSM_7BIT        = 0
+    DATA_8BIT       = 1
+    UCS2            = 2
+
+class SimSmsDeliverMessage:
+    """
+    Received message (SMS-DELIVER)
+    """
+    __slots__ = (
+        "smsCenterNumber", "sender", "senderType", "protocolId", "dataCoding", "encoding", "messageClass",
+        "timestamp", "text", "data", "concatReference", "partsCount", "partNumber", "moreMessagesToSend",
+        "statusReportIndication", "replyPath", "index", "storageStatus"
+    )
+
+    messageType = SimSmsMessageType.DELIVER
+
+    def __init__(self):
+        self.smsCenterNumber        = ""
+        self.sender                 = ""
+
+        #type of sender address (type of number and numbering plan identification)
+        self.senderType             = 0
+
+        #TP-PID and TP-DCS
+        self.protocolId             = 0
+        self.dataCoding             = 0
+
+        #alphabet of user data (SimSmsDataCoding) and message class (None when it's not specified)
+        self.encoding               = SimSmsDataCoding.GSM_7BIT
+        self.messageClass           = None
+
+        #service center time stamp (timezone aware datetime)
+        self.timestamp              = None
+
+        #decoded text (None for 8-bit data) and user data without UDH
+        self.text                   = None
+        self.data                   = b""
+
+        #concatenation information (reference is None for single part messages)
+        self.concatReference        = None
+        self.partsCount             = 1
+        self.partNumber             = 1
+
+        self.moreMessagesToSend     = False
+        self.statusReportIndication = False
+        self.replyPath              = False
+
+        #index in module storage and storage status (SimSmsStorageStatus), when message was read from storage
+        self.index                  = None
+        self.storageStatus          = None
+
+    @property
+    def isMultipart(self):
+        return self.concatReference is not None
+
+    def __str__(self):
+        return "SMS from '{0}' at {1}: {2}".format(self.sender, self.timestamp, self.text)
+
+class SimSmsStatusReport:
+    """
+    Delivery status report (SMS-STATUS-REPORT)
+    """
+    __slots__ = (
+        "smsCenterNumber", "messageReference", "recipient", "recipientType", "timestamp", "dischargeTime", "status",
+        "index", "storageStatus"
+    )
+
+    messageType = SimSmsMessageType.STATUS_REPORT
+
+    def __init__(self):
+        self.smsCenterNumber        = ""
+
+        #TP-MR of sent message
+        self.messageReference       = 0
+
+        self.recipient              = ""
+        self.recipientType          = 0
+
+        #service center time stamp and discharge time (timezone aware datetimes)
+        self.timestamp              = None
+        self.dischargeTime          = None
+
+        #TP-ST (0x00 - 0x1F - message delivered, 0x20 - 0x3F - still trying, other values - delivery failed)
+        self.status                 = 0
+
+        #index in module storage and storage status (SimSmsStorageStatus), when report was read from storage
+        self.index                  = None
+        self.storageStatus          = None
+
+    @property
+    def delivered(self):
+        return self.status < 0x20
+
+    @property
+    def pending(self):
+        return 0x20 <= self.status < 0x40
+
+    def __str__(self):
+        return "status report for '{0}' (message reference {1}): status {2}".format(
+            self.recipient,
+            self.messageReference,
+            self.status
+        )
+
+class SimSmsPduDecoder(AminisLastErrorHolder):
+    #type of number: international and alphanumeric
+    TON_INTERNATIONAL   = 0x01
+    TON_ALPHANUMERIC    = 0x05
+
+    #semi-octet values 0x0A - 0x0E in address digits (hex symbol -> digit)
+    __addressDigits     = str.maketrans("abcde", "*#abc")
+
+    def __init__(self):
+        AminisLastErrorHolder.__init__(self)
+
+    @staticmethod
+    def __decodeAddressDigits(data, digitsCount):
+        """
+        Decodes semi-octets of address (swapped nibbles, 'F' padding)
+
+        :param data: address value bytes
+        :param digitsCount: digits count
+        :return: address digits
+        """
+        h = data.hex()
+        ret = "".join([a + b for a, b in zip(h[1::2], h[0::2])])[:digitsCount]
+
+        return ret.rstrip("f").translate(SimSmsPduDecoder.__addressDigits)
+
+    @staticmethod
+    def __decodeAddress(data, digitsCount, addressType):
+        """
+        Decodes address (originating address or recipient address)
 
-            ret += [(self.__compileScaPart(), self.__compileTpdu(i+1, msgCount, textPiece, messageId),)]
+        :param data: address value bytes
+        :param digitsCount: address length from PDU (in semi-octets)
+        :param addressType: type of address
+        :return: decoded address
+        """
+        ton = (addressType >> 4) & 0x07
+
+        if ton == SimSmsPduDecoder.TON_ALPHANUMERIC:
+            return decodeGsm7Bits(unpack7Bits(data, digitsCount * 4 // 7))
+
+        ret = SimSmsPduDecoder.__decodeAddressDigits(data, digitsCount)
+        if ton == SimSmsPduDecoder.TON_INTERNATIONAL:
+            return "+" + ret
 
         return ret
 
+    @staticmethod
+    def __decodeTimestamp(data):
+        """
+        Decodes time stamp (TP-SCTS, TP-DT), semi-octets: year, month, day, hours, minutes, seconds, time zone
+
+        :param data: 7 bytes of time stamp
+        :return: timezone aware datetime or None when time stamp is invalid
+        """
+        values = [(b & 0x0F) * 10 + (b >> 4) for b in data[:6]]
+
+        #time zone in quarters of an hour, bit 3 is a sign
+        tz      = data[6]
+        minutes = ((tz & 0x07) * 10 + (tz >> 4)) * 15
+        if tz & 0x08:
+            minutes = -minutes
+
+        try:
+            return datetime.datetime(
+                2000 + values[0], values[1], values[2], values[3], values[4], values[5],
+                tzinfo = datetime.timezone(datetime.timedelta(minutes = minutes))
+            )
+        except ValueError:
+            return None
+
+    @staticmethod
+    def __decodeDataCoding(dcs):
+        """
+        Decodes TP-DCS
+
+        :param dcs: data coding scheme
+        :return: tuple (alphabet, message class or None)
+        """
+        group = dcs >> 4
+
+        #general data coding and automatic deletion groups
+        if group < 0x08:
+            alphabet     = (dcs >> 2) & 0x03
+            messageClass = (dcs & 0x03) if (dcs & 0x10) else None
+
+            #reserved value
+            if alphabet > SimSmsDataCoding.UCS2:
+                alphabet = SimSmsDataCoding.GSM_7BIT
+
+            return alphabet, messageClass
+
+        #message waiting indication groups
+        if group in (0x0C, 0x0D):
+            return SimSmsDataCoding.GSM_7BIT, None
+
+        if group == 0x0E:
+            return SimSmsDataCoding.UCS2, None
+
+        #data coding / message class group
+        if group == 0x0F:
+            return (SimSmsDataCoding.DATA_8BIT if (dcs & 0x04) else SimSmsDataCoding.GSM_7BIT), dcs & 0x03
+
+        return SimSmsDataCoding.GSM_7BIT, None
+
+    def __decodeUserData(self, message, data, offset, hasUdh):
+        """
+        Decodes TP-UDL and TP-UD of SMS-DELIVER
+
+        :param message: message for filling
+        :param data: PDU bytes
+        :param offset: offset of TP-UDL
+        :param hasUdh: True when TP-UD starts with user data header
+        :return: nothing
+        """
+        udl = data[offset]
+        ud  = data[offset + 1:]
+
+        #TP-UDL is count of septets for 7 bit alphabet and count of octets for other encodings
+        udLength = (udl * 7 + 7) // 8 if message.encoding == SimSmsDataCoding.GSM_7BIT else udl
+        if len(ud) < udLength:
+            raise ValueError("user data is truncated ({0} bytes instead of {1})".format(len(ud), udLength))
+
+        lockingShift = SimGsmNationalLanguage.DEFAULT
+        singleShift  = SimGsmNationalLanguage.DEFAULT
+
+        udhLength = 0
+        if hasUdh and (len(ud) > 0):
+            udhLength = ud[0] + 1
+
+            i = 1
+            while i + 1 < udhLength:
+                iei, length = ud[i], ud[i + 1]
+                value       = ud[i + 2 : i + 2 + length]
+
+                #concatenated message (8 bit and 16 bit reference)
+                if (iei == 0x00) and (length == 3):
+                    message.concatReference = value[0]
+                    message.partsCount      = value[1]
+                    message.partNumber      = value[2]
+                elif (iei == 0x08) and (length == 4):
+                    message.concatReference = (value[0] << 8) | value[1]
+                    message.partsCount      = value[2]
+                    message.partNumber      = value[3]
+                elif (iei == 0x24) and (length == 1):
+                    singleShift  = value[0]
+                elif (iei == 0x25) and (length == 1):
+                    lockingShift = value[0]
+
+                i += 2 + length
+
+        if message.encoding == SimSmsDataCoding.GSM_7BIT:
+            #UDH is padded with fill bits to septets boundary
+            udhSeptets   = (udhLength * 8 + 6) // 7
+            septets      = unpack7Bits(ud[udhLength:], max(udl - udhSeptets, 0), udhSeptets * 7 - udhLength * 8)
+
+            message.data = septets
+            message.text = decodeGsm7Bits(septets, lockingShift, singleShift)
+            return
+
+        message.data = bytes(ud[udhLength:udl])
+        if message.encoding == SimSmsDataCoding.UCS2:
+            message.text = message.data.decode("utf-16-be", "replace")
+
+    def __decodeDeliver(self, data, offset, smsCenterNumber):
+        message = SimSmsDeliverMessage()
+        message.smsCenterNumber = smsCenterNumber
+
+        firstOctet = data[offset]
+        message.moreMessagesToSend     = not (firstOctet & 0x04)
+        message.statusReportIndication = bool(firstOctet & 0x20)
+        message.replyPath              = bool(firstOctet & 0x80)
+
+        #TP-OA (originating address)
+        digitsCount        = data[offset + 1]
+        message.senderType = data[offset + 2]
+        addressEnd         = offset + 3 + (digitsCount + 1) // 2
+        message.sender     = self.__decodeAddress(data[offset + 3 : addressEnd], digitsCount, message.senderType)
+
+        #TP-PID, TP-DCS, TP-SCTS
+        message.protocolId = data[addressEnd]
+        message.dataCoding = data[addressEnd + 1]
+        message.encoding, message.messageClass = self.__decodeDataCoding(message.dataCoding)
+        message.timestamp  = self.__decodeTimestamp(data[addressEnd + 2 : addressEnd + 9])
+
+        self.__decodeUserData(message, data, addressEnd + 9, bool(firstOctet & 0x40))
+        return message
+
+    def __decodeStatusReport(self, data, offset, smsCenterNumber):
+        report = SimSmsStatusReport()
+        report.smsCenterNumber  = smsCenterNumber
+        report.messageReference = data[offset + 1]
+
+        #TP-RA (recipient address)
+        digitsCount          = data[offset + 2]
+        report.recipientType = data[offset + 3]
+        addressEnd           = offset + 4 + (digitsCount + 1) // 2
+        report.recipient     = self.__decodeAddress(data[offset + 4 : addressEnd], digitsCount, report.recipientType)
+
+        #TP-SCTS, TP-DT, TP-ST
+        report.timestamp     = self.__decodeTimestamp(data[addressEnd : addressEnd + 7])
+        report.dischargeTime = self.__decodeTimestamp(data[addressEnd + 7 : addressEnd + 14])
+        report.status        = data[addressEnd + 14]
+
+        return report
+
+    def decode(self, pdu, hasSca = True):
+        """
+        Decodes received PDU (SMS-DELIVER or SMS-STATUS-REPORT)
+
+        :param pdu: PDU as hex string or bytes
+        :param hasSca: True when PDU starts with SCA (like in AT+CMGL and AT+CMGR responses)
+        :return: SimSmsDeliverMessage, SimSmsStatusReport or None when PDU can't be decoded
+        """
+        self.clearError()
+
+        try:
+            data = bytes.fromhex(pdu) if isinstance(pdu, str) else bytes(pdu)
+
+            #SCA (length in bytes, type of address, semi-octets)
+            smsCenterNumber = ""
+            offset          = 0
+            if hasSca:
+                scaLength = data[0]
+                offset    = scaLength + 1
+                if scaLength > 1:
+                    smsCenterNumber = self.__decodeAddress(data[2:offset], (scaLength - 1) * 2, data[1])
+
+            messageType = data[offset] & 0x03
+            if messageType == SimSmsMessageType.DELIVER:
+                return self.__decodeDeliver(data, offset, smsCenterNumber)
+
+            if messageType == SimSmsMessageType.STATUS_REPORT:
+                return self.__decodeStatusReport(data, offset, smsCenterNumber)
+
+            self.setError("unsupported message type: {0}".format(messageType))
+            return None
+        except (ValueError, IndexError) as e:
+            self.setError("error decoding PDU: {0}".format(e))
+            return None
+
 class SimGsmSmsHandler(SimGsm):
-    def __init__(self, port, logger):
-        SimGsm.__init__(self, port, logger)
+    def __init__(self, port, logger, **kwargs):
+        super().__init__(port, logger, **kwargs)
 
         self.sendingResult = ""
 
@@ -640,7 +1227,8 @@ class SimGsmSmsHandler(SimGsm):
             self.setError("error compiling PDU sms")
             return False
 
-        piece = 1
+        self.logger.info("sendPduMessage(): sending message in {0} part(s)".format(len(d)))
+
         for (sca, pdu,) in d:
             self.logger.info("sendSms(): sca + pdu = \"{0}\"".format(sca + pdu))
             if not self.__sendPduMessageLow(sca, pdu, numberOfAttempts):
@@ -651,3 +1239,140 @@ class SimGsmSmsHandler(SimGsm):
 
 
         return True
+
+    def __deleteMessages(self, indexes):
+        """
+        Deletes messages from module storage. Delete commands are concatenated in long command lines, when command line
+        fails messages from it are deleted one by one.
+
+        :param indexes: indexes of messages
+        :return: True when all messages were deleted
+        """
+        groups = []
+        group  = []
+        length = 2
+        for index in indexes:
+            commandLength = len(";+CMGD={0}".format(index))
+            if (len(group) > 0) and (length + commandLength > SimGsmPipelining.MAX_COMMAND_LINE_LENGTH):
+                groups.append(group)
+                group  = []
+                length = 2
+
+            group.append("AT+CMGD={0}".format(index))
+            length += commandLength
+
+        if len(group) > 0:
+            groups.append(group)
+
+        for group in groups:
+            if self.execSimpleOkCommand(self.joinCommands(group), 1000 + 500 * len(group)):
+                continue
+
+            if len(group) == 1:
+                return False
+
+            for command in group:
+                if not self.execSimpleOkCommand(command, 1500):
+                    return False
+
+        return True
+
+    def __parseListingHeader(self, line):
+        """
+        Parses '+CMGL: <index>,<stat>,[<alpha>],<length>' header of listed message
+
+        :param line: header line
+        :return: tuple (index, status) or None when header is malformed
+        """
+        values = line[len("+CMGL:"):].split(",")
+        try:
+            return int(values[0]), int(values[1])
+        except (IndexError, ValueError):
+            self.setError("drainInbox(): malformed message header '{0}'".format(line))
+            return None
+
+    def __finishDraining(self, delete, handled, failed):
+        """
+        Checks result of messages listing and deletes handled messages. All listed messages are read after listing, so
+        when there were no failed messages they are deleted with single command (messages which were received after
+        listing are unread, so they will not be deleted), otherwise messages are deleted by indexes.
+
+        :param delete: when True handled messages will be deleted
+        :param handled: indexes of handled messages
+        :param failed: count of listed messages which were not handled
+        :return: nothing
+        """
+        if self.lastResult != "OK":
+            self.setError("error listing messages: {0}".format(self.lastResult))
+            return
+
+        if (not delete) or (len(handled) == 0):
+            return
+
+        if failed == 0:
+            if not self.execSimpleOkCommand("AT+CMGD=1,1", 5000):
+                self.setError("error deleting read messages")
+
+            return
+
+        if not self.__deleteMessages(handled):
+            self.setError("error deleting messages")
+
+    def drainInbox(self, delete = True, maxWaitTime = 20000):
+        """
+        Generator which reads all received messages from module storage with single AT+CMGL command (PDU mode).
+        Messages are returned as soon as they are received and decoded. When iteration is finished, handled messages
+        are deleted: with single AT+CMGD command (delete flag 1 - all read messages) when all listed messages were
+        decoded, otherwise by indexes. Nothing is deleted when iteration is stopped before end of listing.
+
+        :param delete: when True handled messages will be deleted
+        :param maxWaitTime: max wait time for messages listing
+        :return: received messages (SimSmsDeliverMessage or SimSmsStatusReport)
+        """
+        if not self.execSimpleOkCommand("AT+CMGF=0", 1000):
+            self.setError("error tuning module for sms reading")
+            return
+
+        decoder  = SimSmsPduDecoder()
+        handled  = []
+        failed   = 0
+        header   = None
+
+        for line in self.commandLines("AT+CMGL={0}".format(SimSmsStorageStatus.ALL), maxWaitTime):
+            line = line.strip()
+            if len(line) == 0:
+                continue
+
+            #'+CMGL: <index>,<stat>,[<alpha>],<length>' is followed by line with PDU
+            if line.startswith("+CMGL:"):
+                #entry with malformed header is skipped (and it's not deleted)
+                header = self.__parseListingHeader(line)
+                if header is None:
+                    failed += 1
+
+                continue
+
+            if header is None:
+                self.logger.debug("drainInbox(): skipping line '%s'", line)
+                continue
+
+            index, status = header
+            header        = None
+
+            #stored messages which are waiting for sending (or was sent) are not received messages
+            if status not in (SimSmsStorageStatus.RECEIVED_UNREAD, SimSmsStorageStatus.RECEIVED_READ):
+                continue
+
+            message = decoder.decode(line)
+            if message is None:
+                self.setWarn("drainInbox(): error decoding message {0}: {1}".format(index, decoder.errorText))
+                failed += 1
+                continue
+
+            message.index         = index
+            message.storageStatus = status
+
+            yield message
+            handled.append(index)
+
+        self.__finishDraining(delete, handled, failed)
\ No newline at end of file
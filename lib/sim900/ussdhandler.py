@@ -30,16 +30,24 @@ Copyright (C) 2014-2015 Bohdan Danishevsky ( dbn@aminis.com.ua ) All Rights Rese
 """
 
 from lib.sim900.gsm import SimGsm
-from lib.sim900.simshared import *
 
 class SimUssdHandler(SimGsm):
-    def __init__(self, port, logger):
-        SimGsm.__init__(self, port, logger)
+    def __init__(self, port, logger, **kwargs):
+        super().__init__(port, logger, **kwargs)
         self.lastUssdResult = None
 
+        #data coding scheme of last USSD result
+        self.lastUssdDcs    = None
+
     @staticmethod
-    def __parseResult(value):
-        #parsing strings like '+CUSD: 0,"data string"'
+    def parseUssdResult(value):
+        """
+        Parses USSD command result
+
+        :param value: strings like '+CUSD: 0,"data string",15'
+        :return: tuple with USSD result text and data coding scheme (None when module did not report it) or None on
+            parsing error
+        """
 
         #searching and removing '+CUSD' prefix
         idx = value.find(":")
@@ -65,15 +73,45 @@ class SimUssdHandler(SimGsm):
 
         data = str(data).strip()
 
-        data = data.rstrip(',')
-        data = data.strip('"')
+        #result text is quoted string which can contain commas and quotes, so it's finished by last quote
+        end = data.rfind("\"")
+        if (not data.startswith("\"")) or (end < 1):
+            return None
+
+        text = data[1:end]
+        dcs  = data[(end+1):].strip()
+
+        if len(dcs) == 0:
+            return text, None
+
+        dcs = dcs.lstrip(",").strip()
+        if not dcs.isdigit():
+            return None
 
-        return data
+        return text, int(dcs)
+
+    def __storeUssdResult(self, value):
+        """
+        Parses USSD command result and stores it in lastUssdResult (text) and lastUssdDcs (data coding scheme)
+
+        :param value: strings like '+CUSD: 0,"data string",15'
+        :return: True if result was parsed, otherwise returns False
+        """
+        ret = self.parseUssdResult(value)
+        if ret is None:
+            self.setWarn("error parsing USSD command result: '{0}'".format(value))
+            return False
+
+        self.lastUssdResult, self.lastUssdDcs = ret
+        return True
 
     def runUssdCode(self, ussdCode):
         cmd = "AT+CUSD=1,\"{0}\",15".format(ussdCode)
         self.logger.info("running command = '{0}'".format(cmd))
 
+        #result of previous USSD request which was received too late must not be taken as result of this request
+        self.discardPendingUrcs("+CUSD")
+
         #executing command, also we can retrieve result right here
         result = self.commandAndStdResult(cmd, 20000)
 
@@ -85,42 +123,15 @@ class SimUssdHandler(SimGsm):
 
         #checking that we have result here
         if len(result) > 0:
-            self.lastUssdResult = self.__parseResult(result)
+            return self.__storeUssdResult(result)
 
-            if self.lastUssdResult is None:
-                self.setWarn("error parsing USSD command result")
-                return False
-
-            return True
-
-        #reading data line
-        dataLine = self.readNullTerminatedLn(20000)
+        #result is received later as unsolicited result code (it can be already received by URC router), lines of
+        #USSD text with line breaks are joined by URC router
+        dataLine = self.readUrcLine("+CUSD", 20000)
 
         if dataLine is None:
             self.setWarn("error waiting for USSD command result")
             return False
 
-        dataLine = str(dataLine).strip()
-
-        #reading bytes in the end of response
-        data = self.readFixedSzieByteArray(1, 500)
-        if data == bytes([0xff]):
-            data = None
-
-        endLine = self.readLn(500)
-
-        if (data is not None) or (endLine is not None):
-            endLine = noneToEmptyString(data) + noneToEmptyString(endLine)
-            endLine = str(endLine).strip()
-
-            if len(endLine) > 0:
-                dataLine += endLine
-
         #parsing CUSD result
-        self.lastUssdResult = self.__parseResult(dataLine)
-
-        if self.lastUssdResult is None:
-            return False
-
-        return True
-
+        return self.__storeUssdResult(dataLine)
\ No newline at end of file
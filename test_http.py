@@ -1,7 +1,6 @@
 #!/usr/bin/python3
 
 from test_shared import *
-from lib.sim900.inetgsm import SimInetGSM
 
 COMPORT_NAME            = "com22"
 
@@ -27,9 +26,9 @@ def main():
     if d is None:
         return False
 
-    (gsm, imei) = d
+    (session, imei) = d
 
-    inet = SimInetGSM(port, logger)
+    inet = session.inet
 
     logger.info("attaching GPRS")
     if not inet.attachGPRS("internet", "", "", 1):
@@ -82,7 +81,7 @@ def main():
         logger.error("error detaching GRPS: {0}".format(inet.errorText))
         return False
 
-    gsm.closePort()
+    session.closePort()
     return True
 
 if __name__ == "__main__":
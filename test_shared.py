@@ -1,8 +1,8 @@
 import serial
 import logging
 import sys
-from lib.sim900.gsm import SimGsm, SimGsmPinRequestState
-from lib.sim900.imei import SimImeiRetriever
+from lib.sim900.gsm import SimGsmPinRequestState
+from lib.sim900.session import SimGsmSession
 
 def initializeUartPort(
         portName,
@@ -44,8 +44,9 @@ def initializeLogs(loggerLevel, consoleLoggerLevel):
     return (formatter, logger, consoleLogger,)
 
 def baseOperations(port, logger):
-    #class for general functions
-    gsm = SimGsm(port, logger)
+    #session shared by all handlers
+    session = SimGsmSession(port, logger)
+    gsm     = session.gsm
 
     #opening COM port
     logger.info("opening port")
@@ -69,7 +70,7 @@ def baseOperations(port, logger):
         logger.debug("PIN OK")
 
     #retrieving IMEI
-    sim = SimImeiRetriever(port, logger)
+    sim = session.imei
     logger.info("retrieving IMEI")
     imei = sim.getIMEI()
     if imei is None:
@@ -78,4 +79,4 @@ def baseOperations(port, logger):
 
     logger.info("IMEI = {0}".format(imei))
 
-    return (gsm, imei)
\ No newline at end of file
+    return (session, imei)
\ No newline at end of file
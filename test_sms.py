@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 from test_shared import *
-from lib.sim900.smshandler import SimGsmSmsHandler, SimSmsPduCompiler
+from lib.sim900.smshandler import SimSmsPduCompiler
 import random
 
 COMPORT_NAME            = "com22"
@@ -54,10 +54,10 @@ def main():
     if d is None:
         return False
 
-    (gsm, imei) = d
+    (session, imei) = d
 
     #creating object for SMS sending
-    sms = SimGsmSmsHandler(port, logger)
+    sms = session.sms
 
     #ASCII
     logger.info("sending ASCII (Latin-1) SMS")
@@ -106,7 +106,7 @@ def main():
     if not sendSms(sms, pduHelper, logger):
         return False
 
-    gsm.closePort()
+    session.closePort()
     return True
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 import logging
 
 from test_shared import initializeLogs, initializeUartPort, baseOperations
-from lib.sim900.smshandler import SimGsmSmsHandler, SimSmsPduCompiler
+from lib.sim900.smshandler import SimSmsPduCompiler
 
 
 def printScaPlusPdu(pdu, logger):
@@ -65,10 +65,10 @@ def main():
     if d is None:
         return False
 
-    (gsm, imei) = d
+    (session, imei) = d
 
     # creating object for SMS sending
-    sms = SimGsmSmsHandler(port, logger)
+    sms = session.sms
 
     # ASCII
     logger.info("sending sms")
@@ -83,7 +83,7 @@ def main():
     if not sendSms(sms, pduHelper, logger):
         return False
 
-    gsm.closePort()
+    session.closePort()
     return True
 
 
@@ -1,6 +1,5 @@
 #!/usr/bin/python3
 from test_shared import *
-from lib.sim900.ussdhandler import SimUssdHandler
 import re
 from lib.sim900.simshared import *
 
@@ -59,9 +58,9 @@ def main():
     if d is None:
         return False
 
-    (gsm, imei) = d
+    (session, imei) = d
 
-    ussd = SimUssdHandler(port, logger)
+    ussd = session.ussd
     logger.info("running USSD code")
 
     #calling USSD command for balance information retrieving ( 'life :)' cell operator from Ukraine )
@@ -79,7 +78,7 @@ def main():
     else:
         logger.warn("balance retrieving error")
 
-    gsm.closePort()
+    session.closePort()
     return True
 
 if __name__ == "__main__":
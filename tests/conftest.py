@@ -0,0 +1,28 @@
+"""
+Fixtures for tests against SIM900 emulator (pseudo terminal, POSIX systems only)
+"""
+
+import logging
+import pytest
+from lib.sim900.emulator import SimGsmEmulator
+from test_shared import initializeUartPort
+
+
+@pytest.fixture
+def logger():
+    return logging.getLogger("tests")
+
+
+@pytest.fixture
+def emulator(logger):
+    emulator = SimGsmEmulator(logger, seed = 1)
+    if not emulator.start():
+        pytest.skip("emulator is not available: {0}".format(emulator.errorText))
+
+    yield emulator
+    emulator.stop()
+
+
+@pytest.fixture
+def port(emulator):
+    return initializeUartPort(emulator.portName)
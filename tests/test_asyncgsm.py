@@ -0,0 +1,88 @@
+import asyncio
+from lib.sim900.asyncgsm import AsyncSimGsm
+from lib.sim900.emulator import SimGsmEmulatorFaultKind
+
+
+def runWithClient(port, logger, operation):
+    async def run():
+        gsm = AsyncSimGsm(port, logger)
+        assert await gsm.openPort()
+
+        try:
+            assert await gsm.begin(2)
+            return await operation(gsm)
+        finally:
+            await gsm.closePort()
+
+    return asyncio.run(run())
+
+
+def testRunUssdCode(emulator, port, logger):
+    async def operation(gsm):
+        assert await gsm.runUssdCode("*111#")
+        assert gsm.lastUssdResult == "Balance 10.00"
+        assert gsm.lastUssdDcs == 15
+
+    runWithClient(port, logger, operation)
+
+
+def testHttpPost(emulator, port, logger):
+    requests = []
+
+    def response(method, url, data):
+        requests.append((method, url, data))
+        return 200, b"accepted"
+
+    emulator.httpResponses["example.com:80/post"] = response
+
+    async def operation(gsm):
+        assert await gsm.httpPOST("example.com", 80, "/post", "a=1&b=2")
+        assert gsm.httpResult == 200
+        assert gsm.httpResponse == "accepted"
+
+    emulator.bearers[1] = "10.0.0.2"
+    runWithClient(port, logger, operation)
+
+    assert requests == [(1, "example.com:80/post", b"a=1&b=2")]
+
+
+def testUrcIsRemovedFromCommandResponse(emulator, port, logger):
+    async def operation(gsm):
+        emulator.sendUrc("+CMTI: \"SM\",3")
+        assert await gsm.command("AT+GSN", 1000) is not None
+        assert "+CMTI" not in "".join(gsm.lastResponseLines)
+
+        assert await gsm.readUrcLine("+CMTI", 100) == "+CMTI: \"SM\",3"
+
+    runWithClient(port, logger, operation)
+
+
+def testStaleUssdResultIsIgnored(emulator, port, logger):
+    emulator.ussdResultAsUrc = True
+    emulator.ussdResponses["*100#"] = "1. Balance\r\n2. Exit"
+
+    async def operation(gsm):
+        # late result of previous request is received between commands
+        emulator.sendUrc("+CUSD: 0,\"Stale result\",15")
+        await asyncio.sleep(0.2)
+
+        assert await gsm.runUssdCode("*100#")
+        assert gsm.lastUssdResult == "1. Balance\n2. Exit"
+
+    runWithClient(port, logger, operation)
+
+
+def testLateResponseIsDropped(emulator, port, logger):
+    async def operation(gsm):
+        emulator.injectFault("+GSN", SimGsmEmulatorFaultKind.TIMEOUT, count = 1)
+        assert await gsm.command("AT+GSN", 200) is None
+
+        # response of timed out command arrives late
+        emulator.sendUrc("OK")
+        await asyncio.sleep(0.2)
+
+        imei = await gsm.getIMEI()
+        assert (imei is not None) and imei.isdigit()
+        assert await gsm.readDataLine(100) is None
+
+    runWithClient(port, logger, operation)
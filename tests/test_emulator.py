@@ -0,0 +1,83 @@
+import pytest
+from lib.sim900.emulator import SimGsmEmulatorFaultKind
+from lib.sim900.gsm import SimGsmSerialPortHandler
+
+
+@pytest.fixture
+def handler(port, logger):
+    handler = SimGsmSerialPortHandler(port, logger)
+    assert handler.openPort()
+    assert handler.execSimpleOkCommand("ATE0")
+
+    yield handler
+    handler.closePort()
+
+
+def testResults(emulator, handler):
+    assert handler.commandAndStdResult("AT") == ""
+    assert handler.lastResult == "OK"
+
+    assert handler.commandAndStdResult("AT+GSN").strip() == emulator.imei
+    assert handler.lastResult == "OK"
+
+    handler.commandAndStdResult("AT+UNKNOWN")
+    assert handler.lastResult == "ERROR"
+
+    handler.commandAndStdResult("ATD*99#")
+    assert handler.lastResult == "ERROR"
+
+
+def testCmeErrors(handler):
+    assert handler.execSimpleOkCommand("AT+CMEE=1")
+    handler.commandAndStdResult("AT+CPIN=\"1234\"")
+    assert handler.lastResult == "+CME ERROR: 100"
+
+    assert handler.execSimpleOkCommand("AT+CMEE=2")
+    handler.commandAndStdResult("AT+UNKNOWN")
+    assert handler.lastResult == "+CME ERROR: unknown"
+
+
+def testPipelinedCommands(emulator, handler):
+    assert handler.execSimpleOkCommand("ATV1+CMEE=1;+CMGF=1;+CSCS=\"GSM\"")
+    assert (emulator.verbose, emulator.cmee, emulator.cmgf, emulator.cscs) == (True, 1, 1, "GSM")
+
+    # command line is not executed after failed command
+    handler.commandAndStdResult("AT+CMGF=0;+UNKNOWN;+CMEE=0")
+    assert handler.lastResult == "+CME ERROR: 100"
+    assert (emulator.cmgf, emulator.cmee) == (0, 1)
+
+
+def testFaults(emulator, handler):
+    emulator.injectFault("+GSN", SimGsmEmulatorFaultKind.ERROR, count = 1)
+    handler.commandAndStdResult("AT+GSN")
+    assert handler.lastResult == "ERROR"
+
+    emulator.injectFault("+GSN", SimGsmEmulatorFaultKind.TIMEOUT, count = 1)
+    assert handler.commandAndStdResult("AT+GSN", 300) is None
+
+    assert handler.commandAndStdResult("AT+GSN").strip() == emulator.imei
+
+
+def testResetFault(emulator, handler):
+    assert handler.execSimpleOkCommand("AT+CMGF=1")
+
+    emulator.injectFault("AT", SimGsmEmulatorFaultKind.RESET, count = 1)
+    assert handler.commandAndStdResult("AT", 300) is None
+    assert handler.readUrcLine("RDY") == "RDY"
+    assert (emulator.echo, emulator.cmgf) == (True, 0)
+
+
+def testUrcInjection(emulator, handler):
+    received = []
+    handler.registerUrcHandler("RING", received.append)
+
+    emulator.sendUrc("RING")
+    assert emulator.receiveSms("0011000B911326880736F40000AA0AE8329BFD4697D9EC37") == 1
+
+    assert handler.readUrcLine("+CMTI", 1000) == "+CMTI: \"SM\",1"
+    assert received == ["RING"]
+
+    # result codes received before command response are not mixed with response
+    emulator.sendUrc("+CUSD: 0,\"Hello\",15")
+    assert handler.commandAndStdResult("AT+GSN").strip() == emulator.imei
+    assert handler.readUrcLine("+CUSD") == "+CUSD: 0,\"Hello\",15"
@@ -0,0 +1,66 @@
+import threading
+import serial
+from lib.sim900.emulator import SimGsmEmulatorFaultKind
+from lib.sim900.gsm import SimGsm
+from lib.sim900.serialreader import SimSerialReaderThread
+
+
+def readerThreads():
+    return [thread for thread in threading.enumerate() if thread.name == "sim-serial-reader"]
+
+
+def testReaderIsNotStartedForClosedPort(emulator, port, logger, monkeypatch):
+    started = []
+    start   = SimSerialReaderThread.start
+
+    def countingStart(self):
+        started.append(self)
+        start(self)
+
+    monkeypatch.setattr(SimSerialReaderThread, "start", countingStart)
+
+    handler = SimGsm(port, logger, useReaderThread = True)
+    assert handler.openPort()
+    assert handler.begin(2)
+
+    handler.closePort()
+    assert handler.readLn(100) is None
+    assert len(started) == 1
+
+
+def testReaderErrorIsReported(emulator, port, logger):
+    handler = SimGsm(port, logger, useReaderThread = True)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+
+        def brokenRead(size = 1):
+            raise serial.SerialException("device disconnected")
+
+        port.read = brokenRead
+        for thread in readerThreads():
+            thread.join(1)
+
+        assert handler.commandAndStdResult("AT", 1000) is None
+        assert "device disconnected" in str(handler.errorText)
+    finally:
+        del port.read
+        handler.closePort()
+
+
+def testStreamedCommandTimeoutInvalidatesSettings(emulator, port, logger):
+    handler = SimGsm(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+        assert handler.execSimpleOkCommand("AT+CMGF=0")
+        assert handler.isSettingCached("AT+CMGF=0")
+
+        emulator.injectFault("+CMGL", SimGsmEmulatorFaultKind.TIMEOUT, count = 1)
+        assert list(handler.commandLines("AT+CMGL=4", 500)) == []
+        assert handler.lastResult is None
+        assert not handler.isSettingCached("AT+CMGF=0")
+    finally:
+        handler.closePort()
@@ -0,0 +1,78 @@
+import pytest
+from lib.sim900.emulator import SimGsmEmulatorFaultKind
+from lib.sim900.inetgsm import SimInetGSM
+
+
+@pytest.fixture
+def inet(emulator, port, logger):
+    emulator.httpResponses["example.com:80/x"] = (200, b"hello")
+
+    handler = SimInetGSM(port, logger)
+    assert handler.openPort()
+    assert handler.begin(2)
+    assert handler.attachGPRS("internet", "", "")
+
+    yield handler
+    handler.closePort()
+
+
+def httpCommands(emulator):
+    ret = [command for command in emulator.commandsLog if command in ("AT+HTTPINIT", "AT+HTTPTERM")]
+    del emulator.commandsLog[:]
+
+    return ret
+
+
+def testHttpSessionIsReused(emulator, inet):
+    assert inet.httpGet("example.com", 80, "/x")
+    assert inet.isHttpInitialized
+    assert httpCommands(emulator) == ["AT+HTTPTERM", "AT+HTTPINIT"]
+
+    assert inet.httpGet("example.com", 80, "/x")
+    assert inet.httpResponse == "hello"
+    assert httpCommands(emulator) == []
+
+
+def testTerminatedHttpSession(emulator, inet):
+    assert inet.httpGet("example.com", 80, "/x")
+    assert inet.terminateHttpRequest()
+    assert not inet.isHttpInitialized
+
+    httpCommands(emulator)
+    assert inet.httpGet("example.com", 80, "/x")
+    assert httpCommands(emulator) == ["AT+HTTPTERM", "AT+HTTPINIT"]
+
+
+def testHttpSessionAfterFailedRequest(emulator, inet):
+    assert inet.httpGet("example.com", 80, "/x")
+
+    emulator.injectFault("+HTTPREAD", SimGsmEmulatorFaultKind.ERROR, count = 1)
+    assert not inet.httpGet("example.com", 80, "/x")
+    assert not inet.isHttpInitialized
+
+    httpCommands(emulator)
+    assert inet.httpGet("example.com", 80, "/x")
+    assert inet.httpResponse == "hello"
+    assert httpCommands(emulator) == ["AT+HTTPTERM", "AT+HTTPINIT"]
+
+
+def testHttpSessionTerminatedByModule(emulator, inet):
+    assert inet.httpGet("example.com", 80, "/x")
+
+    # module drops HTTP session (like after restart of HTTP service)
+    emulator.httpParams = None
+    httpCommands(emulator)
+
+    assert inet.httpPOST("example.com", 80, "/x", "a=1")
+    assert inet.httpResponse == "hello"
+    assert httpCommands(emulator) == ["AT+HTTPTERM", "AT+HTTPINIT"]
+
+
+def testStaleHttpActionIsIgnored(emulator, inet):
+    # late result of previous request is received during other command and kept by URC router
+    emulator.sendUrc("+HTTPACTION: 0,500,0")
+    assert inet.execSimpleOkCommand("AT")
+
+    assert inet.httpGet("example.com", 80, "/x")
+    assert inet.httpResult == 200
+    assert inet.httpResponse == "hello"
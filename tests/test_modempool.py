@@ -0,0 +1,35 @@
+import time
+from lib.sim900.gsm import SimGsm
+from lib.sim900.modempool import SimModemPool, SimModemState
+
+
+def waitForState(pool, state, timeout = 10.0):
+    start = time.time()
+    while time.time() - start < timeout:
+        if pool.modemsState()[0]["state"] == state:
+            return True
+
+        time.sleep(0.01)
+
+    return False
+
+
+def testModemRecovery(emulator, port, logger):
+    pool = SimModemPool([SimGsm(port, logger)], logger, maxFailures = 1, recoveryInterval = 0.1, beginAttempts = 2)
+    pool.start()
+
+    try:
+        assert waitForState(pool, SimModemState.HEALTHY)
+
+        # failed task removes module from rotation
+        assert pool.submit(lambda handler: False).result(10) is False
+        assert pool.modemsState()[0]["failedCount"] == 1
+
+        # module is initialized again (port is reopened) and returned to rotation
+        future = pool.submit("execSimpleOkCommand", "AT")
+        assert future.result(10) is True
+        assert waitForState(pool, SimModemState.HEALTHY)
+        assert pool.modemsState()[0]["failures"] == 0
+        assert emulator.commandsLog.count("ATV1+CMEE=0") == 2
+    finally:
+        pool.stop(10)
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from lib.sim900.gsm import SimGsm
+from lib.sim900.session import SimGsmSession
+
+RECEIVED_PDU = "07911326040011F5240B911326880736F40000111081017362401654747A0E4ACF41F4329E0E6A97E7F3F0B90C8A01"
+
+
+@pytest.fixture
+def session(emulator, port, logger):
+    session = SimGsmSession(port, logger)
+    assert session.openPort()
+
+    yield session
+    session.closePort()
+
+
+def testHandlerIsInitializedOnce(port, logger, monkeypatch):
+    calls = []
+    init  = SimGsm.__init__
+
+    def countingInit(self, *args, **kwargs):
+        calls.append(self)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(SimGsm, "__init__", countingInit)
+    SimGsmSession(port, logger)
+
+    assert len(calls) == 1
+
+
+def testBeginUpgradesBaudRate(emulator, session):
+    emulator.baudRate = 57600
+
+    assert session.begin(2, upgradeBaudRate = True, maxBaudRate = 115200)
+    assert "AT+IPR=115200" in emulator.commandsLog
+    assert emulator.baudRate == 115200
+    assert session.handler.portBaudRate == 115200
+
+
+def testGeneratorResultReleasesLock(emulator, session):
+    assert session.begin(2)
+    for i in range(3):
+        emulator.receiveSms(RECEIVED_PDU)
+
+    messages = session.sms.drainInbox()
+    assert len(messages) == 3
+    assert emulator.storedMessages == {}
+
+    # lock is not held after call, so other threads can use session
+    acquired = []
+
+    def useSession():
+        if session.lock.acquire(timeout = 1):
+            acquired.append(True)
+            session.lock.release()
+
+    thread = threading.Thread(target = useSession)
+    thread.start()
+    thread.join()
+
+    assert acquired == [True]
@@ -0,0 +1,27 @@
+from lib.sim900.simmetrics import SimGsmMetricsRegistry
+
+
+def testNormalizeCommand():
+    assert SimGsmMetricsRegistry.normalizeCommand("AT+CMGS=23") == "AT+CMGS"
+    assert SimGsmMetricsRegistry.normalizeCommand("at+cmgf=0") == "AT+CMGF"
+    assert SimGsmMetricsRegistry.normalizeCommand("AT") == "AT"
+    assert SimGsmMetricsRegistry.normalizeCommand("0011000B911326880736F4") == SimGsmMetricsRegistry.DATA_COMMAND
+
+
+def testNormalizePipelinedCommand():
+    assert SimGsmMetricsRegistry.normalizeCommand("ATV1+CMEE=0") == "ATV;+CMEE"
+    assert SimGsmMetricsRegistry.normalizeCommand("ATE0V1+CMEE=0;+CMGF=1") == "ATE;V;+CMEE;+CMGF"
+
+
+def testNormalizeQuotedParameters():
+    assert SimGsmMetricsRegistry.normalizeCommand("AT+CUSD=1,\"*1;1#\",15") == "AT+CUSD"
+    assert SimGsmMetricsRegistry.normalizeCommand("AT+HTTPPARA=\"URL\",\"host/a;b\";+CMGF=1") == "AT+HTTPPARA;+CMGF"
+
+
+def testUnknownCommandLabel():
+    registry = SimGsmMetricsRegistry()
+    for number in ("*99#", "+380971234567;", "\"unterminated"):
+        registry.observe("ATD" + number, "OK", 5.0)
+
+    assert list(registry.toDict().keys()) == [SimGsmMetricsRegistry.OTHER_COMMAND]
+    assert "command=\"OTHER\",result=\"OK\"} 3" in registry.toPrometheus()
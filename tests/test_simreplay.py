@@ -0,0 +1,73 @@
+import time
+import threading
+from lib.sim900.gsm import SimGsm
+from lib.sim900.simreplay import SimRecordingTransport, SimReplayTransport, SimTraceFile, SimTraceRecordType
+
+
+def runSession(port, logger):
+    handler = SimGsm(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+        assert handler.commandAndStdResult("AT+GSN", 1000) is not None
+        assert handler.lastResult == "OK"
+
+        return handler.lastResponseLines
+    finally:
+        handler.closePort()
+
+
+def testRecordedSessionIsReplayed(emulator, port, logger, tmp_path):
+    fileName  = str(tmp_path / "session.trc")
+
+    recording = SimRecordingTransport(port, fileName)
+    recorded  = runSession(recording, logger)
+    recording.closeTrace()
+
+    replay    = SimReplayTransport(fileName, realTime = False, logger = logger)
+    assert runSession(replay, logger) == recorded
+    assert replay.mismatchCount == 0
+    assert replay.finished
+
+
+def writeTrace(fileName, records):
+    with open(fileName, "wb") as f:
+        f.write(SimTraceFile.SIGNATURE)
+        for recordType, timestamp, data in records:
+            f.write(SimTraceFile.HEADER.pack(recordType, timestamp, len(data)))
+            f.write(data)
+
+
+def testReplayReadTimeout(tmp_path):
+    fileName = str(tmp_path / "session.trc")
+    writeTrace(fileName, [
+        (SimTraceRecordType.WRITE, 0, b"AT\r\n"),
+        (SimTraceRecordType.READ, 1000, b"\r\nOK\r\n")
+    ])
+
+    replay = SimReplayTransport(fileName, realTime = False)
+    replay.open()
+
+    # timeout 0 - only available bytes are returned
+    replay.timeout = 0
+    assert replay.read(6) == b""
+
+    # timeout None - reading is blocked till all requested bytes are received
+    received = []
+    replay.timeout = None
+    reader = threading.Thread(target = lambda: received.append(replay.read(6)))
+    reader.start()
+
+    time.sleep(0.1)
+    assert received == []
+
+    replay.write(b"AT\r\n")
+    reader.join(1)
+    assert received == [b"\r\nOK\r\n"]
+
+    # positive timeout - waiting till timeout is over
+    replay.timeout = 0.05
+    start = time.monotonic()
+    assert replay.read(1) == b""
+    assert time.monotonic() - start >= 0.05
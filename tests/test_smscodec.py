@@ -0,0 +1,43 @@
+from lib.sim900.smscodec import SimGsmNationalLanguage, classifyGsm7Bits, classifiedGsm7BitsLength, encodeGsm7Bits
+from lib.sim900.smshandler import SimSmsPduCompiler
+
+TEXTS = ["Hello, world!", "price: 10€ {a|b}", "Şişli'de buluşalım ağabey", "ção Ônibus áí ~^", "Привіт", "ağ Привіт"]
+
+COMBINATIONS = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (3, 0), (1, 1), (1, 2), (3, 3)]
+
+
+def testClassifiedLengthMatchesEncoding():
+    for text in TEXTS:
+        classes = classifyGsm7Bits(text)
+        for lockingShift, singleShift in COMBINATIONS:
+            septets = encodeGsm7Bits(text, lockingShift, singleShift)
+            length  = classifiedGsm7BitsLength(text, classes, lockingShift, singleShift) if classes is not None else None
+
+            assert length == (len(septets) if septets is not None else None)
+
+
+def testNonGsmTextIsNotClassified():
+    assert classifyGsm7Bits("Привіт") is None
+    assert classifyGsm7Bits("") == []
+
+
+def testDefaultPlanUsesDefaultAlphabet():
+    plan = SimSmsPduCompiler("+380501111111", "+380501234567", "€" * 200).plan()
+
+    assert plan.is7Bits
+    assert (plan.lockingShift, plan.singleShift) == (SimGsmNationalLanguage.DEFAULT, SimGsmNationalLanguage.DEFAULT)
+
+    # national tables are not used without caller permission
+    plan = SimSmsPduCompiler("+380501111111", "+380501234567", "Şişli'de buluşalım ağabey " * 9).plan()
+    assert not plan.is7Bits
+
+
+def testPlanUsesNationalTables():
+    # 234 symbols need 4 parts in UCS2
+    compiler = SimSmsPduCompiler("+380501111111", "+380501234567", "Şişli'de buluşalım ağabey " * 9)
+    compiler.nationalLanguages = [SimGsmNationalLanguage.TURKISH, SimGsmNationalLanguage.SPANISH, SimGsmNationalLanguage.PORTUGUESE]
+    plan = compiler.plan()
+
+    assert plan.is7Bits
+    assert (plan.lockingShift, plan.singleShift) == (SimGsmNationalLanguage.DEFAULT, SimGsmNationalLanguage.TURKISH)
+    assert plan.partsCount == 2
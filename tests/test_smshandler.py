@@ -0,0 +1,114 @@
+import datetime
+import pytest
+from lib.sim900.smshandler import SimGsmSmsHandler, SimSmsDataCoding, SimSmsMessageType, SimSmsPduDecoder
+
+RECEIVED_PDU = "07911326040011F5240B911326880736F40000111081017362401654747A0E4ACF41F4329E0E6A97E7F3F0B90C8A01"
+
+
+def testMalformedListingHeaderIsSkipped(emulator, port, logger, monkeypatch):
+    handler = SimGsmSmsHandler(port, logger)
+    assert handler.openPort()
+    assert handler.begin(2)
+
+    for i in range(2):
+        emulator.receiveSms(RECEIVED_PDU)
+
+    commandLines = handler.commandLines
+
+    def corruptedLines(*args, **kwargs):
+        for line in commandLines(*args, **kwargs):
+            yield "+CMGL: x,1,,23" if line.startswith("+CMGL: 1,") else line
+
+    monkeypatch.setattr(handler, "commandLines", corruptedLines)
+    try:
+        messages = list(handler.drainInbox())
+    finally:
+        handler.closePort()
+
+    assert [message.index for message in messages] == [2]
+    assert "malformed message header" in handler.errorText
+
+    # entry which was skipped is not deleted
+    assert list(emulator.storedMessages.keys()) == [1]
+
+
+def decode(pdu):
+    decoder = SimSmsPduDecoder()
+    message = decoder.decode(pdu)
+    assert message is not None, decoder.errorText
+
+    return message
+
+
+def testDecodeDeliver():
+    message = decode("07917283010010F5040BC87238880900F10000993092516195800AE8329BFD4697D9EC37")
+
+    assert message.messageType == SimSmsMessageType.DELIVER
+    assert message.smsCenterNumber == "+27381000015"
+    assert message.sender == "27838890001"
+    assert message.encoding == SimSmsDataCoding.GSM_7BIT
+    assert message.text == "hellohello"
+    assert not message.isMultipart
+
+    timestamp = message.timestamp
+    assert (timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second) == (3, 29, 15, 16, 59)
+    assert timestamp.utcoffset() == datetime.timedelta(hours = 2)
+
+
+def testDecodeAlphanumericOriginator():
+    message = decode("07911326040011F50407D049B7F90D00001110810173624004C8329BFD")
+
+    assert message.senderType == 0xD0
+    assert message.sender == "Info"
+    assert message.text == "Hell"
+
+
+def testDecodeUcs2():
+    message = decode("07911326040011F5040B911326880736F40008111081017362400C041F04400438043204560442")
+
+    assert message.sender == "+31628870634"
+    assert message.encoding == SimSmsDataCoding.UCS2
+    assert message.text == "Привіт"
+
+
+def testDecode8Bits():
+    message = decode("07911326040011F5040B911326880736F4000411108101736240030102FF")
+
+    assert message.encoding == SimSmsDataCoding.DATA_8BIT
+    assert message.text is None
+    assert message.data == b"\x01\x02\xff"
+
+
+def testDecode7BitsWithUdh():
+    message = decode("07911326040011F5440B911326880736F400001110810173624009050003CC02019069")
+
+    assert message.text == "Hi"
+    assert message.isMultipart
+    assert (message.concatReference, message.partsCount, message.partNumber) == (0xCC, 2, 1)
+
+
+def testDecodeStatusReport():
+    report = decode("07911326040011F5062A0B911326880736F4111081017362401110810183624000")
+
+    assert report.messageType == SimSmsMessageType.STATUS_REPORT
+    assert report.messageReference == 42
+    assert report.recipient == "+31628870634"
+    assert report.status == 0
+    assert report.delivered
+    assert report.dischargeTime - report.timestamp == datetime.timedelta(minutes = 1)
+
+
+@pytest.mark.parametrize("pdu", [
+    "",
+    "ZZ",
+    "07911326040011F5040B91",
+    "07911326040011F5062A0B911326880736F4111081",
+    # user data is shorter than TP-UDL
+    "07917283010010F5040BC87238880900F10000993092516195800AE8329BFD4697D9",
+    "07911326040011F5040B911326880736F40008111081017362400C041F0440043804320456",
+])
+def testDecodeMalformedPdu(pdu):
+    decoder = SimSmsPduDecoder()
+
+    assert decoder.decode(pdu) is None
+    assert decoder.errorText.startswith("error decoding PDU")
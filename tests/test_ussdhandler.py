@@ -0,0 +1,83 @@
+from lib.sim900.ussdhandler import SimUssdHandler
+
+
+def testParseUssdResult():
+    assert SimUssdHandler.parseUssdResult("+CUSD: 0,\"Balance 10.00\",15") == ("Balance 10.00", 15)
+    assert SimUssdHandler.parseUssdResult("+CUSD: 1,\"Menu: 1, \"News\"\n2, Exit\",72") == ("Menu: 1, \"News\"\n2, Exit", 72)
+    assert SimUssdHandler.parseUssdResult("+CUSD: 0,\"No coding scheme\"") == ("No coding scheme", None)
+
+
+def testParseWrongUssdResult():
+    assert SimUssdHandler.parseUssdResult("+CUSD: 4") is None
+    assert SimUssdHandler.parseUssdResult("+CUSD: 0,Balance") is None
+    assert SimUssdHandler.parseUssdResult("+CUSD: 0,\"Balance\",x") is None
+    assert SimUssdHandler.parseUssdResult("+CMTI: \"SM\",1") is None
+
+
+def testRunUssdCode(emulator, port, logger):
+    emulator.ussdResponses["*111#"] = "Balance 5.00, bonus 1.00"
+
+    handler = SimUssdHandler(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+        assert handler.runUssdCode("*111#")
+        assert handler.lastUssdResult == "Balance 5.00, bonus 1.00"
+        assert handler.lastUssdDcs == 15
+    finally:
+        handler.closePort()
+
+
+def testRunUssdCodeWithUrcResult(emulator, port, logger):
+    emulator.ussdResultAsUrc = True
+
+    handler = SimUssdHandler(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+        assert handler.runUssdCode("*111#")
+        assert handler.lastUssdResult == "Balance 10.00"
+
+        # late result of previous request is received during other command and kept by URC router
+        emulator.sendUrc("+CUSD: 0,\"Stale result\",15")
+        assert handler.execSimpleOkCommand("AT")
+
+        emulator.ussdResponses["*100#"] = "Actual result"
+        assert handler.runUssdCode("*100#")
+        assert handler.lastUssdResult == "Actual result"
+    finally:
+        handler.closePort()
+
+
+def testMultilineUssdResultIsKeptTogether(emulator, port, logger):
+    handler = SimUssdHandler(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+
+        received = []
+        handler.registerUrcHandler("+CUSD", received.append)
+
+        emulator.sendUrc("+CUSD: 1,\"1. Balance\r\n2. Exit\",15")
+        assert handler.execSimpleOkCommand("AT")
+        assert received == ["+CUSD: 1,\"1. Balance\n2. Exit\",15"]
+    finally:
+        handler.closePort()
+
+
+def testMultilineUssdResultAsUrc(emulator, port, logger):
+    emulator.ussdResultAsUrc = True
+    emulator.ussdResponses["*100#"] = "1. Balance\r\n2. Exit"
+
+    handler = SimUssdHandler(port, logger)
+    assert handler.openPort()
+
+    try:
+        assert handler.begin(2)
+        assert handler.runUssdCode("*100#")
+        assert handler.lastUssdResult == "1. Balance\n2. Exit"
+    finally:
+        handler.closePort()